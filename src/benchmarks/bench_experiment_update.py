@@ -0,0 +1,120 @@
+"""Compares the experiment update paths.
+
+``read-modify-write`` is how experiments used to be updated: read the row into a
+schema, change it, then read it again and write every column back.
+``returning`` is `ExperimentRepository.update_fields`, one ``UPDATE ...
+RETURNING`` of the changed columns.
+
+Run from ``src`` with ``python -m benchmarks.bench_experiment_update``. A
+throwaway SQLite database is used unless ``--url`` is given.
+"""
+
+import argparse
+import datetime
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from triangler_fastapi.data import models
+from triangler_fastapi.data.persistence import Base
+from triangler_fastapi.domain import repositories
+from triangler_fastapi.domain import schemas
+
+
+def _read_modify_write(
+    repository: repositories.ExperimentRepository, id: int, name: str
+) -> schemas.ExperimentOutSchema:
+    existing_data = repository.get_by_id(id=id)
+    existing_data.name = name
+    return repository.update(data=existing_data)
+
+
+def _returning(
+    repository: repositories.ExperimentRepository, id: int, name: str
+) -> schemas.ExperimentOutSchema:
+    return repository.update_fields(id, {"name": name})
+
+
+def _time(
+    update: Callable[[repositories.ExperimentRepository, int, str], Any],
+    repository: repositories.ExperimentRepository,
+    ids: list[int],
+    statements: list[str],
+) -> tuple[float, int]:
+    statements.clear()
+    start = time.perf_counter()
+    for i, id in enumerate(ids):
+        update(repository, id, f"renamed {i}")
+    return time.perf_counter() - start, len(statements)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--url", help="database to run against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.url or f"sqlite:///{Path(directory, 'bench.db')}"
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        statements: list[str] = []
+
+        def record(*args: Any) -> None:  # noqa: ANN401
+            statements.append(args[2])
+
+        event.listen(engine, "before_cursor_execute", record)
+
+        with Session(engine) as session:
+            repository = repositories.ExperimentRepository(
+                session=session,
+                data_model=models.Experiment,
+                schema_in=schemas.ExperimentInSchema,
+                schema_out=schemas.ExperimentOutSchema,
+            )
+            today = datetime.date.today()
+            ids = [
+                x.id
+                for x in repository.bulk_create(
+                    [
+                        schemas.ExperimentInSchema(
+                            name=f"bench {i}",
+                            description="bench",
+                            start_on=today,
+                            end_on=today,
+                        )
+                        for i in range(args.count)
+                    ]
+                )
+            ]
+            # warm up both paths so statement compilation is not counted
+            _read_modify_write(repository, ids[0], "warm")
+            _returning(repository, ids[0], "warm")
+
+            results = {
+                "read-modify-write": _time(
+                    _read_modify_write, repository, ids, statements
+                ),
+                "returning": _time(_returning, repository, ids, statements),
+            }
+            repository.bulk_delete(ids)
+        engine.dispose()
+
+    for name, (seconds, statement_count) in results.items():
+        print(
+            f"{name:>17}: {seconds:.3f} s for {args.count} updates, "
+            f"{seconds / args.count * 1000:.3f} ms and "
+            f"{statement_count / args.count:.1f} statements each"
+        )
+    speedup = results["read-modify-write"][0] / results["returning"][0]
+    print(f"speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
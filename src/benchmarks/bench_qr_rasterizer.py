@@ -0,0 +1,70 @@
+"""Compares the PNG QR code rasterizers.
+
+Run from ``src`` with ``python -m benchmarks.bench_qr_rasterizer``.
+"""
+
+import argparse
+import io
+import time
+from collections.abc import Callable
+
+import qrcode
+
+from triangler_fastapi import config
+from triangler_fastapi.domain import qr_raster
+from triangler_fastapi.domain import token_utils
+
+
+def _styled_pil_image(token: str, size: int) -> bytes:
+    buffer = io.BytesIO()
+    token_utils.generate_qr_code_png(token, size=size).save(buffer)
+    return buffer.getvalue()
+
+
+def _numpy(token: str, size: int) -> bytes:
+    return qr_raster.render_png(
+        f"https://{config.HOST_NAME}/observation/response/{token}", box_size=size
+    )
+
+
+def _encode_only(token: str, size: int) -> bytes:
+    qr = qrcode.QRCode(error_correction=qrcode.ERROR_CORRECT_H, box_size=size)
+    qr.add_data(f"https://{config.HOST_NAME}/observation/response/{token}")
+    qr.make(fit=True)
+    return b""
+
+
+def _time(render: Callable[[str, int], bytes], tokens: list[str], size: int) -> float:
+    start = time.perf_counter()
+    for token in tokens:
+        render(token, size)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--size", type=int, default=config.QR_CODE_BOX_SIZE)
+    args = parser.parse_args()
+
+    tokens = [token_utils.generate_unique_token() for _ in range(args.count)]
+    # warm the sprite table so it is not counted against the first render
+    _numpy(tokens[0], args.size)
+    results = {
+        "pil": _time(_styled_pil_image, tokens, args.size),
+        "numpy": _time(_numpy, tokens, args.size),
+        # the module matrix both rasterizers start from
+        "encode": _time(_encode_only, tokens, args.size),
+    }
+    for name, seconds in results.items():
+        print(
+            f"{name:>6}: {seconds:.3f} s for {args.count} codes, "
+            f"{seconds / args.count * 1000:.2f} ms each"
+        )
+    drawing = {x: results[x] - results["encode"] for x in ("pil", "numpy")}
+    print(f"speedup: {results['pil'] / results['numpy']:.1f}x overall, ", end="")
+    print(f"{drawing['pil'] / drawing['numpy']:.1f}x excluding encoding")
+
+
+if __name__ == "__main__":
+    main()
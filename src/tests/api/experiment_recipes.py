@@ -3,11 +3,14 @@ from datetime import timedelta
 
 from fastapi.testclient import TestClient
 
+from triangler_fastapi.constants import DiscriminationTests
 from triangler_fastapi.domain.schemas import ExperimentOutSchema
 
 
 def create_experiment(
-    client: TestClient, name: str = "Test Experiment"
+    client: TestClient,
+    name: str = "Test Experiment",
+    test_type: DiscriminationTests = DiscriminationTests.TRIANGLE,
 ) -> ExperimentOutSchema:
     response = client.post(
         "/api/v1/experiments/",
@@ -16,6 +19,7 @@ def create_experiment(
             "description": "This is a test experiment.",
             "start_on": datetime.today().date().isoformat(),
             "end_on": (datetime.today() + timedelta(days=7)).date().isoformat(),
+            "test_type": test_type.value,
             "observations": [],
         },
     )
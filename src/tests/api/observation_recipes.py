@@ -0,0 +1,88 @@
+from typing import Literal
+
+from sqlalchemy.orm import Session
+
+from triangler_fastapi.constants import ExperienceLevels
+from triangler_fastapi.data import models
+from triangler_fastapi.domain import repositories
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import token_utils
+
+
+def create_sample_flight(
+    session: Session,
+    experiment_id: int,
+    correct_sample: Literal["A", "B", "C"] = "A",
+) -> schemas.SampleFlightOutSchema:
+    repository = repositories.SampleFlightRepository(
+        session=session,
+        data_model=models.SampleFlight,
+        schema_in=schemas.SampleFlightInSchema,
+        schema_out=schemas.SampleFlightOutSchema,
+    )
+    return repository.create(
+        schemas.SampleFlightInSchema.new(
+            experiment_id=experiment_id, correct_sample=correct_sample
+        )
+    )
+
+
+def create_response(
+    session: Session,
+    sample_flight_id: int,
+    chosen_sample: Literal["A", "B", "C"],
+    experience_level: ExperienceLevels = ExperienceLevels.HOMEBREWER,
+) -> schemas.ResponseOutSchema:
+    repository = repositories.ResponseRepository(
+        session=session,
+        data_model=models.Response,
+        schema_in=schemas.ResponseInSchema,
+        schema_out=schemas.ResponseOutSchema,
+    )
+    return repository.create(
+        schemas.ResponseInSchema(
+            sample_flight_id=sample_flight_id,
+            experience_level=experience_level,
+            chosen_sample=chosen_sample,
+        )
+    )
+
+
+def create_panel(
+    session: Session,
+    experiment_id: int,
+    n_correct: int,
+    n_incorrect: int,
+    n_unanswered: int = 0,
+    experience_level: ExperienceLevels = ExperienceLevels.HOMEBREWER,
+) -> None:
+    """Creates sample flights with correct, incorrect and missing responses."""
+    for chosen_sample in ["A"] * n_correct + ["B"] * n_incorrect:
+        sample_flight = create_sample_flight(session, experiment_id, "A")
+        create_response(
+            session,
+            sample_flight.id,
+            chosen_sample,  # pyright: ignore[reportArgumentType]
+            experience_level=experience_level,
+        )
+    for _ in range(n_unanswered):
+        create_sample_flight(session, experiment_id, "A")
+
+
+def create_token(
+    session: Session, sample_flight_id: int, response_id: int | None = None
+) -> schemas.SampleFlightTokenOutSchema:
+    repository = repositories.SampleFlightTokenRepository(
+        session=session,
+        data_model=models.SampleFlightToken,
+        schema_in=schemas.SampleFlightTokenInSchema,
+        schema_out=schemas.SampleFlightTokenOutSchema,
+    )
+    return repository.create(
+        schemas.SampleFlightTokenInSchema(
+            token=token_utils.generate_unique_token(),
+            expiry_date=token_utils.calculate_expiry_date(),
+            response_id=response_id,
+            sample_flight_id=sample_flight_id,
+        )
+    )
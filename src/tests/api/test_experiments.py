@@ -1,7 +1,16 @@
+from datetime import timedelta
 from secrets import token_urlsafe
 from typing import Self
 
+import pytest
+from sqlalchemy.orm import Session
+
 from tests.api.experiment_recipes import create_experiment
+from tests.api.observation_recipes import create_panel
+from triangler_fastapi import config
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.constants import SequentialDecisions
+from triangler_fastapi.domain.schemas import ExperimentDetailSchema
 from triangler_fastapi.domain.schemas import ExperimentOutSchema
 
 from .client import create_test_client
@@ -38,6 +47,27 @@ class TestExperimentsGetApiEndpoints:
         assert test_experiment.name == experiment.name
         assert test_experiment.id == experiment.id
 
+    def test_get_experiment_sequential_analysis(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        test_name = f"test {token_urlsafe(8)}"
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=test_name)
+        create_panel(db_session, test_experiment.id, n_correct=15, n_incorrect=1)
+
+        # act
+        resp = client.get(f"/api/v1/experiments/{test_experiment.id}")
+        assert resp.status_code == 200
+        experiment = ExperimentDetailSchema.model_validate(resp.json())
+
+        # assert
+        analysis = experiment.sequential_analysis
+        assert analysis.total_responses == 16
+        assert analysis.correct_responses == 15
+        assert analysis.log_likelihood_ratio >= analysis.upper_boundary
+        assert analysis.decision == SequentialDecisions.ACCEPT_ALTERNATIVE
+
     def test_get_experiment_not_exists(self: Self) -> None:
         # arrange
         non_existant_id = -1
@@ -69,6 +99,70 @@ class TestExperimentsGetAllApiEndpoints:
         assert all_experiments
         assert test_name in [x.name for x in all_experiments]
 
+    def test_get_all_experiments_paginates(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        created = [
+            create_experiment(client, name=f"test {token_urlsafe(8)}").id
+            for _ in range(3)
+        ]
+
+        # act
+        seen: list[int] = []
+        params: dict[str, str | int] = {"limit": 2}
+        while len(seen) < 3:
+            resp = client.get("/api/v1/experiments/", params=params)
+            assert resp.status_code == 200, resp.text
+            assert len(resp.json()) <= 2
+            seen.extend(x["id"] for x in resp.json())
+            if "X-Next-Cursor" not in resp.headers:
+                break
+            params["cursor"] = resp.headers["X-Next-Cursor"]
+
+        # assert
+        assert seen[:3] == created[::-1]
+        assert seen == sorted(seen, reverse=True)
+
+    def test_get_all_experiments_rejects_bad_pages(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        bad_cursor = client.get("/api/v1/experiments/", params={"cursor": "nope!"})
+        too_large = client.get(
+            "/api/v1/experiments/", params={"limit": config.PAGE_SIZE_MAX + 1}
+        )
+
+        # assert
+        assert bad_cursor.status_code == 422
+        assert too_large.status_code == 422
+
+
+class TestExperimentsExportApiEndpoints:
+    def test_export_experiments_ndjson_and_json(self: Self) -> None:
+        # arrange
+        test_name = f"test {token_urlsafe(8)}"
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=test_name)
+
+        # act
+        ndjson = client.get("/api/v1/experiments/export")
+        json_array = client.get("/api/v1/experiments/export", params={"format": "json"})
+
+        # assert
+        assert ndjson.status_code == 200, ndjson.text
+        assert ndjson.headers["content-type"] == "application/x-ndjson"
+        exported = [
+            ExperimentOutSchema.model_validate_json(x)
+            for x in ndjson.content.splitlines()
+        ]
+        assert test_experiment in exported
+        assert [x.id for x in exported] == sorted(x.id for x in exported)
+        assert json_array.status_code == 200, json_array.text
+        assert [
+            ExperimentOutSchema.model_validate(x) for x in json_array.json()
+        ] == exported
+
 
 class TestExperimentsUpdateApiEndpoints:
     def test_update_experiment_succeeds(self: Self) -> None:
@@ -90,11 +184,12 @@ class TestExperimentsUpdateApiEndpoints:
         # act
         test_new_name = f"test {token_urlsafe(8)}"
         experiment.name = test_new_name
-        updated_experiment_data = experiment.model_dump_json(
-            exclude={"id", "sample_size", "p_value", "created_at", "updated_at"}
+        updated_experiment_data = experiment.model_dump(
+            mode="json",
+            exclude={"id", "sample_size", "p_value", "created_at", "updated_at"},
         )
         resp_update = client.put(
-            f"/api/v1/experiments/{test_experiment.id}", content=updated_experiment_data
+            f"/api/v1/experiments/{test_experiment.id}", json=updated_experiment_data
         )
         assert resp_update.status_code == 200
         experiment_response_raw = resp.json()
@@ -106,6 +201,65 @@ class TestExperimentsUpdateApiEndpoints:
         assert updated_experiment.name == test_new_name
         assert test_experiment.id == experiment.id
 
+    def test_update_experiment_partially(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        test_new_name = f"test {token_urlsafe(8)}"
+
+        # act
+        resp_update = client.put(
+            f"/api/v1/experiments/{test_experiment.id}", json={"name": test_new_name}
+        )
+
+        # assert
+        assert resp_update.status_code == 200, resp_update.text
+        updated_experiment = ExperimentOutSchema.model_validate(resp_update.json())
+        assert updated_experiment.name == test_new_name
+        assert updated_experiment.description == test_experiment.description
+        assert updated_experiment.start_on == test_experiment.start_on
+        assert updated_experiment.end_on == test_experiment.end_on
+        assert updated_experiment.test_type == test_experiment.test_type
+
+    def test_update_experiment_clears_description(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+
+        # act
+        resp_update = client.put(
+            f"/api/v1/experiments/{test_experiment.id}",
+            json={"description": "", "name": None},
+        )
+
+        # assert
+        assert resp_update.status_code == 200, resp_update.text
+        updated_experiment = ExperimentOutSchema.model_validate(resp_update.json())
+        assert updated_experiment.description == ""
+        assert updated_experiment.name == test_experiment.name
+
+    @pytest.mark.parametrize(("field", "days"), [("start_on", 8), ("end_on", -1)])
+    def test_update_experiment_rejects_inverted_range(
+        self: Self, field: str, days: int
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        new_date = test_experiment.start_on + timedelta(days=days)
+
+        # act
+        resp_update = client.put(
+            f"/api/v1/experiments/{test_experiment.id}",
+            json={field: new_date.isoformat()},
+        )
+        resp_get = client.get(f"/api/v1/experiments/{test_experiment.id}")
+
+        # assert
+        assert resp_update.status_code == 422
+        unchanged_experiment = ExperimentOutSchema.model_validate(resp_get.json())
+        assert unchanged_experiment.start_on == test_experiment.start_on
+        assert unchanged_experiment.end_on == test_experiment.end_on
+
     def test_update_experiment_fails_not_exists(self: Self) -> None:
         # arrange
         non_existant_id = -1
@@ -159,3 +313,131 @@ class TestExperimentsDeleteApiEndpoints:
 
         # assert
         assert resp_delete.status_code == 404
+
+
+class TestExperimentsBatchApiEndpoints:
+    def test_create_update_delete_experiments(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        names = [f"test {token_urlsafe(8)}" for _ in range(3)]
+        experiment = {
+            "description": "This is a test experiment.",
+            "start_on": "2024-01-01",
+            "end_on": "2024-01-08",
+        }
+
+        # act
+        resp_create = client.post(
+            "/api/v1/experiments/batch",
+            json=[{"name": x, **experiment} for x in names],
+        )
+        created = [ExperimentOutSchema.model_validate(x) for x in resp_create.json()]
+        resp_update = client.put(
+            "/api/v1/experiments/batch",
+            json=[
+                {"id": x.id, "name": f"{x.name} renamed", **experiment} for x in created
+            ],
+        )
+        resp_delete = client.request(
+            "DELETE",
+            "/api/v1/experiments/batch",
+            json={"ids": [x.id for x in created[:2]]},
+        )
+
+        # assert
+        assert resp_create.status_code == 201, resp_create.text
+        assert [x.name for x in created] == names
+        assert resp_update.status_code == 200, resp_update.text
+        assert [x["name"] for x in resp_update.json()] == [
+            f"{x} renamed" for x in names
+        ]
+        assert resp_delete.status_code == 200, resp_delete.text
+        assert client.get(f"/api/v1/experiments/{created[0].id}").status_code == 404
+        assert client.get(f"/api/v1/experiments/{created[2].id}").status_code == 200
+
+    def test_batch_update_keeps_test_types_left_out(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        duo_trio = create_experiment(
+            client,
+            name=f"test {token_urlsafe(8)}",
+            test_type=DiscriminationTests.DUO_TRIO,
+        )
+        tetrad = create_experiment(
+            client,
+            name=f"test {token_urlsafe(8)}",
+            test_type=DiscriminationTests.TETRAD,
+        )
+        fields = {"description", "start_on", "end_on"}
+
+        # act
+        resp_update = client.put(
+            "/api/v1/experiments/batch",
+            json=[
+                {
+                    **duo_trio.model_dump(mode="json", include={"id", *fields}),
+                    "name": "renamed",
+                },
+                {
+                    **tetrad.model_dump(mode="json", include={"id", *fields}),
+                    "name": "renamed",
+                    "test_type": DiscriminationTests.TRIANGLE.value,
+                },
+            ],
+        )
+
+        # assert
+        assert resp_update.status_code == 200, resp_update.text
+        updated = [ExperimentOutSchema.model_validate(x) for x in resp_update.json()]
+        assert [(x.name, x.test_type) for x in updated] == [
+            ("renamed", DiscriminationTests.DUO_TRIO),
+            ("renamed", DiscriminationTests.TRIANGLE),
+        ]
+
+    def test_batch_with_unknown_experiment_changes_nothing(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        non_existant_id = 999999
+
+        # act
+        resp_update = client.put(
+            "/api/v1/experiments/batch",
+            json=[
+                {
+                    **test_experiment.model_dump(
+                        mode="json", include={"id", "description", "start_on", "end_on"}
+                    ),
+                    "name": "renamed",
+                },
+                {
+                    **test_experiment.model_dump(
+                        mode="json", include={"description", "start_on", "end_on"}
+                    ),
+                    "id": non_existant_id,
+                    "name": "renamed",
+                },
+            ],
+        )
+        resp_delete = client.request(
+            "DELETE",
+            "/api/v1/experiments/batch",
+            json={"ids": [test_experiment.id, non_existant_id]},
+        )
+        resp_get = client.get(f"/api/v1/experiments/{test_experiment.id}")
+
+        # assert
+        assert resp_update.status_code == 404
+        assert resp_delete.status_code == 404
+        assert resp_get.status_code == 200
+        assert resp_get.json()["name"] == test_experiment.name
+
+    def test_empty_batch_is_rejected(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.post("/api/v1/experiments/batch", json=[])
+
+        # assert
+        assert resp.status_code == 422
@@ -0,0 +1,278 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from secrets import token_urlsafe
+from typing import Any
+from typing import Self
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from tests.api.experiment_recipes import create_experiment
+from tests.api.observation_recipes import create_response
+from tests.api.observation_recipes import create_sample_flight
+from tests.api.observation_recipes import create_token
+
+from .client import create_test_client
+
+
+@contextmanager
+def count_statements() -> Iterator[list[str]]:
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:  # noqa: ANN401
+        statements.append(args[2])
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
+class TestObservationApiEndpoints:
+    def test_get_observations(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        answered = create_sample_flight(db_session, test_experiment.id, "B")
+        response = create_response(db_session, answered.id, "B")
+        answered_token = create_token(db_session, answered.id, response.id)
+        tokens = [answered_token]
+        for _ in range(9):
+            sample_flight = create_sample_flight(db_session, test_experiment.id)
+            tokens.append(create_token(db_session, sample_flight.id))
+
+        # act
+        with count_statements() as statements:
+            resp = client.get(f"/api/v1/experiments/{test_experiment.id}/observations")
+
+        # assert
+        assert resp.status_code == 200
+        observations = resp.json()
+        assert [x["token"]["token"] for x in observations] == [
+            x.token for x in reversed(tokens)
+        ]
+        assert "X-Next-Cursor" not in resp.headers
+        answered_observation = observations[-1]
+        assert answered_observation["experiment_id"] == test_experiment.id
+        assert answered_observation["sample_flight"]["id"] == answered.id
+        assert answered_observation["response"]["id"] == response.id
+        assert answered_observation["response"]["chosen_sample"] == "B"
+        assert all(x["response"] is None for x in observations[:-1])
+        # the experiment lookup and one query for the observations, however
+        # many sample flights there are
+        selects = [x for x in statements if x.lstrip().upper().startswith("SELECT")]
+        assert len(selects) <= 2
+
+    def test_get_observations_paginated(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        tokens = set()
+        for _ in range(5):
+            sample_flight = create_sample_flight(db_session, test_experiment.id)
+            tokens.add(create_token(db_session, sample_flight.id).token)
+        url = f"/api/v1/experiments/{test_experiment.id}/observations"
+
+        # act
+        seen = []
+        pages = 0
+        params: dict[str, Any] = {"limit": 2}
+        while True:
+            resp = client.get(url, params=params)
+            assert resp.status_code == 200
+            seen.extend(x["token"]["token"] for x in resp.json())
+            pages += 1
+            if "X-Next-Cursor" not in resp.headers:
+                break
+            params["cursor"] = resp.headers["X-Next-Cursor"]
+
+        # assert
+        assert pages == 3
+        assert len(seen) == 5
+        assert set(seen) == tokens
+
+    def test_get_observations_invalid_cursor(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+
+        # act
+        resp = client.get(
+            f"/api/v1/experiments/{test_experiment.id}/observations",
+            params={"cursor": "not a cursor"},
+        )
+
+        # assert
+        assert resp.status_code == 422
+
+    def test_get_observations_experiment_not_exists(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get("/api/v1/experiments/999999/observations")
+
+        # assert
+        assert resp.status_code == 404
+
+    def test_create_update_delete_observations(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flights = [
+            create_sample_flight(db_session, test_experiment.id, "A") for _ in range(3)
+        ]
+        url = f"/api/v1/experiments/{test_experiment.id}/observations/batch"
+
+        # act
+        resp_create = client.post(
+            url,
+            json=[
+                {
+                    "sample_flight_id": x.id,
+                    "experience_level": "Homebrewer",
+                    "chosen_sample": "A",
+                }
+                for x in sample_flights
+            ],
+        )
+        created = resp_create.json()
+        resp_update = client.put(
+            url,
+            json=[
+                {
+                    "id": created[0]["id"],
+                    "experience_level": "Craft Enthusiast",
+                    "chosen_sample": "B",
+                }
+            ],
+        )
+        resp_delete = client.request("DELETE", url, json={"ids": [created[1]["id"]]})
+        report = client.get(
+            "/api/v1/experiments/report", params={"experiment_id": test_experiment.id}
+        )
+
+        # assert
+        assert resp_create.status_code == 201, resp_create.text
+        assert [x["sample_flight_id"] for x in created] == [
+            x.id for x in sample_flights
+        ]
+        assert resp_update.status_code == 200, resp_update.text
+        assert resp_update.json()[0]["chosen_sample"] == "B"
+        assert resp_delete.status_code == 200, resp_delete.text
+        result = report.json()["experiments"][0]
+        assert result["sample_size"] == 2
+        assert result["correct_count"] == 1
+
+    def test_observations_of_another_experiment_are_not_found(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        other_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, other_experiment.id, "A")
+        response = create_response(db_session, sample_flight.id, "A")
+        url = f"/api/v1/experiments/{test_experiment.id}/observations/batch"
+
+        # act
+        resp_create = client.post(
+            url,
+            json=[
+                {
+                    "sample_flight_id": sample_flight.id,
+                    "experience_level": "Homebrewer",
+                    "chosen_sample": "A",
+                }
+            ],
+        )
+        resp_delete = client.request("DELETE", url, json={"ids": [response.id]})
+
+        # assert
+        assert resp_create.status_code == 404
+        assert resp_delete.status_code == 404
+
+    def test_second_answer_to_a_flight_conflicts(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, test_experiment.id, "A")
+        answer = {
+            "sample_flight_id": sample_flight.id,
+            "experience_level": "Homebrewer",
+            "chosen_sample": "A",
+        }
+        url = f"/api/v1/experiments/{test_experiment.id}/observations/"
+
+        # act
+        resp_first = client.post(url, json=answer)
+        resp_second = client.post(url, json={**answer, "chosen_sample": "B"})
+        report = client.get(
+            "/api/v1/experiments/report", params={"experiment_id": test_experiment.id}
+        )
+
+        # assert
+        assert resp_first.status_code == 201, resp_first.text
+        assert resp_second.status_code == 409
+        result = report.json()["experiments"][0]
+        assert result["sample_size"] == 1
+        assert result["correct_count"] == 1
+
+    def test_batch_answering_a_flight_twice_conflicts(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        answered = create_sample_flight(db_session, test_experiment.id, "A")
+        create_response(db_session, answered.id, "A")
+        unanswered = create_sample_flight(db_session, test_experiment.id, "A")
+        url = f"/api/v1/experiments/{test_experiment.id}/observations/batch"
+
+        def answer(sample_flight_id: int) -> dict[str, Any]:
+            return {
+                "sample_flight_id": sample_flight_id,
+                "experience_level": "Homebrewer",
+                "chosen_sample": "A",
+            }
+
+        # act
+        resp_answered = client.post(
+            url, json=[answer(unanswered.id), answer(answered.id)]
+        )
+        resp_repeated = client.post(
+            url, json=[answer(unanswered.id), answer(unanswered.id)]
+        )
+        resp_valid = client.post(url, json=[answer(unanswered.id)])
+
+        # assert
+        assert resp_answered.status_code == 409
+        assert resp_repeated.status_code == 409
+        assert resp_valid.status_code == 201, resp_valid.text
+
+    def test_deleted_observation_reopens_its_ballot(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, test_experiment.id, "A")
+        token = create_token(db_session, sample_flight.id)
+        answer = {"experience_level": "Homebrewer", "chosen_sample": "A"}
+        response = client.post(f"/api/v1/tokens/{token.token}/response", json=answer)
+
+        # act
+        resp_delete = client.request(
+            "DELETE",
+            f"/api/v1/experiments/{test_experiment.id}/observations/batch",
+            json={"ids": [response.json()["id"]]},
+        )
+        resp_redeem = client.post(f"/api/v1/tokens/{token.token}/response", json=answer)
+
+        # assert
+        assert resp_delete.status_code == 200, resp_delete.text
+        assert resp_redeem.status_code == 201, resp_redeem.text
@@ -0,0 +1,97 @@
+from typing import Self
+
+import pytest
+
+from triangler_fastapi import config
+from triangler_fastapi.domain import schemas
+
+from .client import create_test_client
+
+
+class TestPlanningApiEndpoints:
+    def test_sample_size_plan(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get(
+            "/api/v1/planning/sample-size",
+            params={"discriminator_proportion": 0.5, "beta": 0.2},
+        )
+        assert resp.status_code == 200, resp.text
+        plan = schemas.SampleSizePlanSchema.model_validate(resp.json())
+
+        # assert
+        assert plan.sample_size is not None
+        assert plan.power is not None
+        assert plan.power >= 0.8
+        assert plan.critical_value is not None
+        assert plan.critical_value <= plan.sample_size
+
+    def test_sample_size_plan_rejects_invalid_proportion(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get(
+            "/api/v1/planning/sample-size", params={"discriminator_proportion": 0}
+        )
+
+        # assert
+        assert resp.status_code == 422
+
+    def test_critical_value(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get(
+            "/api/v1/planning/critical-value",
+            params={"sample_size": 12, "discriminator_proportion": 0.3},
+        )
+        assert resp.status_code == 200, resp.text
+        result = schemas.CriticalValueSchema.model_validate(resp.json())
+
+        # assert
+        assert result.critical_value == 8
+        assert result.power is not None
+
+    def test_sample_size_plan_keeps_inputs(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get(
+            "/api/v1/planning/sample-size",
+            params={
+                "discriminator_proportion": 0.123456,
+                "significance_level": 0.049999,
+            },
+        )
+        assert resp.status_code == 200, resp.text
+        plan = schemas.SampleSizePlanSchema.model_validate(resp.json())
+
+        # assert
+        assert plan.discriminator_proportion == 0.123456
+        assert plan.significance_level == 0.049999
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"sample_size": 0},
+            {"sample_size": config.PLANNING_MAX_N + 1},
+            {"sample_size": 12, "significance_level": 0},
+            {"sample_size": 12, "significance_level": 1},
+        ],
+    )
+    def test_critical_value_rejects_out_of_range(
+        self: Self, params: dict[str, float]
+    ) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get("/api/v1/planning/critical-value", params=params)
+
+        # assert
+        assert resp.status_code == 422
@@ -0,0 +1,205 @@
+from datetime import date
+from datetime import timedelta
+from secrets import token_urlsafe
+from typing import Self
+
+import pytest
+from sqlalchemy.orm import Session
+
+from tests.api.experiment_recipes import create_experiment
+from tests.api.observation_recipes import create_panel
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.constants import ExperienceLevels
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import statistics
+
+from .client import create_test_client
+
+
+class TestExperimentsReportApiEndpoints:
+    def test_report_counts_and_p_values(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        significant = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        not_significant = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        create_panel(db_session, significant.id, n_correct=9, n_incorrect=3)
+        create_panel(
+            db_session, not_significant.id, n_correct=2, n_incorrect=4, n_unanswered=2
+        )
+
+        # act
+        resp = client.get(
+            "/api/v1/experiments/report",
+            params={"experiment_id": [significant.id, not_significant.id]},
+        )
+        assert resp.status_code == 200, resp.text
+        report = schemas.ExperimentReportSchema.model_validate(resp.json())
+
+        # assert
+        rows = {x.experiment_id: x for x in report.experiments}
+        assert set(rows) == {significant.id, not_significant.id}
+        assert rows[significant.id].sample_size == 12
+        assert rows[significant.id].correct_count == 9
+        assert rows[significant.id].p_value == pytest.approx(statistics.p_value(9, 12))
+        assert rows[significant.id].is_significant is True
+        posterior = rows[significant.id].posterior
+        assert (posterior.alpha, posterior.beta) == (10.0, 4.0)
+        lower, upper = posterior.proportion_correct_interval
+        assert lower < posterior.proportion_correct_mean < upper
+        assert 0 < posterior.discriminator_proportion_mean < 1
+        assert rows[not_significant.id].total_flights == 8
+        assert rows[not_significant.id].sample_size == 6
+        assert rows[not_significant.id].is_significant is False
+
+    def test_report_mixes_test_types(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        triangle = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        duo_trio = create_experiment(
+            client,
+            name=f"test {token_urlsafe(8)}",
+            test_type=DiscriminationTests.DUO_TRIO,
+        )
+        create_panel(db_session, triangle.id, n_correct=7, n_incorrect=5)
+        create_panel(db_session, duo_trio.id, n_correct=7, n_incorrect=5)
+
+        # act
+        resp = client.get(
+            "/api/v1/experiments/report",
+            params={"experiment_id": [triangle.id, duo_trio.id]},
+        )
+        assert resp.status_code == 200, resp.text
+        report = schemas.ExperimentReportSchema.model_validate(resp.json())
+
+        # assert
+        rows = {x.experiment_id: x for x in report.experiments}
+        assert rows[duo_trio.id].test_type == DiscriminationTests.DUO_TRIO
+        assert rows[triangle.id].p_value == pytest.approx(statistics.p_value(7, 12))
+        assert rows[duo_trio.id].p_value == pytest.approx(
+            statistics.p_value(7, 12, p0=1 / 2)
+        )
+
+    def test_report_includes_experiments_without_responses(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+
+        # act
+        resp = client.get("/api/v1/experiments/report")
+        assert resp.status_code == 200, resp.text
+        report = schemas.ExperimentReportSchema.model_validate(resp.json())
+
+        # assert
+        rows = {x.experiment_id: x for x in report.experiments}
+        assert rows[test_experiment.id].sample_size == 0
+        assert rows[test_experiment.id].p_value == 1.0
+        assert rows[test_experiment.id].is_significant is False
+
+
+class TestAdjustedReportApiEndpoints:
+    def test_adjusted_report_over_date_range(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        significant = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        not_significant = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        create_panel(db_session, significant.id, n_correct=12, n_incorrect=2)
+        create_panel(db_session, not_significant.id, n_correct=3, n_incorrect=5)
+        today = date.today()
+
+        # act
+        resp = client.get(
+            "/api/v1/experiments/report/adjusted",
+            params={"start_on": today.isoformat(), "end_on": today.isoformat()},
+        )
+        assert resp.status_code == 200, resp.text
+        report = schemas.AdjustedReportSchema.model_validate(resp.json())
+
+        # assert
+        rows = {x.experiment_id: x for x in report.experiments}
+        assert {significant.id, not_significant.id} <= set(rows)
+        assert report.family_size >= 2
+        for row in rows.values():
+            assert row.p_value <= row.bh_adjusted_p_value <= row.holm_adjusted_p_value
+        assert rows[significant.id].p_value == pytest.approx(statistics.p_value(12, 14))
+        assert rows[not_significant.id].is_significant_holm is False
+
+    def test_adjusted_report_excludes_other_dates(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        long_ago = date.today() - timedelta(days=365)
+
+        # act
+        resp = client.get(
+            "/api/v1/experiments/report/adjusted",
+            params={"start_on": long_ago.isoformat(), "end_on": long_ago.isoformat()},
+        )
+        assert resp.status_code == 200, resp.text
+        report = schemas.AdjustedReportSchema.model_validate(resp.json())
+
+        # assert
+        assert test_experiment.id not in {x.experiment_id for x in report.experiments}
+
+    def test_adjusted_report_invalid_range(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get(
+            "/api/v1/experiments/report/adjusted",
+            params={"start_on": "2024-02-01", "end_on": "2024-01-01"},
+        )
+
+        # assert
+        assert resp.status_code == 422
+
+
+class TestExperienceLevelReportApiEndpoints:
+    def test_report_per_experience_level(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        create_panel(
+            db_session,
+            test_experiment.id,
+            n_correct=7,
+            n_incorrect=1,
+            experience_level=ExperienceLevels.BJCP_TRAINING,
+        )
+        create_panel(
+            db_session,
+            test_experiment.id,
+            n_correct=1,
+            n_incorrect=3,
+            experience_level=ExperienceLevels.NON_BEER_DRINKER,
+        )
+
+        # act
+        resp = client.get(
+            f"/api/v1/experiments/{test_experiment.id}/report/experience-levels"
+        )
+        assert resp.status_code == 200, resp.text
+        report = schemas.ExperimentStratifiedReportSchema.model_validate(resp.json())
+
+        # assert
+        levels = {x.experience_level: x for x in report.experience_levels}
+        assert set(levels) == set(ExperienceLevels)
+        assert levels[ExperienceLevels.BJCP_TRAINING].sample_size == 8
+        assert levels[ExperienceLevels.BJCP_TRAINING].correct_rate == 7 / 8
+        assert levels[ExperienceLevels.BJCP_TRAINING].is_significant is True
+        assert levels[ExperienceLevels.NON_BEER_DRINKER].correct_count == 1
+        assert levels[ExperienceLevels.HOMEBREWER].sample_size == 0
+        assert levels[ExperienceLevels.HOMEBREWER].correct_rate is None
+        assert report.pooled.sample_size == 12
+        assert report.pooled.correct_count == 8
+        assert report.pooled.p_value == pytest.approx(statistics.p_value(8, 12))
+
+    def test_report_experiment_not_exists(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get("/api/v1/experiments/-1/report/experience-levels")
+
+        # assert
+        assert resp.status_code == 404
@@ -0,0 +1,356 @@
+import json
+from collections import Counter
+from collections.abc import Iterator
+from secrets import token_urlsafe
+from typing import Self
+
+import pytest
+from sqlalchemy.orm import Session
+
+from tests.api.experiment_recipes import create_experiment
+from tests.api.observation_recipes import create_response
+from tests.api.observation_recipes import create_sample_flight
+from tests.api.observation_recipes import create_token
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.data import models
+from triangler_fastapi.domain import designs
+from triangler_fastapi.domain import repositories
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import token_utils
+from triangler_fastapi.services import observation_service
+
+from .client import create_test_client
+
+
+class TestSampleFlightBatchApiEndpoints:
+    def test_create_sample_flights_with_tokens(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+
+        # act
+        resp = client.post(
+            f"/api/v1/experiments/{test_experiment.id}/sample-flights",
+            json={"count": 5, "correct_sample": "B"},
+        )
+        report = client.get(
+            "/api/v1/experiments/report", params={"experiment_id": test_experiment.id}
+        )
+
+        # assert
+        assert resp.status_code == 201, resp.text
+        observations = resp.json()
+        assert len(observations) == 5
+        assert len({x["token"]["token"] for x in observations}) == 5
+        for observation in observations:
+            assert observation["sample_flight"]["correct_sample"] == "B"
+            assert observation["sample_flight"]["experiment_id"] == test_experiment.id
+            assert (
+                observation["token"]["sample_flight_id"]
+                == observation["sample_flight"]["id"]
+            )
+        assert report.json()["experiments"][0]["total_flights"] == 5
+
+    def test_create_balanced_sample_flights(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+
+        # act
+        resp = client.post(
+            f"/api/v1/experiments/{test_experiment.id}/sample-flights",
+            json={"count": 12, "design": "balanced"},
+        )
+
+        # assert
+        assert resp.status_code == 201, resp.text
+        serving_orders = Counter(
+            x["sample_flight"]["serving_order"] for x in resp.json()
+        )
+        assert serving_orders == {x: 2 for x in designs.SERVING_ORDERS}
+
+    def test_balanced_design_needs_a_triangle_test(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(
+            client,
+            name=f"test {token_urlsafe(8)}",
+            test_type=DiscriminationTests.TETRAD,
+        )
+
+        # act
+        resp = client.post(
+            f"/api/v1/experiments/{test_experiment.id}/sample-flights",
+            json={"count": 6, "design": "balanced"},
+        )
+
+        # assert
+        assert resp.status_code == 422
+
+    def test_create_sample_flights_experiment_not_exists(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.post(
+            "/api/v1/experiments/999999999/sample-flights", json={"count": 1}
+        )
+
+        # assert
+        assert resp.status_code == 404
+
+    def test_create_sample_flights_rejects_empty_batch(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.post("/api/v1/experiments/1/sample-flights", json={"count": 0})
+
+        # assert
+        assert resp.status_code == 422
+
+
+class TestSampleNamesApiEndpoints:
+    @pytest.mark.parametrize(
+        ("test_type", "samples", "invalid_sample"),
+        [
+            (DiscriminationTests.TRIANGLE, {"A", "B", "C"}, "D"),
+            (DiscriminationTests.DUO_TRIO, {"A", "B"}, "C"),
+            (DiscriminationTests.TETRAD, {"A", "B", "C", "D"}, None),
+            (DiscriminationTests.TWO_AFC, {"A", "B"}, "C"),
+        ],
+    )
+    def test_samples_follow_the_test_type(
+        self: Self,
+        test_type: DiscriminationTests,
+        samples: set[str],
+        invalid_sample: str | None,
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(
+            client, name=f"test {token_urlsafe(8)}", test_type=test_type
+        )
+        url = f"/api/v1/experiments/{test_experiment.id}/sample-flights"
+
+        # act
+        resp = client.post(url, json={"count": 60})
+        observations = resp.json()
+        token = observations[0]["token"]["token"]
+        resp_invalid_batch = client.post(
+            f"{url}/batch", json=[{"correct_sample": invalid_sample or "A"}]
+        )
+        resp_invalid_mint = client.post(
+            url, json={"count": 1, "correct_sample": invalid_sample or "A"}
+        )
+        resp_invalid_answer = client.post(
+            f"/api/v1/tokens/{token}/response",
+            json={
+                "experience_level": "Homebrewer",
+                "chosen_sample": invalid_sample or "A",
+            },
+        )
+
+        # assert
+        assert resp.status_code == 201, resp.text
+        # 60 draws miss one of four samples with a chance of about 1e-7
+        assert {x["sample_flight"]["correct_sample"] for x in observations} == samples
+        expected_status = (201, 201, 201) if invalid_sample is None else (422,) * 3
+        assert (
+            resp_invalid_batch.status_code,
+            resp_invalid_mint.status_code,
+            resp_invalid_answer.status_code,
+        ) == expected_status
+
+
+class TestSampleFlightBulkApiEndpoints:
+    def test_create_update_delete_sample_flights(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        url = f"/api/v1/experiments/{test_experiment.id}/sample-flights/batch"
+        answered = create_sample_flight(db_session, test_experiment.id, "A")
+        create_response(db_session, answered.id, "B")
+
+        # act
+        resp_create = client.post(
+            url, json=[{"correct_sample": x} for x in ["A", "B", "C"]]
+        )
+        created = resp_create.json()
+        resp_update = client.put(
+            url,
+            json=[{"id": answered.id, "correct_sample": "B"}]
+            + [{"id": x["id"], "correct_sample": "A"} for x in created],
+        )
+        resp_delete = client.request(
+            "DELETE", url, json={"ids": [x["id"] for x in created[:2]]}
+        )
+        report = client.get(
+            "/api/v1/experiments/report", params={"experiment_id": test_experiment.id}
+        )
+
+        # assert
+        assert resp_create.status_code == 201, resp_create.text
+        assert [x["correct_sample"] for x in created] == ["A", "B", "C"]
+        assert all(x["experiment_id"] == test_experiment.id for x in created)
+        assert resp_update.status_code == 200, resp_update.text
+        assert [x["correct_sample"] for x in resp_update.json()] == [
+            "B",
+            "A",
+            "A",
+            "A",
+        ]
+        assert resp_delete.status_code == 200, resp_delete.text
+        result = report.json()["experiments"][0]
+        assert result["total_flights"] == 2
+        assert result["sample_size"] == 1
+        # the answered flight's correct sample was moved to its response
+        assert result["correct_count"] == 1
+
+    def test_tokens_of_deleted_sample_flights_are_not_found(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        observations = client.post(
+            f"/api/v1/experiments/{test_experiment.id}/sample-flights",
+            json={"count": 2},
+        ).json()
+        answer = {"experience_level": "Homebrewer", "chosen_sample": "A"}
+        answered, unanswered = (x["token"]["token"] for x in observations)
+        client.post(f"/api/v1/tokens/{answered}/response", json=answer)
+
+        # act
+        resp_delete = client.request(
+            "DELETE",
+            f"/api/v1/experiments/{test_experiment.id}/sample-flights/batch",
+            json={"ids": [x["sample_flight"]["id"] for x in observations]},
+        )
+        report = client.get(
+            "/api/v1/experiments/report", params={"experiment_id": test_experiment.id}
+        )
+
+        # assert
+        assert resp_delete.status_code == 200, resp_delete.text
+        for token in (answered, unanswered):
+            resp = client.post(f"/api/v1/tokens/{token}/response", json=answer)
+            assert resp.status_code == 404
+        result = report.json()["experiments"][0]
+        assert result["total_flights"] == 0
+        assert result["sample_size"] == 0
+
+    def test_sample_flights_of_another_experiment_are_not_found(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        other_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, other_experiment.id, "A")
+        url = f"/api/v1/experiments/{test_experiment.id}/sample-flights/batch"
+
+        # act
+        resp_update = client.put(
+            url, json=[{"id": sample_flight.id, "correct_sample": "B"}]
+        )
+        resp_delete = client.request("DELETE", url, json={"ids": [sample_flight.id]})
+        resp_create = client.post(
+            "/api/v1/experiments/999999/sample-flights/batch",
+            json=[{"correct_sample": "A"}],
+        )
+
+        # assert
+        assert resp_update.status_code == 404
+        assert resp_delete.status_code == 404
+        assert resp_create.status_code == 404
+
+
+class TestSampleFlightExportApiEndpoints:
+    def test_export_sample_flights_with_responses(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        answered = create_sample_flight(db_session, test_experiment.id)
+        create_response(db_session, answered.id, "B")
+        unanswered = create_sample_flight(db_session, test_experiment.id)
+
+        # act
+        resp = client.get(
+            f"/api/v1/experiments/{test_experiment.id}/sample-flights/export"
+        )
+        missing = client.get("/api/v1/experiments/999999999/sample-flights/export")
+
+        # assert
+        assert resp.status_code == 200, resp.text
+        flights = [json.loads(x) for x in resp.content.splitlines()]
+        assert [x["id"] for x in flights] == [answered.id, unanswered.id]
+        assert flights[0]["response"]["chosen_sample"] == "B"
+        assert flights[1]["response"] is None
+        assert missing.status_code == 404
+
+
+class TestMintUniqueTokens:
+    def test_only_colliding_tokens_are_redrawn(
+        self: Self, db_session: Session, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that tokens already taken or repeated in the batch are redrawn."""
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, test_experiment.id)
+        taken = create_token(db_session, sample_flight.id).token
+        fresh = [token_urlsafe(6) for _ in range(3)]
+        draws: Iterator[str] = iter([taken, fresh[0], fresh[0], fresh[1], fresh[2]])
+        monkeypatch.setattr(token_utils, "generate_unique_token", lambda: next(draws))
+        token_repository = repositories.SampleFlightTokenRepository(
+            session=db_session,
+            data_model=models.SampleFlightToken,
+            schema_in=schemas.SampleFlightTokenInSchema,
+            schema_out=schemas.SampleFlightTokenOutSchema,
+        )
+
+        tokens = observation_service.mint_unique_tokens(
+            3, token_repository=token_repository
+        )
+
+        assert sorted(tokens) == sorted(fresh)
+        assert next(draws, None) is None
+
+    def test_tokens_taken_before_the_insert_are_redrawn(
+        self: Self, db_session: Session, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a token taken between the check and the insert is redrawn
+        and the batch is created on the next attempt."""
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, test_experiment.id)
+        taken = create_token(db_session, sample_flight.id).token
+        fresh = [token_urlsafe(6) for _ in range(2)]
+        draws: Iterator[str] = iter([taken, fresh[0], fresh[1]])
+        monkeypatch.setattr(token_utils, "generate_unique_token", lambda: next(draws))
+        get_existing_tokens = (
+            repositories.SampleFlightTokenRepository.get_existing_tokens
+        )
+        checks: Iterator[bool] = iter([True])
+
+        def race(
+            self: repositories.SampleFlightTokenRepository, tokens: list[str]
+        ) -> set[str]:
+            # the first check misses the token, as if it was inserted concurrently
+            if next(checks, False):
+                return set()
+            return get_existing_tokens(self, tokens)
+
+        monkeypatch.setattr(
+            repositories.SampleFlightTokenRepository, "get_existing_tokens", race
+        )
+
+        resp = client.post(
+            f"/api/v1/experiments/{test_experiment.id}/sample-flights",
+            json={"count": 2},
+        )
+
+        assert resp.status_code == 201
+        assert sorted(x["token"]["token"] for x in resp.json()) == sorted(fresh)
@@ -0,0 +1,250 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+from typing import Self
+
+import pytest
+
+from triangler_fastapi import config
+from triangler_fastapi import workers
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import simulation
+from triangler_fastapi.domain import statistics
+
+from .client import create_test_client
+
+
+class TestSimulationApiEndpoints:
+    def test_simulation_of_certain_detection(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.post(
+            "/api/v1/planning/simulations",
+            json={
+                "panel_size": 12,
+                "discriminator_proportion": 1.0,
+                "n_simulations": 500,
+                "seed": 1,
+            },
+        )
+        assert resp.status_code == 200, resp.text
+        result = schemas.SimulationResultSchema.model_validate(resp.json())
+
+        # assert
+        assert result.power == 1.0
+        assert result.mean_correct == 12
+        assert sum(x.count for x in result.p_value_histogram) == 500
+
+    def test_simulation_with_experience_mix(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.post(
+            "/api/v1/planning/simulations",
+            json={
+                "panel_size": 24,
+                "discriminator_proportion": 0.0,
+                "experience_mix": {"Homebrewer": 1, "Non Beer Drinker": 3},
+                "experience_discriminator_proportion": {"Homebrewer": 0.8},
+                "n_simulations": 2000,
+                "seed": 1,
+            },
+        )
+        assert resp.status_code == 200, resp.text
+        result = schemas.SimulationResultSchema.model_validate(resp.json())
+
+        # assert
+        expected_correct = 24 * (0.25 * (1 / 3 + 0.8 * 2 / 3) + 0.75 / 3)
+        assert result.mean_correct == pytest.approx(expected_correct, rel=0.05)
+        assert 0 < result.power < 1
+
+    def test_simulation_across_processes(
+        self: Self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # arrange
+        monkeypatch.setattr(config, "SIMULATION_CHUNK_SIZE", 250)
+        client = create_test_client()
+
+        # act
+        try:
+            resp = client.post(
+                "/api/v1/planning/simulations",
+                json={
+                    "panel_size": 12,
+                    "discriminator_proportion": 1.0,
+                    "n_simulations": 1000,
+                },
+            )
+        finally:
+            workers.shutdown()
+
+        # assert
+        assert resp.status_code == 200, resp.text
+        result = schemas.SimulationResultSchema.model_validate(resp.json())
+        assert result.n_simulations == 1000
+        assert result.power == 1.0
+
+    def test_simulation_rejects_too_many_runs(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.post(
+            "/api/v1/planning/simulations",
+            json={
+                "panel_size": 12,
+                "discriminator_proportion": 0.5,
+                "n_simulations": config.SIMULATION_MAX_SIMULATIONS + 1,
+            },
+        )
+
+        # assert
+        assert resp.status_code == 422
+
+    def test_simulation_rejects_too_many_responses(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.post(
+            "/api/v1/planning/simulations",
+            json={
+                "panel_size": config.PLANNING_MAX_N,
+                "discriminator_proportion": 0.5,
+                "n_simulations": config.SIMULATION_MAX_RESPONSES
+                // config.PLANNING_MAX_N
+                + 1,
+            },
+        )
+
+        # assert
+        assert resp.status_code == 422
+
+    def test_timed_out_simulation_cancels_queued_chunks(
+        self: Self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # arrange
+        pool = ThreadPoolExecutor(max_workers=1)
+        release = threading.Event()
+        started: list[int] = []
+
+        def stalled_chunk(**kwargs: Any) -> None:  # noqa: ANN401
+            started.append(kwargs["n_simulations"])
+            release.wait()
+
+        monkeypatch.setattr(config, "SIMULATION_CHUNK_SIZE", 250)
+        monkeypatch.setattr(config, "SIMULATION_TIMEOUT_SECONDS", 0.1)
+        monkeypatch.setattr(workers, "get_process_pool", lambda: pool)
+        monkeypatch.setattr(simulation, "simulate_correct_counts", stalled_chunk)
+        client = create_test_client()
+
+        # act
+        try:
+            resp = client.post(
+                "/api/v1/planning/simulations",
+                json={
+                    "panel_size": 12,
+                    "discriminator_proportion": 0.5,
+                    "n_simulations": 1000,
+                },
+            )
+        finally:
+            release.set()
+            pool.shutdown(wait=True)
+
+        # assert
+        assert resp.status_code == 503
+        assert started == [250]
+
+    def test_broken_process_pool_is_unavailable(
+        self: Self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # arrange
+        broken_pool = _broken_process_pool()
+        monkeypatch.setattr(config, "SIMULATION_CHUNK_SIZE", 250)
+        monkeypatch.setattr(workers, "get_process_pool", lambda: broken_pool)
+        client = create_test_client()
+
+        # act
+        resp = client.post(
+            "/api/v1/planning/simulations",
+            json={
+                "panel_size": 12,
+                "discriminator_proportion": 0.5,
+                "n_simulations": 1000,
+            },
+        )
+
+        # assert
+        assert resp.status_code == 503
+
+    def test_broken_process_pool_is_replaced(
+        self: Self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # arrange
+        broken_pool = _broken_process_pool()
+        monkeypatch.setattr(config, "SIMULATION_CHUNK_SIZE", 250)
+        monkeypatch.setattr(workers, "_process_pool", broken_pool)
+        client = create_test_client()
+
+        # act
+        try:
+            resp = client.post(
+                "/api/v1/planning/simulations",
+                json={
+                    "panel_size": 12,
+                    "discriminator_proportion": 1.0,
+                    "n_simulations": 1000,
+                },
+            )
+        finally:
+            workers.shutdown()
+
+        # assert
+        assert resp.status_code == 200, resp.text
+
+    def test_summary_runs_off_the_event_loop(
+        self: Self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # arrange
+        p_values = statistics.p_values
+        loop_threads: list[bool] = []
+
+        def recorded_p_values(*args: Any) -> Any:  # noqa: ANN401
+            try:
+                asyncio.get_running_loop()
+                loop_threads.append(True)
+            except RuntimeError:
+                loop_threads.append(False)
+            return p_values(*args)
+
+        monkeypatch.setattr(statistics, "p_values", recorded_p_values)
+        client = create_test_client()
+
+        # act
+        resp = client.post(
+            "/api/v1/planning/simulations",
+            json={
+                "panel_size": 12,
+                "discriminator_proportion": 0.5,
+                "n_simulations": 100,
+            },
+        )
+
+        # assert
+        assert resp.status_code == 200, resp.text
+        assert loop_threads == [False]
+
+
+def _broken_process_pool() -> ProcessPoolExecutor:
+    pool = ProcessPoolExecutor(max_workers=1)
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(os._exit, 1).result()
+    return pool
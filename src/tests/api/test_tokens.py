@@ -0,0 +1,356 @@
+import io
+import zipfile
+from collections.abc import Generator
+from datetime import datetime
+from datetime import timedelta
+from secrets import token_urlsafe
+from types import SimpleNamespace
+from typing import Any
+from typing import Self
+
+import pytest
+from pypdf import PdfReader
+from sqlalchemy.orm import Session
+
+from tests.api.experiment_recipes import create_experiment
+from tests.api.observation_recipes import create_response
+from tests.api.observation_recipes import create_sample_flight
+from tests.api.observation_recipes import create_token
+from triangler_fastapi import config
+from triangler_fastapi.domain import repositories
+from triangler_fastapi.domain import token_filter
+from triangler_fastapi.domain import token_utils
+from triangler_fastapi.services import token_filter_service
+
+from .client import create_test_client
+
+
+class TestTokenQRCodeApiEndpoints:
+    def test_get_qr_code_svg_and_png(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, test_experiment.id)
+        response = create_response(db_session, sample_flight.id, "A")
+        token = create_token(db_session, sample_flight.id, response.id)
+
+        # act
+        svg = client.get(f"/api/v1/tokens/{token.token}/qr")
+        png = client.get(
+            f"/api/v1/tokens/{token.token}/qr", params={"format": "png", "size": 4}
+        )
+
+        # assert
+        assert svg.status_code == 200, svg.text
+        assert svg.headers["content-type"] == "image/svg+xml"
+        assert svg.content == token.qr_code_svg
+        assert png.status_code == 200, png.text
+        assert png.headers["content-type"] == "image/png"
+        assert png.content.startswith(b"\x89PNG")
+
+    def test_get_qr_code_token_not_exists(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get("/api/v1/tokens/not-a-token/qr")
+
+        # assert
+        assert resp.status_code == 404
+
+
+class TestBallotSheetApiEndpoints:
+    def test_ballot_sheets_for_outstanding_tokens(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        for _ in range(2):
+            sample_flight = create_sample_flight(db_session, test_experiment.id)
+            create_token(db_session, sample_flight.id)
+        answered = create_sample_flight(db_session, test_experiment.id)
+        response = create_response(db_session, answered.id, "A")
+        create_token(db_session, answered.id, response.id)
+
+        # act
+        pdf = client.get(f"/api/v1/experiments/{test_experiment.id}/ballots")
+        png = client.get(
+            f"/api/v1/experiments/{test_experiment.id}/ballots",
+            params={"format": "png", "page": 1},
+        )
+        missing_page = client.get(
+            f"/api/v1/experiments/{test_experiment.id}/ballots",
+            params={"format": "png", "page": 2},
+        )
+
+        # assert
+        assert pdf.status_code == 200, pdf.text
+        assert pdf.headers["content-type"] == "application/pdf"
+        assert pdf.headers["x-total-pages"] == "1"
+        assert pdf.content.startswith(b"%PDF")
+        assert pdf.content.endswith(b"%%EOF\n")
+        assert png.status_code == 200, png.text
+        assert png.content.startswith(b"\x89PNG")
+        assert missing_page.status_code == 404
+
+    def test_streamed_ballot_pdf_parses(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        per_sheet = config.BALLOT_SHEET_COLUMNS * config.BALLOT_SHEET_ROWS
+        for _ in range(per_sheet + 1):
+            sample_flight = create_sample_flight(db_session, test_experiment.id)
+            create_token(db_session, sample_flight.id)
+
+        # act
+        resp = client.get(f"/api/v1/experiments/{test_experiment.id}/ballots")
+
+        # assert
+        assert resp.status_code == 200, resp.text
+        reader = PdfReader(io.BytesIO(resp.content), strict=True)
+        assert len(reader.pages) == int(resp.headers["x-total-pages"]) == 2
+        dpi = config.BALLOT_SHEET_DPI
+        for page in reader.pages:
+            (image,) = page.images
+            assert image.image is not None
+            assert image.image.mode == "L"
+            assert image.image.size == (round(8.27 * dpi), round(11.69 * dpi))
+
+    def test_ballot_sheets_without_outstanding_tokens(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+
+        # act
+        resp = client.get(f"/api/v1/experiments/{test_experiment.id}/ballots")
+
+        # assert
+        assert resp.status_code == 404
+
+    def test_ballot_sheets_experiment_not_exists(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get("/api/v1/experiments/-1/ballots")
+
+        # assert
+        assert resp.status_code == 404
+
+
+class TestTokenQRCodeZipApiEndpoints:
+    def test_zip_has_a_qr_code_per_token(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        tokens = []
+        for _ in range(3):
+            sample_flight = create_sample_flight(db_session, test_experiment.id)
+            tokens.append(create_token(db_session, sample_flight.id))
+
+        # act
+        resp = client.get(
+            f"/api/v1/experiments/{test_experiment.id}/tokens/qr.zip",
+            params={"format": "png"},
+        )
+
+        # assert
+        assert resp.status_code == 200, resp.text
+        assert resp.headers["content-type"] == "application/zip"
+        with zipfile.ZipFile(io.BytesIO(resp.content)) as archive:
+            assert archive.testzip() is None
+            names = archive.namelist()
+            assert names == [
+                f"flight-{x.sample_flight_id}-{x.token}.png" for x in tokens
+            ]
+            assert archive.read(names[0]).startswith(b"\x89PNG")
+
+    def test_zip_experiment_not_exists(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get("/api/v1/experiments/-1/tokens/qr.zip")
+
+        # assert
+        assert resp.status_code == 404
+
+
+class TestMetricsApiEndpoints:
+    def test_get_qr_rendering_metrics(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get("/api/v1/metrics/qr-rendering")
+
+        # assert
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["max_queue_depth"] == config.QR_RENDER_MAX_QUEUE_DEPTH
+        assert resp.json()["queue_wait"]["count"] >= 0
+
+    def test_get_purge_metrics(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+
+        # act
+        resp = client.get("/api/v1/metrics/purge")
+
+        # assert
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["runs"] >= 0
+        assert "last_run" in resp.json()
+
+
+class TestTokenRedemptionApiEndpoints:
+    def test_redeem_random_token(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, test_experiment.id)
+        token = create_token(db_session, sample_flight.id)
+        answer = {"experience_level": "Homebrewer", "chosen_sample": "A"}
+
+        # act
+        first = client.post(f"/api/v1/tokens/{token.token}/response", json=answer)
+        second = client.post(f"/api/v1/tokens/{token.token}/response", json=answer)
+
+        # assert
+        assert first.status_code == 201, first.text
+        assert first.json()["sample_flight_id"] == sample_flight.id
+        assert second.status_code == 409
+
+    def test_concurrent_redemptions_answer_once(
+        self: Self, db_session: Session, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, test_experiment.id)
+        token = create_token(db_session, sample_flight.id)
+        answer = {"experience_level": "Homebrewer", "chosen_sample": "A"}
+        # both requests see the flight unanswered, as when they run together
+        get_ballot_state = repositories.SampleFlightRepository.get_ballot_state
+        monkeypatch.setattr(
+            repositories.SampleFlightRepository,
+            "get_ballot_state",
+            lambda *args: SimpleNamespace(
+                test_type=get_ballot_state(*args).test_type, response_id=None
+            ),
+        )
+
+        # act
+        first = client.post(f"/api/v1/tokens/{token.token}/response", json=answer)
+        second = client.post(f"/api/v1/tokens/{token.token}/response", json=answer)
+        report = client.get(
+            "/api/v1/experiments/report", params={"experiment_id": test_experiment.id}
+        )
+
+        # assert
+        assert first.status_code == 201, first.text
+        assert second.status_code == 409
+        assert report.json()["experiments"][0]["sample_size"] == 1
+
+    def test_claimed_token_is_not_redeemed_again(
+        self: Self, db_session: Session
+    ) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        answered = create_sample_flight(db_session, test_experiment.id)
+        response = create_response(db_session, answered.id, "A")
+        sample_flight = create_sample_flight(db_session, test_experiment.id)
+        # claimed by a redemption whose response is not visible yet
+        token = create_token(db_session, sample_flight.id, response.id)
+        answer = {"experience_level": "Homebrewer", "chosen_sample": "A"}
+
+        # act
+        resp = client.post(f"/api/v1/tokens/{token.token}/response", json=answer)
+        report = client.get(
+            "/api/v1/experiments/report", params={"experiment_id": test_experiment.id}
+        )
+
+        # assert
+        assert resp.status_code == 409
+        assert report.json()["experiments"][0]["sample_size"] == 1
+
+    def test_redeem_signed_token(self: Self, monkeypatch: pytest.MonkeyPatch) -> None:
+        # arrange
+        monkeypatch.setattr(config, "OBSERVATION_TOKEN_FORMAT", "signed")
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        observation = client.post(
+            f"/api/v1/experiments/{test_experiment.id}/sample-flights",
+            json={"count": 1},
+        ).json()[0]
+        token = observation["token"]["token"]
+
+        # act
+        resp = client.post(
+            f"/api/v1/tokens/{token}/response",
+            json={"experience_level": "Homebrewer", "chosen_sample": "B"},
+        )
+        report = client.get(
+            "/api/v1/experiments/report", params={"experiment_id": test_experiment.id}
+        )
+
+        # assert
+        assert token_utils.is_signed_token(token)
+        assert resp.status_code == 201, resp.text
+        assert resp.json()["sample_flight_id"] == observation["sample_flight"]["id"]
+        assert report.json()["experiments"][0]["sample_size"] == 1
+
+    def test_redeem_invalid_and_expired_tokens(self: Self) -> None:
+        # arrange
+        client = create_test_client()
+        answer = {"experience_level": "Homebrewer", "chosen_sample": "A"}
+        expired = token_utils.generate_signed_token(
+            1, datetime.now() - timedelta(days=1)
+        )
+        forged = token_utils.generate_signed_token(
+            1, token_utils.calculate_expiry_date()
+        )
+        forged = forged[:-1] + ("A" if forged[-1] != "A" else "B")
+
+        # act
+        unknown_resp = client.post("/api/v1/tokens/not-a-token/response", json=answer)
+        expired_resp = client.post(f"/api/v1/tokens/{expired}/response", json=answer)
+        forged_resp = client.post(f"/api/v1/tokens/{forged}/response", json=answer)
+
+        # assert
+        assert unknown_resp.status_code == 404
+        assert expired_resp.status_code == 410
+        assert forged_resp.status_code == 404
+
+
+class TestTokenFilterApiEndpoints:
+    @pytest.fixture(autouse=True)
+    def reset_filter(self: Self) -> Generator[None, Any, None]:
+        token_filter.reset()
+        yield
+        token_filter.reset()
+
+    def test_unknown_token_rejected_by_filter(self: Self, db_session: Session) -> None:
+        # arrange
+        client = create_test_client()
+        test_experiment = create_experiment(client, name=f"test {token_urlsafe(8)}")
+        sample_flight = create_sample_flight(db_session, test_experiment.id)
+        token = create_token(db_session, sample_flight.id)
+        token_filter_service.rebuild_token_filter()
+        answer = {"experience_level": "Homebrewer", "chosen_sample": "A"}
+
+        # act
+        unknown = client.post("/api/v1/tokens/not-a-token/response", json=answer)
+        known = client.post(f"/api/v1/tokens/{token.token}/response", json=answer)
+        metrics = client.get("/api/v1/metrics/token-filter")
+
+        # assert
+        assert unknown.status_code == 404
+        assert known.status_code == 201, known.text
+        assert metrics.status_code == 200, metrics.text
+        stats = metrics.json()
+        assert stats["ready"]
+        assert stats["tokens"] >= 1
+        assert stats["rejected"] == 1
+        assert stats["false_positive_rate"] < config.TOKEN_FILTER_ERROR_RATE
@@ -0,0 +1,17 @@
+from collections.abc import Generator
+from typing import Any
+
+import pytest
+from sqlalchemy.orm import Session
+
+from triangler_fastapi.data import persistence
+
+
+@pytest.fixture(scope="session")
+def migrated_database() -> None:
+    persistence.run_migrations()
+
+
+@pytest.fixture
+def db_session(migrated_database: None) -> Generator[Session, Any, None]:
+    yield from persistence.get_db_session()
@@ -0,0 +1,38 @@
+import re
+import zlib
+from typing import Self
+
+from triangler_fastapi.domain import ballots
+
+
+class TestPdfStreamWriter:
+    def test_cross_reference_offsets(self: Self) -> None:
+        """Test that every xref entry points at the start of its object."""
+        writer = ballots.PdfStreamWriter(dpi=72)
+        pixels = zlib.compress(bytes([255]) * 6)
+        pdf = (
+            writer.start()
+            + writer.add_page(3, 2, pixels)
+            + writer.add_page(3, 2, pixels)
+            + writer.finish()
+        )
+
+        assert pdf.startswith(b"%PDF-1.4")
+        assert pdf.endswith(b"%%EOF\n")
+        xref_offset = int(re.search(rb"startxref\n(\d+)", pdf).group(1))  # pyright: ignore[reportOptionalMemberAccess]
+        assert pdf[xref_offset:].startswith(b"xref\n0 9\n")
+        entries = re.findall(rb"(\d{10}) 00000 n ", pdf[xref_offset:])
+        assert len(entries) == 8
+        for number, offset in enumerate(entries, start=1):
+            assert pdf[int(offset) :].startswith(b"%d 0 obj" % number)
+        assert b"/Count 2" in pdf
+
+
+class TestRenderSheet:
+    def test_sheet_is_a_page_of_ballots(self: Self) -> None:
+        """Test that a sheet is an A4 page with the QR codes drawn on it."""
+        sheet = ballots.render_sheet(
+            [("token-a", "Flight 1"), ("token-b", "Flight 2")], dpi=50
+        )
+        assert sheet.size == (round(8.27 * 50), round(11.69 * 50))
+        assert sheet.getextrema() == (0, 255)
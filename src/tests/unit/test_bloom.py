@@ -0,0 +1,33 @@
+from secrets import token_urlsafe
+from typing import Self
+
+from triangler_fastapi.domain.bloom import BloomFilter
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self: Self) -> None:
+        """Test that every added item is found, however it was added."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        batch = [token_urlsafe(6) for _ in range(500)]
+        single = [token_urlsafe(6) for _ in range(500)]
+        bloom.update(batch)
+        for item in single:
+            bloom.add(item)
+        assert all(x in bloom for x in batch + single)
+        assert bloom.item_count == 1000
+
+    def test_false_positive_rate_near_target(self: Self) -> None:
+        """Test that absent items are rarely found at capacity."""
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        bloom.update(token_urlsafe(6) for _ in range(2000))
+        absent = [token_urlsafe(9) for _ in range(5000)]
+        observed = sum(x in bloom for x in absent) / len(absent)
+        assert observed < 0.03
+        assert 0.002 < bloom.false_positive_rate < 0.03
+
+    def test_empty_filter_contains_nothing(self: Self) -> None:
+        """Test that nothing is found before anything is added."""
+        bloom = BloomFilter(capacity=10, error_rate=0.01)
+        bloom.update([])
+        assert "token" not in bloom
+        assert bloom.false_positive_rate == 0.0
@@ -0,0 +1,41 @@
+from collections import Counter
+from typing import Self
+
+import numpy as np
+import pytest
+
+from triangler_fastapi.domain import designs
+
+
+class TestBalancedTriangleDesign:
+    @pytest.mark.parametrize("panel_size", [1, 5, 6, 13, 300])
+    def test_orders_are_balanced(self: Self, panel_size: int) -> None:
+        """Test that no serving order is served more than once more than another."""
+        orders, _ = designs.balanced_triangle_design(
+            panel_size, rng=np.random.default_rng(0)
+        )
+        counts = Counter(orders.tolist())
+        assert len(orders) == panel_size
+        assert set(counts) <= set(designs.SERVING_ORDERS)
+        assert (
+            max(counts.values()) - min(counts.get(x, 0) for x in designs.SERVING_ORDERS)
+            <= 1
+        )
+
+    def test_correct_sample_is_the_odd_cup(self: Self) -> None:
+        """Test that each flight's correct sample holds the odd product."""
+        orders, odd_samples = designs.balanced_triangle_design(
+            60, rng=np.random.default_rng(1)
+        )
+        for order, odd_sample in zip(
+            orders.tolist(), odd_samples.tolist(), strict=True
+        ):
+            odd_product = min(set(order), key=order.count)
+            assert order["ABC".index(odd_sample)] == odd_product
+        assert Counter(odd_samples.tolist()) == {"A": 20, "B": 20, "C": 20}
+
+    def test_blocks_are_randomized(self: Self) -> None:
+        """Test that blocks are not served in a fixed order."""
+        orders, _ = designs.balanced_triangle_design(60, rng=np.random.default_rng(2))
+        blocks = {tuple(x) for x in orders.reshape(-1, 6).tolist()}
+        assert len(blocks) > 1
@@ -0,0 +1,318 @@
+import datetime
+from typing import Self
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import Session
+
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.data import models
+from triangler_fastapi.domain import repositories
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import statistics
+from triangler_fastapi.domain import token_utils
+
+
+def _repositories(
+    session: Session,
+) -> tuple[
+    repositories.ExperimentRepository,
+    repositories.SampleFlightRepository,
+    repositories.ResponseRepository,
+]:
+    return (
+        repositories.ExperimentRepository(
+            session=session,
+            data_model=models.Experiment,
+            schema_in=schemas.ExperimentInSchema,
+            schema_out=schemas.ExperimentOutSchema,
+        ),
+        repositories.SampleFlightRepository(
+            session=session,
+            data_model=models.SampleFlight,
+            schema_in=schemas.SampleFlightInSchema,
+            schema_out=schemas.SampleFlightOutSchema,
+        ),
+        repositories.ResponseRepository(
+            session=session,
+            data_model=models.Response,
+            schema_in=schemas.ResponseInSchema,
+            schema_out=schemas.ResponseOutSchema,
+        ),
+    )
+
+
+def _create_experiment(
+    experiment_repository: repositories.ExperimentRepository,
+) -> schemas.ExperimentOutSchema:
+    today = datetime.date.today()
+    return experiment_repository.create(
+        schemas.ExperimentInSchema(
+            name="stats", description="stats", start_on=today, end_on=today
+        )
+    )
+
+
+class TestExperimentStats:
+    def test_new_experiment_has_empty_stats(self: Self, db_session: Session) -> None:
+        """Test that creating an experiment creates zeroed counters."""
+        experiment_repository, _, _ = _repositories(db_session)
+        experiment = _create_experiment(experiment_repository)
+
+        stats = experiment_repository.get_stats(experiment.id)
+
+        assert stats.total_flights == 0
+        assert stats.total_responses == 0
+        assert stats.correct_responses == 0
+        assert stats.p_value == 1.0
+
+    def test_counters_follow_responses(self: Self, db_session: Session) -> None:
+        """Test that counters track response create, update and delete."""
+        experiment_repository, flight_repository, response_repository = _repositories(
+            db_session
+        )
+        experiment = _create_experiment(experiment_repository)
+        flights = [
+            flight_repository.create(
+                schemas.SampleFlightInSchema.new(
+                    experiment_id=experiment.id, correct_sample="A"
+                )
+            )
+            for _ in range(3)
+        ]
+        responses = [
+            response_repository.create(
+                schemas.ResponseInSchema(
+                    sample_flight_id=flight.id,
+                    experience_level="Homebrewer",
+                    chosen_sample=chosen,
+                )
+            )
+            for flight, chosen in zip(flights, ["A", "A", "B"], strict=True)
+        ]
+
+        stats = experiment_repository.get_stats(experiment.id)
+        assert stats.total_flights == 3
+        assert stats.total_responses == 3
+        assert stats.correct_responses == 2
+
+        wrong_answer = responses[0].model_copy(update={"chosen_sample": "C"})
+        response_repository.update(wrong_answer)
+        stats = experiment_repository.get_stats(experiment.id)
+        assert stats.total_responses == 3
+        assert stats.correct_responses == 1
+
+        response_repository.delete(responses[1].id)
+        stats = experiment_repository.get_stats(experiment.id)
+        assert stats.total_responses == 2
+        assert stats.correct_responses == 0
+        assert stats.log_likelihood_ratio == pytest.approx(
+            statistics.log_likelihood_ratio(0, 2)
+        )
+
+    def test_missing_stats_are_rebuilt(self: Self, db_session: Session) -> None:
+        """Test that a missing counter row is recounted from the source tables."""
+        experiment_repository, flight_repository, response_repository = _repositories(
+            db_session
+        )
+        experiment = _create_experiment(experiment_repository)
+        flight = flight_repository.create(
+            schemas.SampleFlightInSchema.new(
+                experiment_id=experiment.id, correct_sample="B"
+            )
+        )
+        response_repository.create(
+            schemas.ResponseInSchema(
+                sample_flight_id=flight.id,
+                experience_level="Homebrewer",
+                chosen_sample="B",
+            )
+        )
+        db_session.delete(db_session.get_one(models.ExperimentStats, experiment.id))
+        db_session.commit()
+
+        stats = experiment_repository.get_stats(experiment.id)
+
+        assert stats.total_flights == 1
+        assert stats.total_responses == 1
+        assert stats.correct_responses == 1
+
+    def test_stats_for_missing_experiment(self: Self, db_session: Session) -> None:
+        """Test that asking for stats of an unknown experiment raises."""
+        experiment_repository, _, _ = _repositories(db_session)
+        with pytest.raises(NoResultFound):
+            experiment_repository.get_stats(-1)
+
+    def test_counters_follow_bulk_operations(self: Self, db_session: Session) -> None:
+        """Test that counters track bulk create, update and delete."""
+        experiment_repository, flight_repository, response_repository = _repositories(
+            db_session
+        )
+        experiment = _create_experiment(experiment_repository)
+        flights = flight_repository.bulk_create(
+            [
+                schemas.SampleFlightInSchema.new(
+                    experiment_id=experiment.id, correct_sample="A"
+                )
+                for _ in range(4)
+            ]
+        )
+        responses = response_repository.bulk_create(
+            [
+                schemas.ResponseInSchema(
+                    sample_flight_id=flight.id,
+                    experience_level="Homebrewer",
+                    chosen_sample=chosen,
+                )
+                for flight, chosen in zip(flights, ["A", "A", "A", "B"], strict=True)
+            ]
+        )
+
+        stats = experiment_repository.get_stats(experiment.id)
+        assert [x.sample_flight_id for x in responses] == [x.id for x in flights]
+        assert stats.total_flights == 4
+        assert stats.total_responses == 4
+        assert stats.correct_responses == 3
+
+        response_repository.bulk_update(
+            [
+                schemas.ResponseBatchUpdateSchema(
+                    id=x.id, experience_level="Homebrewer", chosen_sample="C"
+                )
+                for x in responses[:2]
+            ]
+        )
+        stats = experiment_repository.get_stats(experiment.id)
+        assert stats.total_responses == 4
+        assert stats.correct_responses == 1
+
+        # moving the correct sample changes which responses are correct
+        flight_repository.bulk_update(
+            [
+                schemas.SampleFlightBatchUpdateSchema(id=x.id, correct_sample="B")
+                for x in flights
+            ]
+        )
+        stats = experiment_repository.get_stats(experiment.id)
+        assert stats.total_flights == 4
+        assert stats.correct_responses == 1
+
+        response_repository.bulk_delete([x.id for x in responses])
+        flight_repository.bulk_delete([x.id for x in flights[2:]])
+        stats = experiment_repository.get_stats(experiment.id)
+        assert stats.total_flights == 2
+        assert stats.total_responses == 0
+        assert stats.correct_responses == 0
+        assert stats.log_likelihood_ratio == pytest.approx(0.0)
+
+    def test_bulk_changes_are_all_or_nothing(self: Self, db_session: Session) -> None:
+        """Test that a bulk update or delete with an unknown id changes nothing."""
+        experiment_repository, _, _ = _repositories(db_session)
+        experiment = _create_experiment(experiment_repository)
+        renamed = schemas.ExperimentBatchUpdateSchema(
+            **experiment.model_dump(
+                include={"id", "description", "start_on", "end_on"}
+            ),
+            name="renamed",
+        )
+        missing = renamed.model_copy(update={"id": 999999})
+
+        with pytest.raises(NoResultFound):
+            experiment_repository.bulk_update([renamed, missing])
+        with pytest.raises(NoResultFound):
+            experiment_repository.bulk_delete([experiment.id, 999999])
+
+        assert experiment_repository.get_by_id(experiment.id).name == "stats"
+
+    def test_update_fields_sets_only_given_columns(
+        self: Self, db_session: Session
+    ) -> None:
+        """Test that a partial update keeps other columns and rescores responses
+        when the test type changes."""
+        experiment_repository, flight_repository, response_repository = _repositories(
+            db_session
+        )
+        experiment = _create_experiment(experiment_repository)
+        flight = flight_repository.create(
+            schemas.SampleFlightInSchema.new(
+                experiment_id=experiment.id, correct_sample="A"
+            )
+        )
+        response_repository.create(
+            schemas.ResponseInSchema(
+                sample_flight_id=flight.id,
+                experience_level="Homebrewer",
+                chosen_sample="A",
+            )
+        )
+
+        updated = experiment_repository.update_fields(
+            experiment.id,
+            {"name": "renamed", "test_type": DiscriminationTests.DUO_TRIO},
+        )
+        stats = experiment_repository.get_stats(experiment.id)
+
+        assert updated.name == "renamed"
+        assert updated.description == experiment.description
+        assert updated.updated_at >= experiment.updated_at
+        assert stats.log_likelihood_ratio == pytest.approx(
+            statistics.log_likelihood_ratio(
+                1, 1, p0=statistics.CHANCE_PROBABILITIES[updated.test_type]
+            )
+        )
+        with pytest.raises(NoResultFound):
+            experiment_repository.update_fields(-1, {"name": "missing"})
+
+    def test_deleting_answered_flights_removes_their_responses(
+        self: Self, db_session: Session
+    ) -> None:
+        """Test that deleting answered flights takes their responses and tokens
+        out of the counters and the database."""
+        experiment_repository, flight_repository, response_repository = _repositories(
+            db_session
+        )
+        experiment = _create_experiment(experiment_repository)
+        flights = flight_repository.bulk_create(
+            [
+                schemas.SampleFlightInSchema.new(
+                    experiment_id=experiment.id, correct_sample="A"
+                )
+                for _ in range(3)
+            ]
+        )
+        for flight in flights:
+            db_session.add(
+                models.SampleFlightToken(
+                    token=token_utils.generate_unique_token(),
+                    expiry_date=token_utils.calculate_expiry_date(),
+                    sample_flight_id=flight.id,
+                )
+            )
+        db_session.commit()
+        response_repository.bulk_create(
+            [
+                schemas.ResponseInSchema(
+                    sample_flight_id=flight.id,
+                    experience_level="Homebrewer",
+                    chosen_sample="A",
+                )
+                for flight in flights
+            ]
+        )
+
+        flight_repository.bulk_delete([x.id for x in flights[:2]])
+        flight_repository.delete(flights[2].id)
+        stats = experiment_repository.get_stats(experiment.id)
+        ids = [x.id for x in flights]
+
+        assert stats.total_flights == 0
+        assert stats.total_responses == 0
+        assert stats.correct_responses == 0
+        assert stats.log_likelihood_ratio == pytest.approx(0.0)
+        assert not response_repository.filter(models.Response.sample_flight_id.in_(ids))
+        assert not db_session.scalars(
+            select(models.SampleFlightToken).where(
+                models.SampleFlightToken.sample_flight_id.in_(ids)
+            )
+        ).all()
@@ -0,0 +1,130 @@
+import datetime
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+from typing import Self
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from tests.api.observation_recipes import create_response
+from tests.api.observation_recipes import create_sample_flight
+from tests.api.observation_recipes import create_token
+from triangler_fastapi import config
+from triangler_fastapi.data import models
+from triangler_fastapi.domain import repositories
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import token_filter
+from triangler_fastapi.services import maintenance_service
+
+
+def _create_experiment(session: Session, end_on: datetime.date) -> int:
+    repository = repositories.ExperimentRepository(
+        session=session,
+        data_model=models.Experiment,
+        schema_in=schemas.ExperimentInSchema,
+        schema_out=schemas.ExperimentOutSchema,
+    )
+    experiment = repository.create(
+        schemas.ExperimentInSchema(
+            name="purge",
+            description="purge",
+            start_on=end_on - datetime.timedelta(days=7),
+            end_on=end_on,
+        )
+    )
+    return experiment.id
+
+
+@pytest.fixture(autouse=True)
+def reset_filter() -> Generator[None, Any, None]:
+    # a purge that deletes tokens rebuilds the token filter
+    yield
+    token_filter.reset()
+
+
+class TestPurge:
+    def test_purges_expired_tokens_and_orphaned_flights(
+        self: Self,
+        db_session: Session,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> None:
+        """Test that only expired tokens and unanswered flights of closed
+        experiments are deleted, in batches, and that counters follow."""
+        monkeypatch.setattr(config, "QR_CODE_CACHE_DIR", str(tmp_path))
+        today = datetime.date.today()
+        closed_id = _create_experiment(db_session, today - datetime.timedelta(days=1))
+        open_id = _create_experiment(db_session, today)
+        answered = create_sample_flight(db_session, closed_id)
+        create_response(db_session, answered.id, "A")
+        orphans = [create_sample_flight(db_session, closed_id) for _ in range(3)]
+        orphan_token = create_token(db_session, orphans[0].id).token
+        open_flight = create_sample_flight(db_session, open_id)
+        live_token = create_token(db_session, open_flight.id).token
+        expired_tokens = [create_token(db_session, open_flight.id) for _ in range(3)]
+        token = models.SampleFlightToken
+        db_session.execute(
+            update(token)
+            .where(token.token.in_([x.token for x in expired_tokens]))
+            .values(expiry_date=datetime.datetime.now() - datetime.timedelta(days=1))
+        )
+        db_session.commit()
+
+        run = maintenance_service.purge(batch_size=2, pause=0)
+        db_session.expire_all()
+
+        remaining_flights = set(
+            db_session.scalars(
+                select(models.SampleFlight.id).where(
+                    models.SampleFlight.experiment_id.in_([closed_id, open_id])
+                )
+            )
+        )
+        remaining_tokens = set(db_session.scalars(select(token.token)))
+        assert remaining_flights == {answered.id, open_flight.id}
+        assert live_token in remaining_tokens
+        assert orphan_token not in remaining_tokens
+        assert remaining_tokens.isdisjoint(x.token for x in expired_tokens)
+        assert run.orphaned_flights >= 3
+        assert run.expired_tokens >= 4
+        assert run.batches >= 4
+        stats = db_session.get_one(models.ExperimentStats, closed_id)
+        assert stats.total_flights == 1
+        assert maintenance_service.get_stats().last_run == run
+
+    def test_keeps_expired_answered_tokens(self: Self, db_session: Session) -> None:
+        """Test that the expired tokens of answered flights are kept, whether the
+        response came in through the token or not."""
+        experiment_id = _create_experiment(db_session, datetime.date.today())
+        redeemed_flight = create_sample_flight(db_session, experiment_id)
+        redeemed_response = create_response(db_session, redeemed_flight.id, "A")
+        redeemed_token = create_token(
+            db_session, redeemed_flight.id, redeemed_response.id
+        )
+        # answered directly, e.g. through the observations API
+        unlinked_flight = create_sample_flight(db_session, experiment_id)
+        unlinked_token = create_token(db_session, unlinked_flight.id)
+        create_response(db_session, unlinked_flight.id, "A")
+        token = models.SampleFlightToken
+        db_session.execute(
+            update(token)
+            .where(token.token.in_([redeemed_token.token, unlinked_token.token]))
+            .values(expiry_date=datetime.datetime.now() - datetime.timedelta(days=1))
+        )
+        db_session.commit()
+
+        maintenance_service.purge(batch_size=100, pause=0)
+        db_session.expire_all()
+
+        remaining = db_session.execute(
+            select(token.token, token.response_id).where(
+                token.token.in_([redeemed_token.token, unlinked_token.token])
+            )
+        ).all()
+        assert dict(remaining) == {
+            redeemed_token.token: redeemed_response.id,
+            unlinked_token.token: None,
+        }
@@ -0,0 +1,20 @@
+from typing import Self
+
+import pytest
+
+from triangler_fastapi.domain import pagination
+from triangler_fastapi.exceptions import errors
+
+
+class TestPageCursors:
+    @pytest.mark.parametrize("last_id", [1, 42, 2**63])
+    def test_round_trip(self: Self, last_id: int) -> None:
+        """Test that a cursor decodes to the id it was made from."""
+        cursor = pagination.encode_cursor(last_id)
+        assert pagination.decode_cursor(cursor) == last_id
+
+    @pytest.mark.parametrize("cursor", ["", "nope!", "AAAA", "AAAAAAAAAAAB"])
+    def test_malformed_cursor_is_rejected(self: Self, cursor: str) -> None:
+        """Test that cursors that were not encoded here are rejected."""
+        with pytest.raises(errors.InvalidCursorError):
+            pagination.decode_cursor(cursor)
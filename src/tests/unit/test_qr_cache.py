@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import Self
+
+import pytest
+
+from triangler_fastapi import config
+from triangler_fastapi.constants import QRCodeFormats
+from triangler_fastapi.domain import qr_cache
+from triangler_fastapi.domain import token_utils
+
+
+@pytest.fixture
+def render_count(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> dict[str, int]:
+    """Isolates the cache in a temporary directory and counts full renders."""
+    monkeypatch.setattr(config, "QR_CODE_CACHE_DIR", str(tmp_path))
+    qr_cache._memory_cache.clear()
+    count = {"renders": 0}
+    render = token_utils.render_qr_code
+
+    def counting_render(*args: object, **kwargs: object) -> bytes:
+        count["renders"] += 1
+        return render(*args, **kwargs)  # pyright: ignore[reportArgumentType]
+
+    monkeypatch.setattr(token_utils, "render_qr_code", counting_render)
+    return count
+
+
+class TestQRCodeCache:
+    def test_repeated_views_render_once(
+        self: Self, render_count: dict[str, int]
+    ) -> None:
+        """Test that a second view is served from memory."""
+        first = qr_cache.get_qr_code("token-a", QRCodeFormats.SVG)
+        second = qr_cache.get_qr_code("token-a", QRCodeFormats.SVG)
+        assert first == second
+        assert first.startswith(b"<svg")
+        assert render_count["renders"] == 1
+
+    def test_disk_tier_survives_memory_eviction(
+        self: Self, render_count: dict[str, int]
+    ) -> None:
+        """Test that a code evicted from memory is read back from disk."""
+        png = qr_cache.get_qr_code("token-b", QRCodeFormats.PNG)
+        qr_cache._memory_cache.clear()
+        assert qr_cache.get_qr_code("token-b", QRCodeFormats.PNG) == png
+        assert png.startswith(b"\x89PNG")
+        assert render_count["renders"] == 1
+
+    def test_key_includes_host_name_and_size(
+        self: Self, render_count: dict[str, int], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that codes for another host or size are rendered separately."""
+        path = qr_cache.get_qr_code_path("token-c", QRCodeFormats.SVG, size=10)
+        assert path.read_bytes() == qr_cache.get_qr_code("token-c", size=10)
+        assert qr_cache.get_qr_code_path("token-c", size=5) != path
+
+        monkeypatch.setattr(config, "HOST_NAME", "other.example.com")
+        assert qr_cache.get_qr_code_path("token-c", size=10) != path
+        assert render_count["renders"] == 3
+
+    def test_discard_removes_both_tiers(
+        self: Self, render_count: dict[str, int]
+    ) -> None:
+        """Test that discarded codes are rendered again on the next view."""
+        path = qr_cache.get_qr_code_path("token-d", QRCodeFormats.SVG)
+        qr_cache.discard_qr_codes("token-d")
+        assert not path.exists()
+        qr_cache.get_qr_code("token-d", QRCodeFormats.SVG)
+        assert render_count["renders"] == 2
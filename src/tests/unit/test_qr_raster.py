@@ -0,0 +1,32 @@
+import io
+from typing import Self
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from triangler_fastapi import config
+from triangler_fastapi.domain import qr_raster
+from triangler_fastapi.domain import token_utils
+
+
+class TestQRRasterizer:
+    @pytest.mark.parametrize("size", [1, 3, 10, 11])
+    def test_matches_styled_pil_image(self: Self, size: int) -> None:
+        """Test that the vectorized rasterizer draws the same pixels as qrcode."""
+        token = token_utils.generate_unique_token()
+        expected = token_utils.generate_qr_code_png(token, size=size).get_image()
+
+        png = qr_raster.render_png(
+            f"https://{config.HOST_NAME}/observation/response/{token}", box_size=size
+        )
+        with Image.open(io.BytesIO(png)) as actual:
+            np.testing.assert_array_equal(
+                np.asarray(actual), np.asarray(expected.convert("L"))
+            )
+
+    def test_module_sprites_are_read_only(self: Self) -> None:
+        """Test that the memoized sprite table cannot be drawn over."""
+        sprites = qr_raster._module_sprites(10)
+        assert sprites.shape == (16, 10, 10)
+        assert not sprites.flags.writeable
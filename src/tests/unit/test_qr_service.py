@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import Self
+
+import pytest
+
+from triangler_fastapi import config
+from triangler_fastapi.constants import QRCodeFormats
+from triangler_fastapi.domain import qr_cache
+from triangler_fastapi.exceptions import errors
+from triangler_fastapi.services import qr_service
+
+
+@pytest.fixture
+def render_queue(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> qr_service._RenderQueue:
+    """Isolates the render cache and the queue's counters."""
+    monkeypatch.setattr(config, "QR_CODE_CACHE_DIR", str(tmp_path))
+    qr_cache._memory_cache.clear()
+    queue = qr_service._RenderQueue(max_queue_depth=1, stats_window=10)
+    monkeypatch.setattr(qr_service, "_render_queue", queue)
+    return queue
+
+
+class TestQRRenderService:
+    def test_memory_hits_skip_the_queue(
+        self: Self, render_queue: qr_service._RenderQueue
+    ) -> None:
+        """Test that a render is queued once and then served from memory."""
+
+        async def view_twice() -> tuple[bytes, bytes]:
+            first = await qr_service.get_qr_code("token-a", QRCodeFormats.SVG)
+            second = await qr_service.get_qr_code("token-a", QRCodeFormats.SVG)
+            return first, second
+
+        first, second = asyncio.run(view_twice())
+        stats = qr_service.get_stats()
+
+        assert first == second
+        assert first.startswith(b"<svg")
+        assert (stats.submitted, stats.completed, stats.memory_cache_hits) == (1, 1, 1)
+        assert (stats.queued, stats.running) == (0, 0)
+        assert stats.render_time.count == 1
+        assert stats.render_time.p95_ms is not None
+
+    def test_full_queue_turns_work_away(
+        self: Self, render_queue: qr_service._RenderQueue
+    ) -> None:
+        """Test that work beyond the queue depth is refused rather than queued."""
+        release = threading.Event()
+
+        async def saturate() -> None:
+            blocked = asyncio.ensure_future(render_queue.submit(release.wait))
+            await asyncio.sleep(0)
+            try:
+                with pytest.raises(errors.ServiceOverloadedError):
+                    await qr_service.get_qr_code("token-b", QRCodeFormats.PNG)
+            finally:
+                release.set()
+            await blocked
+
+        asyncio.run(saturate())
+        stats = qr_service.get_stats()
+
+        assert (stats.submitted, stats.completed, stats.rejected) == (1, 1, 1)
+        assert (stats.queued, stats.running) == (0, 0)
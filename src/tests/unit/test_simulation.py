@@ -0,0 +1,54 @@
+from typing import Self
+
+import numpy as np
+import pytest
+
+from triangler_fastapi.domain import simulation
+
+
+class TestSimulateCorrectCounts:
+    def test_all_discriminators_are_always_correct(self: Self) -> None:
+        """Test that a panel of discriminators always answers correctly."""
+        counts = simulation.simulate_correct_counts(
+            n_simulations=100,
+            panel_size=12,
+            level_weights=[1.0],
+            level_discriminator_proportions=[1.0],
+            seed=1,
+        )
+        assert counts.shape == (100,)
+        assert np.all(counts == 12)
+
+    def test_guessing_is_correct_a_third_of_the_time(self: Self) -> None:
+        """Test that guessing tasters are correct at the chance rate."""
+        counts = simulation.simulate_correct_counts(
+            n_simulations=20_000,
+            panel_size=30,
+            level_weights=[1.0, 1.0],
+            level_discriminator_proportions=[0.0, 0.0],
+            seed=1,
+        )
+        assert counts.mean() == pytest.approx(10, rel=0.02)
+
+    def test_levels_are_weighted(self: Self) -> None:
+        """Test that only levels with weight contribute tasters."""
+        counts = simulation.simulate_correct_counts(
+            n_simulations=100,
+            panel_size=12,
+            level_weights=[0.0, 1.0],
+            level_discriminator_proportions=[0.0, 1.0],
+            seed=1,
+        )
+        assert np.all(counts == 12)
+
+    def test_seed_is_reproducible(self: Self) -> None:
+        """Test that the same seed gives the same panels."""
+        kwargs = {
+            "n_simulations": 50,
+            "panel_size": 20,
+            "level_weights": [1.0],
+            "level_discriminator_proportions": [0.3],
+        }
+        first = simulation.simulate_correct_counts(**kwargs, seed=7)  # pyright: ignore[reportArgumentType]
+        second = simulation.simulate_correct_counts(**kwargs, seed=7)  # pyright: ignore[reportArgumentType]
+        np.testing.assert_array_equal(first, second)
@@ -0,0 +1,219 @@
+from typing import Self
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from triangler_fastapi import config
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.constants import SequentialDecisions
+from triangler_fastapi.domain import statistics
+
+
+class TestPValue:
+    def test_matches_exact_binomial_test(self: Self) -> None:
+        """Test that p-values match scipy's exact one-sided binomial test."""
+        for n_correct, n_total in [(0, 1), (4, 10), (8, 12), (15, 30), (30, 30)]:
+            expected = stats.binomtest(
+                n_correct, n_total, p=1 / 3, alternative="greater"
+            ).pvalue
+            assert statistics.p_value(n_correct, n_total) == pytest.approx(expected)
+
+    def test_no_responses_is_not_significant(self: Self) -> None:
+        """Test that an empty panel has a p-value of one."""
+        assert statistics.p_value(0, 0) == 1.0
+
+    def test_invalid_counts_raise(self: Self) -> None:
+        """Test that more correct answers than responses is rejected."""
+        with pytest.raises(ValueError):
+            statistics.p_value(5, 4)
+
+    def test_fallback_matches_table(
+        self: Self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that panels beyond the table bound give the same p-values."""
+        n_total = np.arange(0, 60)
+        n_correct = n_total // 2
+        from_table = statistics.p_values(n_correct, n_total)
+
+        monkeypatch.setattr(config, "STATISTICS_TABLE_MAX_N", 5)
+        from_fallback = statistics.p_values(n_correct, n_total)
+
+        np.testing.assert_allclose(from_table, from_fallback)
+
+    def test_mixed_test_types_in_one_batch(
+        self: Self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a batch mixing chance probabilities matches each test type."""
+        test_types = list(DiscriminationTests)
+        p0 = statistics.chance_probabilities(test_types)
+        n_correct, n_total = np.array([7, 7, 7, 7]), np.array([12, 12, 12, 12])
+        expected = [
+            stats.binomtest(7, 12, p=p, alternative="greater").pvalue
+            for p in p0.tolist()
+        ]
+        np.testing.assert_allclose(
+            statistics.p_values(n_correct, n_total, p0), expected
+        )
+
+        monkeypatch.setattr(config, "STATISTICS_TABLE_MAX_N", 5)
+        np.testing.assert_allclose(
+            statistics.p_values(n_correct, n_total, p0), expected
+        )
+
+
+class TestCriticalValue:
+    @pytest.mark.parametrize(
+        ("n_total", "expected"),
+        [(6, 5), (9, 6), (12, 8), (18, 10), (24, 13), (30, 15)],
+    )
+    def test_published_triangle_table(self: Self, n_total: int, expected: int) -> None:
+        """Test critical values against the published triangle test table."""
+        assert statistics.critical_value(n_total, alpha=0.05) == expected
+
+    def test_unreachable_significance(self: Self) -> None:
+        """Test that tiny panels report a critical value above the panel size."""
+        assert statistics.critical_value(2, alpha=0.05) == 3
+
+    def test_fallback_matches_table(
+        self: Self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that panels beyond the table bound give the same critical values."""
+        n_total = np.arange(0, 200)
+        from_table = statistics.critical_values(n_total)
+
+        monkeypatch.setattr(config, "STATISTICS_TABLE_MAX_N", 5)
+        from_fallback = statistics.critical_values(n_total)
+
+        np.testing.assert_array_equal(from_table, from_fallback)
+
+    def test_mixed_test_types_in_one_batch(self: Self) -> None:
+        """Test that a batch mixing chance probabilities matches each test type."""
+        p0 = np.array([1 / 3, 1 / 2])
+        np.testing.assert_array_equal(
+            statistics.critical_values([20, 20], p0=p0),
+            [
+                statistics.critical_value(20, p0=1 / 3),
+                statistics.critical_value(20, p0=1 / 2),
+            ],
+        )
+
+    def test_is_significant_agrees_with_p_value(self: Self) -> None:
+        """Test that the critical value is the first significant count."""
+        n_total = 20
+        k = statistics.critical_value(n_total, alpha=0.05)
+        assert statistics.is_significant(k, n_total, alpha=0.05)
+        assert not statistics.is_significant(k - 1, n_total, alpha=0.05)
+        assert statistics.p_value(k, n_total) <= 0.05
+        assert statistics.p_value(k - 1, n_total) > 0.05
+
+
+class TestPower:
+    def test_power_matches_direct_computation(self: Self) -> None:
+        """Test that tabulated power matches a direct binomial computation."""
+        n_total, pd = 40, 0.3
+        k = statistics.critical_value(n_total, alpha=0.05)
+        expected = stats.binom.sf(k - 1, n_total, 1 / 3 + pd * 2 / 3)
+        assert statistics.power(n_total, pd, alpha=0.05) == pytest.approx(expected)
+
+    def test_powers_matches_power(self: Self) -> None:
+        """Test that the batched power agrees with the tabulated power."""
+        p0 = np.array([1 / 3, 1 / 2, 1 / 3])
+        n_total = np.array([30, 30, 2000])
+        expected = [
+            statistics.power(n, 0.3, alpha=0.05, p0=p)
+            for n, p in zip(n_total.tolist(), p0.tolist(), strict=True)
+        ]
+        np.testing.assert_allclose(
+            statistics.powers(n_total, 0.3, alpha=0.05, p0=p0), expected
+        )
+
+    def test_no_discriminators_has_power_of_at_most_alpha(self: Self) -> None:
+        """Test that with pure guessing the power is the type I error rate."""
+        assert statistics.power(40, 0.0, alpha=0.05) <= 0.05
+
+    def test_required_sample_size_is_first_panel_with_power(self: Self) -> None:
+        """Test that the required sample size is the smallest powered panel."""
+        n_total = statistics.required_sample_size(0.3, alpha=0.05, beta=0.2)
+        assert n_total is not None
+        assert statistics.power(n_total, 0.3, alpha=0.05) >= 0.8
+        assert all(statistics.power(n, 0.3, alpha=0.05) < 0.8 for n in range(n_total))
+
+    def test_required_sample_size_unreachable(self: Self) -> None:
+        """Test that an undetectable effect reports no sample size."""
+        assert statistics.required_sample_size(0.0, alpha=0.05, beta=0.2) is None
+
+
+class TestSequentialAnalysis:
+    def test_log_likelihood_ratio_is_additive(self: Self) -> None:
+        """Test that the ratio can be accumulated one response at a time."""
+        running = sum(
+            statistics.log_likelihood_ratio(int(correct), 1)
+            for correct in [True, False, True, True, False]
+        )
+        assert running == pytest.approx(statistics.log_likelihood_ratio(3, 5))
+
+    def test_decision_boundaries(self: Self) -> None:
+        """Test that decisions follow Wald's boundaries."""
+        lower, upper = statistics.sequential_boundaries(alpha=0.05, beta=0.2)
+        assert lower < 0 < upper
+        assert (
+            statistics.sequential_decision(upper, alpha=0.05, beta=0.2)
+            == SequentialDecisions.ACCEPT_ALTERNATIVE
+        )
+        assert (
+            statistics.sequential_decision(lower, alpha=0.05, beta=0.2)
+            == SequentialDecisions.ACCEPT_NULL
+        )
+        assert (
+            statistics.sequential_decision(0.0, alpha=0.05, beta=0.2)
+            == SequentialDecisions.CONTINUE
+        )
+
+
+class TestCredibleIntervals:
+    def test_matches_beta_quantiles(self: Self) -> None:
+        """Test that intervals are the central quantiles of the beta posterior."""
+        n_correct = np.array([0, 4, 12, 30])
+        n_total = np.array([0, 10, 20, 30])
+        intervals = statistics.credible_intervals(n_correct, n_total, level=0.9)
+
+        a, b = statistics.posterior_parameters(n_correct, n_total)
+        np.testing.assert_allclose(intervals[..., 0], stats.beta.ppf(0.05, a, b))
+        np.testing.assert_allclose(intervals[..., 1], stats.beta.ppf(0.95, a, b))
+
+    def test_repeated_counts_are_cached(self: Self) -> None:
+        """Test that a repeated (correct, total, level) is served from the cache."""
+        cache = statistics._credible_interval_cache
+        statistics.credible_intervals(7, 21, level=0.8)
+        hits = cache.hits
+        statistics.credible_intervals(np.array([7, 7]), np.array([21, 21]), level=0.8)
+        assert cache.hits == hits + 2
+
+    def test_discriminator_proportion_is_clipped(self: Self) -> None:
+        """Test that proportions at or below chance imply no discriminators."""
+        np.testing.assert_allclose(
+            statistics.discriminator_proportion(np.array([0.1, 1 / 3, 2 / 3, 1.0])),
+            [0.0, 0.0, 0.5, 1.0],
+        )
+
+
+class TestAdjustedPValues:
+    def test_known_adjustments(self: Self) -> None:
+        """Test against hand-computed Benjamini-Hochberg and Holm adjustments."""
+        p = np.array([0.04, 0.01, 0.03, 0.20])
+        bh, holm = statistics.adjusted_p_values(p)
+        np.testing.assert_allclose(bh, [0.04 * 4 / 3, 0.04, 0.04 * 4 / 3, 0.20])
+        np.testing.assert_allclose(holm, [0.09, 0.04, 0.09, 0.20])
+
+    def test_adjusted_is_never_below_raw(self: Self) -> None:
+        """Test that adjusting is conservative and capped at one."""
+        p = np.random.default_rng(1).uniform(size=50)
+        bh, holm = statistics.adjusted_p_values(p)
+        assert np.all(bh >= p) and np.all(holm >= bh)
+        assert np.all(holm <= 1.0)
+
+    def test_empty_family(self: Self) -> None:
+        """Test that no tests adjusts to no p-values."""
+        bh, holm = statistics.adjusted_p_values([])
+        assert bh.size == holm.size == 0
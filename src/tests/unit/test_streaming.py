@@ -0,0 +1,54 @@
+import io
+import json
+import zipfile
+from typing import Self
+
+import pytest
+from pydantic import BaseModel
+
+from triangler_fastapi.domain import streaming
+
+
+class TestStreamZip:
+    def test_entries_are_yielded_as_written(self: Self) -> None:
+        """Test that each entry is its own chunk and the chunks form a valid ZIP."""
+        entries = [
+            (f"entry-{i}.txt", b"x" * 1000 * i, zipfile.ZIP_DEFLATED) for i in range(3)
+        ]
+        chunks = list(streaming.stream_zip(iter(entries)))
+
+        # one chunk per entry and a final one with the central directory
+        assert len(chunks) == len(entries) + 1
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            assert archive.testzip() is None
+            assert [archive.read(name) for name, _, _ in entries] == [
+                content for _, content, _ in entries
+            ]
+
+
+class _Item(BaseModel):
+    id: int
+    name: str
+
+
+class TestStreamJson:
+    def test_ndjson_in_batches(self: Self) -> None:
+        """Test that each batch is a chunk of complete lines."""
+        items = [_Item(id=i, name=f"item {i}") for i in range(5)]
+
+        chunks = list(streaming.stream_ndjson(items, batch_size=2))
+
+        assert len(chunks) == 3
+        assert all(x.endswith(b"\n") for x in chunks)
+        lines = b"".join(chunks).splitlines()
+        assert [_Item.model_validate_json(x) for x in lines] == items
+
+    @pytest.mark.parametrize("count", [0, 1, 5])
+    def test_json_array(self: Self, count: int) -> None:
+        """Test that the chunks join into one JSON array, starting at once."""
+        items = [_Item(id=i, name=f"item {i}") for i in range(count)]
+
+        chunks = streaming.stream_json_array(iter(items), batch_size=2)
+
+        assert next(chunks) == b"["
+        assert json.loads(b"[" + b"".join(chunks)) == [x.model_dump() for x in items]
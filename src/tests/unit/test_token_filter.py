@@ -0,0 +1,97 @@
+import asyncio
+import multiprocessing
+from collections.abc import Generator
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from typing import Self
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from triangler_fastapi import config
+from triangler_fastapi.domain import repositories
+from triangler_fastapi.domain import token_filter
+from triangler_fastapi.services import token_filter_service
+
+
+@pytest.fixture(autouse=True)
+def reset_filter() -> Generator[None, Any, None]:
+    token_filter.reset()
+    yield
+    token_filter.reset()
+
+
+class TestTokenFilter:
+    def test_lets_everything_through_until_built(self: Self) -> None:
+        """Test that tokens are not rejected before the first rebuild."""
+        assert token_filter.might_exist("unknown")
+        assert not token_filter.get_stats().ready
+
+    def test_rejects_unknown_tokens(self: Self) -> None:
+        """Test that only tokens that were rebuilt or added get through."""
+        token_filter.rebuild(iter(["known"]))
+        token_filter.add(["created"])
+
+        assert token_filter.might_exist("known")
+        assert token_filter.might_exist("created")
+        assert not token_filter.might_exist("unknown")
+        stats = token_filter.get_stats()
+        assert (stats.ready, stats.tokens, stats.lookups, stats.rejected) == (
+            True,
+            2,
+            3,
+            1,
+        )
+
+    def test_tokens_created_during_rebuild_are_kept(self: Self) -> None:
+        """Test that a token created while the table is streamed is not lost."""
+
+        def stream() -> Iterator[str]:
+            yield "existing"
+            token_filter.add(["created-mid-rebuild"])
+            yield "also-existing"
+
+        token_filter.rebuild(stream())
+
+        assert token_filter.might_exist("created-mid-rebuild")
+        assert token_filter.might_exist("also-existing")
+
+    def test_tokens_are_added_once_committed(self: Self, db_session: Session) -> None:
+        """Test that tokens reach the filter when their transaction commits and
+        never when it is rolled back."""
+        token_filter.rebuild(iter([]))
+
+        db_session.execute(select(1))
+        repositories._add_to_token_filter_on_commit(db_session, ["rolled-back"])
+        db_session.rollback()
+        db_session.execute(select(1))
+        repositories._add_to_token_filter_on_commit(db_session, ["committed"])
+
+        assert not token_filter.might_exist("committed")
+        db_session.commit()
+        assert token_filter.might_exist("committed")
+        assert not token_filter.might_exist("rolled-back")
+
+    def test_lets_everything_through_with_several_workers(
+        self: Self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that with several workers the filter is never built, so a token
+        created by another worker is not turned away."""
+        monkeypatch.setattr(config, "WEB_CONCURRENCY", 4)
+
+        asyncio.run(token_filter_service.keep_token_filter_fresh())
+        token_filter_service.rebuild_token_filter()
+
+        assert token_filter.might_exist("created-by-another-worker")
+        assert not token_filter.get_stats().ready
+
+    def test_spawned_worker_is_not_single(self: Self) -> None:
+        """Test that a worker spawned by a supervisor, as `uvicorn --workers`
+        does, counts as one of several."""
+        assert token_filter_service.is_single_worker()
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            assert not pool.submit(token_filter_service.is_single_worker).result()
@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+from datetime import datetime
+from datetime import timedelta
+from typing import Self
+
+import pytest
+
+from triangler_fastapi.domain import token_utils
+from triangler_fastapi.exceptions import errors
+
+
+class TestSignedTokens:
+    def test_round_trip(self: Self) -> None:
+        """Test that a signed token resolves to its sample flight."""
+        token = token_utils.generate_signed_token(
+            2**32 - 1, token_utils.calculate_expiry_date()
+        )
+        assert token_utils.is_signed_token(token)
+        assert len(token) <= 32
+        assert token_utils.verify_signed_token(token) == 2**32 - 1
+
+    def test_forged_token_is_rejected(self: Self) -> None:
+        """Test that changing any character invalidates the signature."""
+        token = token_utils.generate_signed_token(
+            42, token_utils.calculate_expiry_date()
+        )
+        for i in range(len(token_utils.SIGNED_TOKEN_PREFIX), len(token)):
+            forged = token[:i] + ("A" if token[i] != "A" else "B") + token[i + 1 :]
+            with pytest.raises(errors.InvalidTokenError):
+                token_utils.verify_signed_token(forged)
+
+    def test_expired_token_is_rejected(self: Self) -> None:
+        """Test that a token past its expiry date is rejected."""
+        token = token_utils.generate_signed_token(
+            42, datetime.now() - timedelta(minutes=1)
+        )
+        with pytest.raises(errors.ExpiredTokenError):
+            token_utils.verify_signed_token(token)
+
+    @pytest.mark.parametrize("token", ["", "s.", "s.abc", "s.!!!!", "abcdefgh"])
+    def test_malformed_token_is_rejected(self: Self, token: str) -> None:
+        """Test that tokens that are not signed tokens are rejected."""
+        with pytest.raises(errors.InvalidTokenError):
+            token_utils.verify_signed_token(token)
+
+    def test_random_tokens_are_not_signed(self: Self) -> None:
+        """Test that random tokens can't be mistaken for signed ones."""
+        assert not any(
+            token_utils.is_signed_token(token_utils.generate_unique_token())
+            for _ in range(1000)
+        )
+
+
+class TestTokenSecret:
+    @pytest.mark.parametrize(
+        ("environment", "starts"),
+        [
+            ({}, True),
+            ({"IS_PROD": "Y"}, False),
+            ({"OBSERVATION_TOKEN_FORMAT": "signed"}, False),
+            ({"IS_PROD": "Y", "OBSERVATION_TOKEN_SECRET": "secret"}, True),
+        ],
+    )
+    def test_development_secret_only_outside_production(
+        self: Self, environment: dict[str, str], starts: bool
+    ) -> None:
+        """Test that the public development secret is refused in production and
+        for signed tokens."""
+        env = {
+            k: v
+            for k, v in os.environ.items()
+            if k
+            not in ("IS_PROD", "OBSERVATION_TOKEN_FORMAT", "OBSERVATION_TOKEN_SECRET")
+        }
+        result = subprocess.run(
+            [sys.executable, "-c", "import triangler_fastapi.config"],
+            env={**env, **environment},
+            capture_output=True,
+            check=False,
+        )
+        assert (result.returncode == 0) == starts
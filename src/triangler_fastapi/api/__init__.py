@@ -1,9 +1,30 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 from fastapi import Depends
 from fastapi import FastAPI
 
 from triangler_fastapi import config
+from triangler_fastapi import workers
 from triangler_fastapi.api.v1 import v1_router
 from triangler_fastapi.data import persistence
+from triangler_fastapi.services import maintenance_service
+from triangler_fastapi.services import token_filter_service
+
+
+@asynccontextmanager
+async def lifespan(api: FastAPI) -> AsyncGenerator[None, None]:
+    tasks = [asyncio.create_task(token_filter_service.keep_token_filter_fresh())]
+    if config.PURGE_ENABLED:
+        tasks.append(asyncio.create_task(maintenance_service.keep_purging()))
+    yield
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    workers.shutdown()
 
 
 def create_api() -> FastAPI:
@@ -13,6 +34,7 @@ def create_api() -> FastAPI:
         version="0.1.0",
         dependencies=[Depends(persistence.get_db_session)],
         debug=config.DEBUG,
+        lifespan=lifespan,
     )
     api.include_router(v1_router)
     return api
@@ -2,10 +2,18 @@ from fastapi import APIRouter
 
 from triangler_fastapi.api.v1 import auth
 from triangler_fastapi.api.v1 import experiments
+from triangler_fastapi.api.v1 import metrics
+from triangler_fastapi.api.v1 import planning
+from triangler_fastapi.api.v1 import tokens
+from triangler_fastapi.api.v1.experiments import observations
 
 v1_router = APIRouter(
     prefix="/api/v1",
     tags=["v1"],
 )
 v1_router.include_router(experiments.router, tags=experiments.ROUTER_TAGS)
+v1_router.include_router(observations.router, tags=observations.ROUTER_TAGS)
 v1_router.include_router(auth.router, tags=auth.ROUTER_TAGS)
+v1_router.include_router(planning.router, tags=planning.ROUTER_TAGS)
+v1_router.include_router(tokens.router, tags=tokens.ROUTER_TAGS)
+v1_router.include_router(metrics.router, tags=metrics.ROUTER_TAGS)
@@ -1,13 +1,21 @@
 from enum import Enum
 
 from fastapi import APIRouter
+from fastapi import Body
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Query
+from fastapi import Response
 from loguru import logger
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import NoResultFound
 
+from triangler_fastapi import config
 from triangler_fastapi.data import models
 from triangler_fastapi.domain import repositories
 from triangler_fastapi.domain import schemas
+from triangler_fastapi.exceptions import errors
+from triangler_fastapi.services import observation_service
 
 from .. import depends
 
@@ -24,19 +32,39 @@ router = APIRouter(
 @router.get("/{experiment_id}/observations", status_code=200)
 def get_all_observations(
     experiment_id: int,
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=config.PAGE_SIZE_DEFAULT, gt=0, le=config.PAGE_SIZE_MAX),
     experiment_repository: repositories.ExperimentRepository = Depends(
         depends.get_repository(models.Experiment)
     ),
-    observation_repository: repositories.ResponseRepository = Depends(
-        depends.get_repository(models.Response)
+    sample_flight_repository: repositories.SampleFlightRepository = Depends(
+        depends.get_repository(models.SampleFlight)
     ),
-) -> list[schemas.ExperimentOutSchema]:
-    """Gets all observations for a given experiment."""
-    experiment = experiment_repository.get_by_id(id=experiment_id)
-    if experiment is None:
-        logger.error(f"Experiment with id {experiment_id} not found.")
-        raise HTTPException(status_code=404, detail="Experiment not found")
-    return observation_repository.filter(experiment_id=experiment_id)  # pyright: ignore[reportCallIssue]
+) -> list[schemas.ObservationSchema]:
+    """Gets the observations of an experiment, newest first.
+
+    Each is a sample flight with its token and response, if it has one.
+    Results are paginated. When there are more, the `X-Next-Cursor` header
+    holds the `cursor` of the next page.
+    """
+    try:
+        observations, next_cursor = (
+            observation_service.get_all_observations_for_experiment(
+                experiment_id=experiment_id,
+                experiment_repository=experiment_repository,
+                sample_flight_repository=sample_flight_repository,
+                cursor=cursor,
+                limit=limit,
+            )
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Experiment not found") from e
+    except errors.InvalidCursorError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return observations
 
 
 @router.post("/{experiment_id}/observations/", status_code=201)
@@ -51,10 +79,116 @@ def create_observation(
     ),
 ) -> schemas.ResponseOutSchema:
     """Creates a new observation for the specified experiment."""
-    experiment = experiment_repository.get_by_id(id=experiment_id)
-    if experiment is None:
+    try:
+        experiment = experiment_repository.get_by_id(id=experiment_id)
+    except NoResultFound as e:
         logger.error(f"Experiment with id {experiment_id} not found.")
-        raise HTTPException(status_code=404, detail="Experiment not found")
+        raise HTTPException(status_code=404, detail="Experiment not found") from e
+    try:
+        observation_service.ensure_valid_samples(
+            experiment.test_type, [payload.chosen_sample]
+        )
+    except errors.InvalidSampleError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
 
-    observation = observation_repository.create(data=payload)
+    try:
+        observation = observation_repository.create(data=payload)
+    except IntegrityError as e:
+        logger.error(f"Sample flight {payload.sample_flight_id} already answered.")
+        raise HTTPException(
+            status_code=409, detail="Sample flight already has a response"
+        ) from e
     return schemas.ResponseOutSchema.model_validate(observation)
+
+
+@router.post("/{experiment_id}/observations/batch", status_code=201)
+def create_observations(
+    experiment_id: int,
+    payload: list[schemas.ResponseInSchema] = Body(
+        min_length=1, max_length=config.BATCH_MAX_SIZE
+    ),
+    experiment_repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+    sample_flight_repository: repositories.SampleFlightRepository = Depends(
+        depends.get_repository(models.SampleFlight)
+    ),
+    observation_repository: repositories.ResponseRepository = Depends(
+        depends.get_repository(models.Response)
+    ),
+) -> list[schemas.ResponseOutSchema]:
+    """Creates many responses to the experiment's sample flights in a single
+    transaction. Nothing is created if any flight is not found in the
+    experiment."""
+    try:
+        return observation_service.create_responses(
+            experiment_id=experiment_id,
+            data=payload,
+            experiment_repository=experiment_repository,
+            sample_flight_repository=sample_flight_repository,
+            response_repository=observation_repository,
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except errors.InvalidSampleError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    except errors.ObjectAlreadyExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+
+@router.put("/{experiment_id}/observations/batch", status_code=200)
+def update_observations(
+    experiment_id: int,
+    payload: list[schemas.ResponseBatchUpdateSchema] = Body(
+        min_length=1, max_length=config.BATCH_MAX_SIZE
+    ),
+    experiment_repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+    observation_repository: repositories.ResponseRepository = Depends(
+        depends.get_repository(models.Response)
+    ),
+) -> list[schemas.ResponseOutSchema]:
+    """Replaces many responses to the experiment's sample flights in a single
+    transaction. Nothing is changed if any of them is not found in the
+    experiment."""
+    try:
+        return observation_service.update_responses(
+            experiment_id=experiment_id,
+            data=payload,
+            experiment_repository=experiment_repository,
+            response_repository=observation_repository,
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except errors.InvalidSampleError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    except errors.ObjectAlreadyExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+
+@router.delete("/{experiment_id}/observations/batch", status_code=200)
+def delete_observations(
+    experiment_id: int,
+    payload: schemas.BatchDeleteSchema,
+    observation_repository: repositories.ResponseRepository = Depends(
+        depends.get_repository(models.Response)
+    ),
+) -> schemas.ActionOutcome:
+    """Deletes many responses to the experiment's sample flights in a single
+    transaction. Nothing is deleted if any of them is not found in the
+    experiment."""
+    try:
+        count = observation_service.delete_responses(
+            experiment_id=experiment_id,
+            ids=payload.ids,
+            response_repository=observation_repository,
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+    return schemas.ActionOutcome(
+        success=True,
+        message=f"Deleted {count} responses.",
+        details={"ids": payload.ids},
+    )
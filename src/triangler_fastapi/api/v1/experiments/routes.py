@@ -1,14 +1,29 @@
+from datetime import date
 from enum import Enum
 
 from fastapi import APIRouter
+from fastapi import Body
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Query
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
+from triangler_fastapi import config
+from triangler_fastapi.constants import BallotSheetFormats
+from triangler_fastapi.constants import ExportFormats
+from triangler_fastapi.constants import QRCodeFormats
 from triangler_fastapi.data import models
 from triangler_fastapi.domain import repositories
 from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain.value_types import DateRange
 from triangler_fastapi.exceptions import errors
+from triangler_fastapi.services import ballot_service
 from triangler_fastapi.services import experiment_service
+from triangler_fastapi.services import export_service
+from triangler_fastapi.services import observation_service
+from triangler_fastapi.services import report_service
 
 from . import depends
 
@@ -24,25 +39,110 @@ router = APIRouter(
 
 @router.get("/", status_code=200)
 def get_all_experiments(
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=config.PAGE_SIZE_DEFAULT, gt=0, le=config.PAGE_SIZE_MAX),
     repository: repositories.ExperimentRepository = Depends(
         depends.get_repository(models.Experiment)
     ),
 ) -> list[schemas.ExperimentOutSchema]:
-    """Gets all experiments defined in this application."""
-    experiment_results = experiment_service.get_all_experiments(repository=repository)
+    """Gets the experiments defined in this application, newest first.
+
+    Results are paginated. When there are more, the `X-Next-Cursor` header
+    holds the `cursor` of the next page.
+    """
+    try:
+        experiment_results, next_cursor = experiment_service.get_experiments_page(
+            repository=repository, cursor=cursor, limit=limit
+        )
+    except errors.InvalidCursorError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
     return experiment_results
 
 
+@router.get("/report", status_code=200)
+def get_experiments_report(
+    experiment_id: list[int] | None = Query(default=None),
+    significance_level: float = Query(default=config.SIGNIFICANCE_LEVEL, gt=0, lt=1),
+    credible_level: float = Query(default=config.CREDIBLE_INTERVAL_LEVEL, gt=0, lt=1),
+    repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+) -> schemas.ExperimentReportSchema:
+    """Gets the sample size, correct count and significance of many experiments.
+
+    Each experiment also has the posterior of its proportion correct and the
+    implied proportion of discriminators, with credible intervals. All
+    experiments are reported unless one or more `experiment_id` are given.
+    """
+    return report_service.get_experiments_report(
+        repository=repository,
+        experiment_ids=experiment_id,
+        significance_level=significance_level,
+        credible_level=credible_level,
+    )
+
+
+@router.get("/report/adjusted", status_code=200)
+def get_adjusted_report(
+    start_on: date,
+    end_on: date,
+    significance_level: float = Query(default=config.SIGNIFICANCE_LEVEL, gt=0, lt=1),
+    repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+) -> schemas.AdjustedReportSchema:
+    """Gets experiments running between two dates with Benjamini-Hochberg and Holm
+    adjusted p-values, for when many tests are read together."""
+    try:
+        date_range = DateRange(start_on=start_on, end_on=end_on)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422, detail="start_on must not be after end_on"
+        ) from e
+    return report_service.get_adjusted_report(
+        repository=repository,
+        date_range=date_range,
+        significance_level=significance_level,
+    )
+
+
+@router.get(
+    "/export",
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "application/json": {}}}},
+)
+def export_experiments(
+    export_format: ExportFormats = Query(default=ExportFormats.NDJSON, alias="format"),
+) -> StreamingResponse:
+    """Streams every experiment as newline-delimited JSON or a JSON array.
+
+    Rows are read and written in batches, so memory use does not grow with the
+    number of experiments.
+    """
+    return StreamingResponse(
+        export_service.stream_experiments(export_format=export_format),
+        media_type=export_service.MEDIA_TYPES[export_format],
+    )
+
+
 @router.get("/{experiment_id}", status_code=200)
 def get_experiment_by_id(
     experiment_id: int,
     repository: repositories.ExperimentRepository = Depends(
         depends.get_repository(models.Experiment)
     ),
-) -> schemas.ExperimentOutSchema:
-    """Get a specific experiemnt by its experiment ID."""
+) -> schemas.ExperimentDetailSchema:
+    """Get a specific experiemnt by its experiment ID.
+
+    Includes the sequential analysis, which reports as soon as enough responses
+    are in to stop the experiment early.
+    """
     try:
-        experiment = experiment_service.get_experiment_by_id(
+        experiment = experiment_service.get_experiment_detail_by_id(
             id=experiment_id, repository=repository
         )
     except errors.ObjectNotFoundError as e:
@@ -50,6 +150,119 @@ def get_experiment_by_id(
     return experiment
 
 
+@router.get("/{experiment_id}/report/experience-levels", status_code=200)
+def get_experience_level_report(
+    experiment_id: int,
+    significance_level: float = Query(default=config.SIGNIFICANCE_LEVEL, gt=0, lt=1),
+    repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+) -> schemas.ExperimentStratifiedReportSchema:
+    """Gets an experiment's results for each taster experience level and pooled."""
+    try:
+        report = report_service.get_experience_level_report(
+            id=experiment_id,
+            repository=repository,
+            significance_level=significance_level,
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Experiment not found") from e
+    return report
+
+
+@router.get(
+    "/{experiment_id}/ballots",
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/pdf": {}, "image/png": {}}},
+    },
+)
+def get_ballot_sheets(
+    experiment_id: int,
+    sheet_format: BallotSheetFormats = Query(
+        default=BallotSheetFormats.PDF, alias="format"
+    ),
+    page: int = Query(default=1, gt=0),
+    experiment_repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+    token_repository: repositories.SampleFlightTokenRepository = Depends(
+        depends.get_repository(models.SampleFlightToken)
+    ),
+) -> Response:
+    """Gets printable ballot sheets for an experiment's outstanding tokens.
+
+    A PDF of every sheet is streamed as its pages are rendered. A PNG is a
+    single sheet, chosen with `page`, and the `X-Total-Pages` header gives the
+    number of sheets.
+    """
+    try:
+        all_ballots = ballot_service.get_outstanding_ballots(
+            id=experiment_id,
+            experiment_repository=experiment_repository,
+            token_repository=token_repository,
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Experiment not found") from e
+    page_count = ballot_service.count_sheets(len(all_ballots))
+    if page_count == 0:
+        raise HTTPException(status_code=404, detail="No outstanding ballots")
+
+    filename = f"experiment-{experiment_id}-ballots"
+    if sheet_format == BallotSheetFormats.PDF:
+        return StreamingResponse(
+            ballot_service.stream_sheets_pdf(all_ballots=all_ballots),
+            media_type="application/pdf",
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}.pdf"',
+                "X-Total-Pages": str(page_count),
+            },
+        )
+    if page > page_count:
+        raise HTTPException(status_code=404, detail="Page not found")
+    content = ballot_service.render_sheet_png(all_ballots=all_ballots, page=page)
+    return Response(
+        content=content,
+        media_type="image/png",
+        headers={
+            "Content-Disposition": f'inline; filename="{filename}-{page}.png"',
+            "X-Total-Pages": str(page_count),
+        },
+    )
+
+
+@router.get(
+    "/{experiment_id}/tokens/qr.zip",
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/zip": {}}}},
+)
+def get_token_qr_codes_zip(
+    experiment_id: int,
+    qr_format: QRCodeFormats = Query(default=QRCodeFormats.SVG, alias="format"),
+    repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+) -> StreamingResponse:
+    """Gets a ZIP of the QR code of every token of an experiment.
+
+    The archive is streamed as the codes are rendered.
+    """
+    try:
+        experiment_service.get_experiment_by_id(id=experiment_id, repository=repository)
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Experiment not found") from e
+    filename = f"experiment-{experiment_id}-qr-codes.zip"
+    return StreamingResponse(
+        export_service.stream_qr_code_zip(
+            experiment_id=experiment_id, qr_format=qr_format
+        ),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.post("/", status_code=201)
 def create_experiment(
     payload: schemas.ExperimentInSchema,
@@ -64,6 +277,211 @@ def create_experiment(
     return schemas.ExperimentOutSchema.model_validate(experiment)
 
 
+# batch routes are declared before the `/{experiment_id}` routes they would
+# otherwise match
+
+
+@router.post("/batch", status_code=201)
+def create_experiments(
+    payload: list[schemas.ExperimentInSchema] = Body(
+        min_length=1, max_length=config.BATCH_MAX_SIZE
+    ),
+    repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+) -> list[schemas.ExperimentOutSchema]:
+    """Creates many experiments in a single transaction."""
+    return experiment_service.create_experiments(data=payload, repository=repository)
+
+
+@router.put("/batch", status_code=200)
+def update_experiments(
+    payload: list[schemas.ExperimentBatchUpdateSchema] = Body(
+        min_length=1, max_length=config.BATCH_MAX_SIZE
+    ),
+    repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+) -> list[schemas.ExperimentOutSchema]:
+    """Replaces many experiments in a single transaction. Nothing is changed if
+    any of them is not found."""
+    try:
+        return experiment_service.update_experiments(
+            data=payload, repository=repository
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+
+@router.delete("/batch", status_code=200)
+def delete_experiments(
+    payload: schemas.BatchDeleteSchema,
+    repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+) -> schemas.ActionOutcome:
+    """Deletes many experiments in a single transaction. Nothing is deleted if
+    any of them is not found."""
+    try:
+        count = experiment_service.delete_experiments(
+            ids=payload.ids, repository=repository
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+    return schemas.ActionOutcome(
+        success=True,
+        message=f"Deleted {count} experiments.",
+        details={"ids": payload.ids},
+    )
+
+
+@router.get(
+    "/{experiment_id}/sample-flights/export",
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "application/json": {}}}},
+)
+def export_sample_flights(
+    experiment_id: int,
+    export_format: ExportFormats = Query(default=ExportFormats.NDJSON, alias="format"),
+    repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+) -> StreamingResponse:
+    """Streams an experiment's sample flights, with their responses, as
+    newline-delimited JSON or a JSON array."""
+    try:
+        experiment_service.get_experiment_by_id(id=experiment_id, repository=repository)
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Experiment not found") from e
+    return StreamingResponse(
+        export_service.stream_sample_flights(
+            experiment_id=experiment_id, export_format=export_format
+        ),
+        media_type=export_service.MEDIA_TYPES[export_format],
+    )
+
+
+@router.post("/{experiment_id}/sample-flights", status_code=201)
+def create_sample_flights(
+    experiment_id: int,
+    payload: schemas.SampleFlightBatchInSchema,
+    experiment_repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+    sample_flight_repository: repositories.SampleFlightRepository = Depends(
+        depends.get_repository(models.SampleFlight)
+    ),
+    token_repository: repositories.SampleFlightTokenRepository = Depends(
+        depends.get_repository(models.SampleFlightToken)
+    ),
+) -> list[schemas.ObservationAwaitingResponseSchema]:
+    """Creates `count` sample flights for an experiment, each with an observation
+    token, in a single transaction.
+
+    The correct samples are drawn at random, or with `design` set to `balanced`
+    each of the six triangle serving orders is served equally often.
+    """
+    try:
+        return observation_service.create_sample_flights_with_tokens(
+            experiment_id=experiment_id,
+            data=payload,
+            experiment_repository=experiment_repository,
+            sample_flight_repository=sample_flight_repository,
+            token_repository=token_repository,
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Experiment not found") from e
+    except (errors.UnsupportedDesignError, errors.InvalidSampleError) as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    except errors.ObjectAlreadyExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+
+@router.post("/{experiment_id}/sample-flights/batch", status_code=201)
+def create_sample_flights_batch(
+    experiment_id: int,
+    payload: list[schemas.SampleFlightBatchItemSchema] = Body(
+        min_length=1, max_length=config.BATCH_MAX_SIZE
+    ),
+    experiment_repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+    sample_flight_repository: repositories.SampleFlightRepository = Depends(
+        depends.get_repository(models.SampleFlight)
+    ),
+) -> list[schemas.SampleFlightOutSchema]:
+    """Creates the given sample flights for an experiment in a single
+    transaction, without observation tokens."""
+    try:
+        return observation_service.create_sample_flights(
+            experiment_id=experiment_id,
+            data=payload,
+            experiment_repository=experiment_repository,
+            sample_flight_repository=sample_flight_repository,
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Experiment not found") from e
+    except errors.InvalidSampleError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+
+@router.put("/{experiment_id}/sample-flights/batch", status_code=200)
+def update_sample_flights_batch(
+    experiment_id: int,
+    payload: list[schemas.SampleFlightBatchUpdateSchema] = Body(
+        min_length=1, max_length=config.BATCH_MAX_SIZE
+    ),
+    experiment_repository: repositories.ExperimentRepository = Depends(
+        depends.get_repository(models.Experiment)
+    ),
+    sample_flight_repository: repositories.SampleFlightRepository = Depends(
+        depends.get_repository(models.SampleFlight)
+    ),
+) -> list[schemas.SampleFlightOutSchema]:
+    """Replaces many of an experiment's sample flights in a single transaction.
+    Nothing is changed if any of them is not found in the experiment."""
+    try:
+        return observation_service.update_sample_flights(
+            experiment_id=experiment_id,
+            data=payload,
+            experiment_repository=experiment_repository,
+            sample_flight_repository=sample_flight_repository,
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except errors.InvalidSampleError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+
+@router.delete("/{experiment_id}/sample-flights/batch", status_code=200)
+def delete_sample_flights_batch(
+    experiment_id: int,
+    payload: schemas.BatchDeleteSchema,
+    sample_flight_repository: repositories.SampleFlightRepository = Depends(
+        depends.get_repository(models.SampleFlight)
+    ),
+) -> schemas.ActionOutcome:
+    """Deletes many of an experiment's sample flights, with their tokens and
+    responses, in a single transaction. Nothing is deleted if any of them is not
+    found in the experiment."""
+    try:
+        count = observation_service.delete_sample_flights(
+            experiment_id=experiment_id,
+            ids=payload.ids,
+            sample_flight_repository=sample_flight_repository,
+        )
+    except errors.ObjectNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+    return schemas.ActionOutcome(
+        success=True,
+        message=f"Deleted {count} sample flights.",
+        details={"ids": payload.ids},
+    )
+
+
 @router.put("/{experiment_id}", status_code=200)
 def update_experiment(
     experiment_id: int,
@@ -79,6 +497,8 @@ def update_experiment(
         )
     except errors.ObjectNotFoundError as e:
         raise HTTPException(status_code=404, detail="Experiment not found") from e
+    except errors.InvalidDateRangeError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
     return updated_data
 
 
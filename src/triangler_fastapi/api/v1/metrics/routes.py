@@ -0,0 +1,36 @@
+from enum import Enum
+
+from fastapi import APIRouter
+
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import token_filter
+from triangler_fastapi.services import maintenance_service
+from triangler_fastapi.services import qr_service
+
+ROUTER_TAGS: list[str | Enum] = ["Metrics", "v1"]
+ROUTER_PATH = "/metrics"
+
+router = APIRouter(
+    prefix=ROUTER_PATH,
+    tags=ROUTER_TAGS,
+)
+
+
+@router.get("/qr-rendering", status_code=200)
+def get_qr_rendering_metrics() -> schemas.QRRenderStatsSchema:
+    """Gets the queue depth, counters and recent latencies of QR code rendering."""
+    return qr_service.get_stats()
+
+
+@router.get("/token-filter", status_code=200)
+def get_token_filter_metrics() -> schemas.TokenFilterStatsSchema:
+    """Gets the size, false-positive rate and counters of the filter that turns
+    away unknown observation tokens."""
+    return token_filter.get_stats()
+
+
+@router.get("/purge", status_code=200)
+def get_purge_metrics() -> schemas.PurgeStatsSchema:
+    """Gets the expired tokens and unanswered flights purged by the background
+    maintenance task, in its last run and since startup."""
+    return maintenance_service.get_stats()
@@ -0,0 +1,73 @@
+from enum import Enum
+
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi import Query
+
+from triangler_fastapi import config
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.exceptions import errors
+from triangler_fastapi.services import planning_service
+from triangler_fastapi.services import simulation_service
+
+ROUTER_TAGS: list[str | Enum] = ["Planning", "v1"]
+ROUTER_PATH = "/planning"
+
+router = APIRouter(
+    prefix=ROUTER_PATH,
+    tags=ROUTER_TAGS,
+)
+
+
+@router.get("/sample-size", status_code=200)
+def get_sample_size_plan(
+    discriminator_proportion: float = Query(gt=0, le=1),
+    significance_level: float = Query(default=config.SIGNIFICANCE_LEVEL, gt=0, lt=1),
+    beta: float = Query(default=0.2, gt=0, lt=1),
+    test_type: DiscriminationTests = Query(default=DiscriminationTests.TRIANGLE),
+) -> schemas.SampleSizePlanSchema:
+    """Gets the number of tasters needed to detect a proportion of discriminators.
+
+    `sample_size` is null when no panel up to the planning limit is enough.
+    """
+    return planning_service.plan_sample_size(
+        discriminator_proportion=discriminator_proportion,
+        significance_level=significance_level,
+        beta=beta,
+        test_type=test_type,
+    )
+
+
+@router.get("/critical-value", status_code=200)
+def get_critical_value(
+    sample_size: int = Query(gt=0, le=config.PLANNING_MAX_N),
+    significance_level: float = Query(default=config.SIGNIFICANCE_LEVEL, gt=0, lt=1),
+    discriminator_proportion: float | None = Query(default=None, ge=0, le=1),
+    test_type: DiscriminationTests = Query(default=DiscriminationTests.TRIANGLE),
+) -> schemas.CriticalValueSchema:
+    """Gets the number of correct answers needed for significance.
+
+    When `discriminator_proportion` is given the power of the panel is included.
+    """
+    return planning_service.get_critical_value(
+        sample_size=sample_size,
+        significance_level=significance_level,
+        discriminator_proportion=discriminator_proportion,
+        test_type=test_type,
+    )
+
+
+@router.post("/simulations", status_code=200)
+async def simulate_experiments(
+    payload: schemas.SimulationInSchema,
+) -> schemas.SimulationResultSchema:
+    """Simulates many panels of a planned experiment.
+
+    Returns the distribution of p-values and the expected power.
+    """
+    try:
+        result = await simulation_service.run_simulation(data=payload)
+    except (errors.OperationTimedOutError, errors.WorkerUnavailableError) as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    return result
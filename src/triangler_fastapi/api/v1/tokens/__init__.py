@@ -0,0 +1,4 @@
+from . import routes
+
+router = routes.router
+ROUTER_TAGS = routes.ROUTER_TAGS
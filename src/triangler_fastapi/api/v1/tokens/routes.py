@@ -0,0 +1,108 @@
+from enum import Enum
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from triangler_fastapi import config
+from triangler_fastapi.api.v1.experiments import depends
+from triangler_fastapi.constants import QRCodeFormats
+from triangler_fastapi.data import models
+from triangler_fastapi.domain import qr_cache
+from triangler_fastapi.domain import repositories
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import token_filter
+from triangler_fastapi.exceptions import errors
+from triangler_fastapi.services import observation_service
+from triangler_fastapi.services import qr_service
+
+ROUTER_TAGS: list[str | Enum] = ["Tokens", "v1"]
+ROUTER_PATH = "/tokens"
+
+router = APIRouter(
+    prefix=ROUTER_PATH,
+    tags=ROUTER_TAGS,
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get(
+    "/{token}/qr",
+    status_code=200,
+    response_class=FileResponse,
+    responses={503: {"description": "QR rendering queue is full"}},
+)
+async def get_token_qr_code(
+    token: str,
+    qr_format: QRCodeFormats = Query(default=QRCodeFormats.SVG, alias="format"),
+    size: int = Query(
+        default=config.QR_CODE_BOX_SIZE, gt=0, le=config.QR_CODE_MAX_BOX_SIZE
+    ),
+    repository: repositories.SampleFlightTokenRepository = Depends(
+        depends.get_repository(models.SampleFlightToken)
+    ),
+) -> FileResponse:
+    """Gets the QR code of an observation token as an SVG or PNG image.
+
+    Codes are rendered once and then served from the render cache on disk.
+    Rendering runs on a bounded thread pool and is refused with a 503 when the
+    pool's queue is full.
+    """
+    if not token_filter.might_exist(token) or not await run_in_threadpool(
+        repository.filter, models.SampleFlightToken.token == token
+    ):
+        raise HTTPException(status_code=404, detail="Token not found")
+    try:
+        path = await qr_service.get_qr_code_path(token, qr_format, size=size)
+    except errors.ServiceOverloadedError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        ) from e
+    return FileResponse(path, media_type=qr_cache.MEDIA_TYPES[qr_format])
+
+
+@router.post(
+    "/{token}/response",
+    status_code=201,
+    responses={
+        409: {"description": "Already answered"},
+        410: {"description": "Token expired"},
+    },
+)
+def redeem_token(
+    token: str,
+    payload: schemas.TokenResponseInSchema,
+    sample_flight_repository: repositories.SampleFlightRepository = Depends(
+        depends.get_repository(models.SampleFlight)
+    ),
+    response_repository: repositories.ResponseRepository = Depends(
+        depends.get_repository(models.Response)
+    ),
+    token_repository: repositories.SampleFlightTokenRepository = Depends(
+        depends.get_repository(models.SampleFlightToken)
+    ),
+) -> schemas.ResponseOutSchema:
+    """Records an anonymous taster's answer to the ballot of an observation token.
+
+    Signed tokens are checked without the database, so forged and expired ones
+    are turned away before any query.
+    """
+    try:
+        return observation_service.redeem_token(
+            token,
+            data=payload,
+            sample_flight_repository=sample_flight_repository,
+            response_repository=response_repository,
+            token_repository=token_repository,
+        )
+    except errors.ExpiredTokenError as e:
+        raise HTTPException(status_code=410, detail=str(e)) from e
+    except errors.InvalidTokenError as e:
+        raise HTTPException(status_code=404, detail="Token not found") from e
+    except errors.ObjectAlreadyExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except errors.InvalidSampleError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
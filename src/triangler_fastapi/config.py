@@ -3,6 +3,8 @@ import tempfile
 
 from loguru import logger
 
+from triangler_fastapi.constants import ObservationTokenFormats
+
 
 def env_bool(name: str, default: bool = False) -> bool:
     """Get an environment variable as a boolean."""
@@ -34,3 +36,114 @@ if DEBUG:
 # set our observation token parameters
 OBSERVATION_TOKEN_LENGTH = 6
 OBSERVATION_TOKEN_EXPIRY_DAYS = 7
+# sample flights and their tokens can be minted in batches of up to this size,
+# tokens that collide with existing ones are redrawn up to the attempt limit
+SAMPLE_FLIGHT_BATCH_MAX_SIZE = int(
+    os.environ.get("SAMPLE_FLIGHT_BATCH_MAX_SIZE", "1000")
+)
+TOKEN_MINT_MAX_ATTEMPTS = 5
+
+# experiments, sample flights and responses can be created, updated and deleted
+# in batches of up to this size, each batch in one transaction
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "1000"))
+# "random" tokens are looked up in the database when redeemed, "signed" tokens
+# carry their sample flight id and expiry under an HMAC so that they can be
+# checked without one
+OBSERVATION_TOKEN_FORMAT = os.environ.get("OBSERVATION_TOKEN_FORMAT", "random")
+OBSERVATION_TOKEN_SECRET = os.environ.get("OBSERVATION_TOKEN_SECRET", None)
+if OBSERVATION_TOKEN_SECRET is None:
+    # the development secret is public, anyone could sign tokens with it
+    if IS_PROD or OBSERVATION_TOKEN_FORMAT == ObservationTokenFormats.SIGNED:
+        raise RuntimeError(
+            "OBSERVATION_TOKEN_SECRET must be set in production or when "
+            "OBSERVATION_TOKEN_FORMAT is signed."
+        )
+    OBSERVATION_TOKEN_SECRET = "triangler-development-token-secret"  # noqa: S105
+    logger.warning("OBSERVATION_TOKEN_SECRET not set, using a development secret")
+
+# set our QR code rendering parameters, rendered codes are kept in memory and
+# on disk keyed by (token, HOST_NAME, format, size)
+QR_CODE_BOX_SIZE = int(os.environ.get("QR_CODE_BOX_SIZE", "10"))
+QR_CODE_MAX_BOX_SIZE = int(os.environ.get("QR_CODE_MAX_BOX_SIZE", "40"))
+# "numpy" stamps module sprites in one vectorized pass, "pil" draws each
+# module with qrcode's StyledPilImage, both give the same picture
+QR_CODE_RASTERIZER = os.environ.get("QR_CODE_RASTERIZER", "numpy")
+QR_CODE_CACHE_SIZE = int(os.environ.get("QR_CODE_CACHE_SIZE", "1024"))
+QR_CODE_CACHE_DIR = os.environ.get(
+    "QR_CODE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "triangler-qr-codes")
+)
+
+# list routes are paginated, clients can ask for up to the maximum page size
+PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", "50"))
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", "500"))
+
+# rows fetched per round trip when streaming large results
+STREAMING_BATCH_SIZE = int(os.environ.get("STREAMING_BATCH_SIZE", "500"))
+
+# set our ballot sheet layout, A4 pages of columns x rows ballots
+BALLOT_SHEET_COLUMNS = int(os.environ.get("BALLOT_SHEET_COLUMNS", "3"))
+BALLOT_SHEET_ROWS = int(os.environ.get("BALLOT_SHEET_ROWS", "4"))
+BALLOT_SHEET_DPI = int(os.environ.get("BALLOT_SHEET_DPI", "150"))
+
+# set our statistics parameters
+SIGNIFICANCE_LEVEL = float(os.environ.get("SIGNIFICANCE_LEVEL", "0.05"))
+# panel sizes up to this bound are answered from precomputed binomial tables
+STATISTICS_TABLE_MAX_N = int(os.environ.get("STATISTICS_TABLE_MAX_N", "1000"))
+# width of the bayesian credible intervals
+CREDIBLE_INTERVAL_LEVEL = float(os.environ.get("CREDIBLE_INTERVAL_LEVEL", "0.95"))
+# memoized credible intervals, keyed by (correct, total, level)
+POSTERIOR_CACHE_SIZE = int(os.environ.get("POSTERIOR_CACHE_SIZE", "100000"))
+# memoized power curves kept for the sample size planner
+STATISTICS_POWER_CACHE_SIZE = int(os.environ.get("STATISTICS_POWER_CACHE_SIZE", "256"))
+# largest panel the sample size planner will search for
+PLANNING_MAX_N = int(os.environ.get("PLANNING_MAX_N", "10000"))
+
+# set our sequential (early stopping) test parameters, the running
+# log-likelihood ratio is stored so changing these needs a backfill
+SEQUENTIAL_ALPHA = float(os.environ.get("SEQUENTIAL_ALPHA", str(SIGNIFICANCE_LEVEL)))
+SEQUENTIAL_BETA = float(os.environ.get("SEQUENTIAL_BETA", "0.2"))
+SEQUENTIAL_DISCRIMINATOR_PROPORTION = float(
+    os.environ.get("SEQUENTIAL_DISCRIMINATOR_PROPORTION", "0.3")
+)
+
+# set our worker pool parameters
+WORKER_PROCESSES = int(
+    os.environ.get("WORKER_PROCESSES", str(min(4, os.cpu_count() or 1)))
+)
+
+# QR codes are rendered on a dedicated thread pool, requests beyond the queue
+# depth are turned away rather than left waiting
+QR_RENDER_THREADS = int(os.environ.get("QR_RENDER_THREADS", "2"))
+QR_RENDER_MAX_QUEUE_DEPTH = int(os.environ.get("QR_RENDER_MAX_QUEUE_DEPTH", "64"))
+# number of recent renders the latency stats are computed over
+QR_RENDER_STATS_WINDOW = int(os.environ.get("QR_RENDER_STATS_WINDOW", "1000"))
+
+# tokens submitted for redemption are checked against an in-process Bloom
+# filter of existing tokens before the database, it is rebuilt periodically to
+# drop deleted tokens. A worker's filter never sees the tokens another worker
+# creates, so it needs the app to run as a single uvicorn worker; with more
+# workers, WEB_CONCURRENCY or `uvicorn --workers`, every token goes on to the
+# database lookup
+TOKEN_FILTER_CAPACITY = int(os.environ.get("TOKEN_FILTER_CAPACITY", "100000"))
+TOKEN_FILTER_ERROR_RATE = float(os.environ.get("TOKEN_FILTER_ERROR_RATE", "0.001"))
+TOKEN_FILTER_REBUILD_SECONDS = float(
+    os.environ.get("TOKEN_FILTER_REBUILD_SECONDS", "3600")
+)
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+# expired tokens and the unanswered flights of closed experiments are purged in
+# the background, in batches of short transactions with a pause between them
+PURGE_ENABLED = env_bool("PURGE_ENABLED", default=True)
+PURGE_INTERVAL_SECONDS = float(os.environ.get("PURGE_INTERVAL_SECONDS", "3600"))
+PURGE_BATCH_SIZE = int(os.environ.get("PURGE_BATCH_SIZE", "500"))
+PURGE_BATCH_PAUSE_SECONDS = float(os.environ.get("PURGE_BATCH_PAUSE_SECONDS", "0.05"))
+
+# set our monte carlo simulation limits
+SIMULATION_MAX_SIMULATIONS = int(
+    os.environ.get("SIMULATION_MAX_SIMULATIONS", "1000000")
+)
+# simulated responses per request, the number of simulations times the panel size
+SIMULATION_MAX_RESPONSES = int(os.environ.get("SIMULATION_MAX_RESPONSES", "100000000"))
+# simulations per chunk, runs larger than one chunk are spread over processes
+SIMULATION_CHUNK_SIZE = int(os.environ.get("SIMULATION_CHUNK_SIZE", "100000"))
+SIMULATION_TIMEOUT_SECONDS = float(os.environ.get("SIMULATION_TIMEOUT_SECONDS", "30"))
@@ -2,11 +2,25 @@ from enum import Enum
 
 
 class SampleNames(str, Enum):
-    """Sample names for beer tasting."""
+    """Sample names for beer tasting.
+
+    Two-sample tests (duo-trio, 2-AFC) use A and B, triangle tests A to C and
+    tetrad tests A to D.
+    """
 
     A = "Sample A"
     B = "Sample B"
     C = "Sample C"
+    D = "Sample D"
+
+
+class DiscriminationTests(str, Enum):
+    """Sensory discrimination test protocols."""
+
+    TRIANGLE = "Triangle"
+    DUO_TRIO = "Duo-trio"
+    TETRAD = "Tetrad"
+    TWO_AFC = "2-AFC"
 
 
 class ExperienceLevels(str, Enum):
@@ -20,6 +34,56 @@ class ExperienceLevels(str, Enum):
     BJCP_RECOGNIZED_OR_HIGHER = "BJCP (Recognized or higher)"
 
 
+class ObservationTokenFormats(str, Enum):
+    """Formats of the tokens printed on ballots."""
+
+    RANDOM = "random"
+    SIGNED = "signed"
+
+
+class QRCodeFormats(str, Enum):
+    """Image formats QR codes are rendered to."""
+
+    SVG = "svg"
+    PNG = "png"
+
+
+class QRCodeRasterizers(str, Enum):
+    """Backends that draw PNG QR codes."""
+
+    NUMPY = "numpy"
+    PIL = "pil"
+
+
+class BallotSheetFormats(str, Enum):
+    """File formats ballot sheets are printed from."""
+
+    PDF = "pdf"
+    PNG = "png"
+
+
+class FlightDesigns(str, Enum):
+    """Ways the correct samples of a panel's sample flights are chosen."""
+
+    RANDOM = "random"
+    BALANCED = "balanced"
+
+
+class ExportFormats(str, Enum):
+    """Formats that list exports are streamed in."""
+
+    NDJSON = "ndjson"
+    JSON = "json"
+
+
+class SequentialDecisions(str, Enum):
+    """Outcomes of a sequential probability ratio test."""
+
+    CONTINUE = "Continue testing"
+    ACCEPT_ALTERNATIVE = "Difference detected"
+    ACCEPT_NULL = "No difference detected"
+
+
 def get_experience_level_description(level_id: int) -> str:
     """Get the experience level description from the level id."""
     for x in ExperienceLevels:
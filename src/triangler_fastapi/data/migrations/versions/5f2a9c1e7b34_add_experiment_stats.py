@@ -0,0 +1,68 @@
+"""Add experiment stats
+
+Revision ID: 5f2a9c1e7b34
+Revises: 83600e188204
+Create Date: 2026-10-18 09:12:41.518230+00:00
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5f2a9c1e7b34"
+down_revision: Union[str, None] = "83600e188204"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "experiment_stats",
+        sa.Column("experiment_id", sa.Integer(), nullable=False),
+        sa.Column("total_flights", sa.Integer(), nullable=False),
+        sa.Column("total_responses", sa.Integer(), nullable=False),
+        sa.Column("correct_responses", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["experiment_id"],
+            ["experiment.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("experiment_id"),
+    )
+    # backfill the counters for experiments that already have results
+    op.execute(
+        """
+        INSERT INTO experiment_stats (
+            experiment_id,
+            total_flights,
+            total_responses,
+            correct_responses,
+            updated_at
+        )
+        SELECT
+            experiment.id,
+            COUNT(DISTINCT sample_flight.id),
+            COUNT(response.id),
+            COALESCE(
+                SUM(
+                    CASE WHEN response.chosen_sample = sample_flight.correct_sample
+                    THEN 1 ELSE 0 END
+                ),
+                0
+            ),
+            CURRENT_TIMESTAMP
+        FROM experiment
+        LEFT JOIN sample_flight ON sample_flight.experiment_id = experiment.id
+        LEFT JOIN response ON response.sample_flight_id = sample_flight.id
+        GROUP BY experiment.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("experiment_stats")
@@ -0,0 +1,78 @@
+"""Add experiment stats log likelihood ratio
+
+Revision ID: a3d8e4b61c27
+Revises: 5f2a9c1e7b34
+Create Date: 2026-10-18 11:40:03.902114+00:00
+
+"""
+
+import math
+import os
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3d8e4b61c27"
+down_revision: Union[str, None] = "5f2a9c1e7b34"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "experiment_stats",
+        sa.Column(
+            "log_likelihood_ratio",
+            sa.Double(),
+            nullable=False,
+            server_default=sa.text("0"),
+        ),
+    )
+    # backfill the running statistic from the existing counters, every experiment
+    # is a triangle test at this revision, the SPRT steps per correct and
+    # incorrect response are computed here so the migration does not change with
+    # the app's statistics module
+    p0 = 1 / 3
+    discriminator_proportion = float(
+        os.environ.get("SEQUENTIAL_DISCRIMINATOR_PROPORTION", "0.3")
+    )
+    pc = p0 + discriminator_proportion * (1 - p0)
+    correct_step = math.log(pc / p0)
+    incorrect_step = math.log((1 - pc) / (1 - p0))
+    experiment_stats = sa.table(
+        "experiment_stats",
+        sa.column("experiment_id", sa.Integer()),
+        sa.column("total_responses", sa.Integer()),
+        sa.column("correct_responses", sa.Integer()),
+        sa.column("log_likelihood_ratio", sa.Double()),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(
+            experiment_stats.c.experiment_id,
+            experiment_stats.c.total_responses,
+            experiment_stats.c.correct_responses,
+        ).where(experiment_stats.c.total_responses > 0)
+    ).all()
+    if rows:
+        connection.execute(
+            experiment_stats.update()
+            .where(experiment_stats.c.experiment_id == sa.bindparam("id"))
+            .values(log_likelihood_ratio=sa.bindparam("llr")),
+            [
+                {
+                    "id": experiment_id,
+                    "llr": correct_responses * correct_step
+                    + (total_responses - correct_responses) * incorrect_step,
+                }
+                for experiment_id, total_responses, correct_responses in rows
+            ],
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("experiment_stats") as batch_op:
+        batch_op.drop_column("log_likelihood_ratio")
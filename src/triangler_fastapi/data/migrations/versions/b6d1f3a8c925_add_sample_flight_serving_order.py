@@ -0,0 +1,32 @@
+"""Add sample flight serving order
+
+Revision ID: b6d1f3a8c925
+Revises: e4b2f7a91d08
+Create Date: 2026-10-18 19:21:07.418052+00:00
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b6d1f3a8c925"
+down_revision: Union[str, None] = "e4b2f7a91d08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # flights from a balanced design record which product goes in each cup
+    with op.batch_alter_table("sample_flight") as batch_op:
+        batch_op.add_column(
+            sa.Column("serving_order", sa.String(length=4), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sample_flight") as batch_op:
+        batch_op.drop_column("serving_order")
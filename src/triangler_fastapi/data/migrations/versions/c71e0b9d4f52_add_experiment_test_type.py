@@ -0,0 +1,47 @@
+"""Add experiment test type
+
+Revision ID: c71e0b9d4f52
+Revises: a3d8e4b61c27
+Create Date: 2026-10-18 14:05:27.310448+00:00
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c71e0b9d4f52"
+down_revision: Union[str, None] = "a3d8e4b61c27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+discrimination_tests = sa.Enum(
+    "TRIANGLE", "DUO_TRIO", "TETRAD", "TWO_AFC", name="discriminationtests"
+)
+
+
+def upgrade() -> None:
+    # existing experiments are all triangle tests
+    discrimination_tests.create(op.get_bind(), checkfirst=True)
+    op.add_column(
+        "experiment",
+        sa.Column(
+            "test_type",
+            discrimination_tests,
+            nullable=False,
+            server_default="TRIANGLE",
+        ),
+    )
+    # tetrad tests have a fourth sample
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE samplenames ADD VALUE IF NOT EXISTS 'D'")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("experiment") as batch_op:
+        batch_op.drop_column("test_type")
+    discrimination_tests.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,49 @@
+"""Make response sample flight unique
+
+Revision ID: d9e5c2a7f813
+Revises: b6d1f3a8c925
+Create Date: 2026-10-18 21:04:52.118306+00:00
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d9e5c2a7f813"
+down_revision: Union[str, None] = "b6d1f3a8c925"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # a flight answered twice would be counted twice, those have to be resolved
+    # by hand before the constraint can be added
+    duplicates = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT sample_flight_id FROM response "
+                "GROUP BY sample_flight_id HAVING COUNT(*) > 1"
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if duplicates:
+        raise RuntimeError(
+            f"Sample flights {duplicates} have more than one response, keep one "
+            "response for each before upgrading."
+        )
+    with op.batch_alter_table("response") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_response_sample_flight_id", ["sample_flight_id"]
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("response") as batch_op:
+        batch_op.drop_constraint("uq_response_sample_flight_id", type_="unique")
@@ -0,0 +1,31 @@
+"""Make token response optional
+
+Revision ID: e4b2f7a91d08
+Revises: c71e0b9d4f52
+Create Date: 2026-10-18 17:02:44.186305+00:00
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b2f7a91d08"
+down_revision: Union[str, None] = "c71e0b9d4f52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # tokens are printed on ballots before anyone has answered them
+    with op.batch_alter_table("sample_flight_token") as batch_op:
+        batch_op.alter_column("response_id", existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM sample_flight_token WHERE response_id IS NULL")
+    with op.batch_alter_table("sample_flight_token") as batch_op:
+        batch_op.alter_column("response_id", existing_type=sa.Integer(), nullable=False)
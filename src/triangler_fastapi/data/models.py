@@ -7,10 +7,15 @@ from sqlalchemy import DateTime
 from sqlalchemy import Enum
 from sqlalchemy import ForeignKey
 from sqlalchemy import String
+from sqlalchemy import UniqueConstraint
+from sqlalchemy import select
+from sqlalchemy import text
 from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import column_property
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
 
+from triangler_fastapi.constants import DiscriminationTests
 from triangler_fastapi.constants import ExperienceLevels
 from triangler_fastapi.constants import SampleNames
 from triangler_fastapi.data.persistence import Base
@@ -37,20 +42,69 @@ class Experiment(TrianglerBaseModel):
     description: Mapped[str] = mapped_column()
     start_on: Mapped[date] = mapped_column()
     end_on: Mapped[date] = mapped_column()
+    test_type: Mapped[Enum] = mapped_column(
+        Enum(DiscriminationTests),
+        default=DiscriminationTests.TRIANGLE,
+        server_default=DiscriminationTests.TRIANGLE.name,
+    )
     sample_flights: Mapped[list["SampleFlight"]] = relationship(
         back_populates="experiment", lazy="raise"
     )
+    stats: Mapped["ExperimentStats"] = relationship(
+        back_populates="experiment", lazy="raise"
+    )
 
     def __repr__(self: Self) -> str:
         return f"{self.__tablename__}(id={self.id!r}, name={self.name!r})"
 
 
+class ExperimentStats(Base):  # pyright: ignore[reportUntypedBaseClass, reportGeneralTypeIssues]
+    """Result counters for an experiment, kept current as flights and responses
+    are written so that reading a result is a single primary-key lookup."""
+
+    __tablename__ = "experiment_stats"
+
+    experiment_id: Mapped[int] = mapped_column(
+        ForeignKey("experiment.id", ondelete="CASCADE"), primary_key=True
+    )
+    total_flights: Mapped[int] = mapped_column(default=0)
+    total_responses: Mapped[int] = mapped_column(default=0)
+    correct_responses: Mapped[int] = mapped_column(default=0)
+    # running SPRT statistic, see `domain.statistics.log_likelihood_ratio`
+    log_likelihood_ratio: Mapped[float] = mapped_column(
+        default=0.0, server_default=text("0")
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        default=datetime_utils.utcnow, onupdate=datetime_utils.utcnow
+    )
+    experiment: Mapped["Experiment"] = relationship(
+        back_populates="stats", lazy="raise"
+    )
+    # the chance probability of the counters depends on the test type
+    test_type: Mapped[Enum] = column_property(
+        select(Experiment.test_type)
+        .where(Experiment.id == experiment_id)
+        .scalar_subquery()
+    )
+
+    def __repr__(self: Self) -> str:
+        return (
+            f"{self.__tablename__}("
+            f"experiment_id={self.experiment_id!r}, "
+            f"total_responses={self.total_responses!r}, "
+            f"correct_responses={self.correct_responses!r}"
+            ")"
+        )
+
+
 class SampleFlight(TrianglerBaseModel):
     __tablename__ = "sample_flight"
     __mapper_args__: ClassVar = {"eager_defaults": True}
 
     correct_sample: Mapped[Enum] = mapped_column(Enum(SampleNames))
     experiment_id: Mapped[int] = mapped_column(ForeignKey("experiment.id"))
+    # the product served in each cup, see `domain.designs`
+    serving_order: Mapped[str | None] = mapped_column(String(length=4))
     experiment: Mapped["Experiment"] = relationship(
         back_populates="sample_flights", lazy="raise"
     )
@@ -73,6 +127,10 @@ class SampleFlight(TrianglerBaseModel):
 class Response(TrianglerBaseModel):
     __tablename__ = "response"
     __mapper_args__: ClassVar = {"eager_defaults": True}
+    # a sample flight is answered at most once
+    __table_args__ = (
+        UniqueConstraint("sample_flight_id", name="uq_response_sample_flight_id"),
+    )
 
     experience_level: Mapped[Enum] = mapped_column(Enum(ExperienceLevels))
     chosen_sample: Mapped[Enum] = mapped_column(Enum(SampleNames))
@@ -94,7 +152,8 @@ class SampleFlightToken(TrianglerBaseModel):
 
     token: Mapped[str] = mapped_column(String(length=32), unique=True, index=True)
     expiry_date: Mapped[datetime] = mapped_column(DateTime)
-    response_id: Mapped[int] = mapped_column(ForeignKey("response.id"))
+    # set once the ballot has been answered
+    response_id: Mapped[int | None] = mapped_column(ForeignKey("response.id"))
     response: Mapped["Response"] = relationship(back_populates="token", lazy="raise")
     sample_flight_id: Mapped[int] = mapped_column(ForeignKey("sample_flight.id"))
     sample_flight: Mapped["SampleFlight"] = relationship(
@@ -0,0 +1,178 @@
+"""Printable ballot sheets of observation token QR codes.
+
+A sheet is a page of ``columns x rows`` ballots, each a QR code with a label
+underneath. Sheets are rendered independently, so a print run can be spread
+over worker processes, and the rendering functions here are module level so
+that they can be pickled for a process pool.
+
+PDF output is written page by page with ``PdfStreamWriter`` rather than by
+Pillow's PDF plugin, which needs every page up front, so that a print run can
+be streamed to the client as its pages finish rendering.
+"""
+
+import io
+import zlib
+from collections.abc import Sequence
+from typing import Self
+
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFont
+
+from triangler_fastapi import config
+from triangler_fastapi.constants import QRCodeFormats
+from triangler_fastapi.domain import qr_cache
+
+# A4 portrait at the sheet resolution
+SHEET_WIDTH_INCHES = 8.27
+SHEET_HEIGHT_INCHES = 11.69
+
+# (token, label) of one ballot
+Ballot = tuple[str, str]
+
+
+def _sheet_size(dpi: int) -> tuple[int, int]:
+    return round(SHEET_WIDTH_INCHES * dpi), round(SHEET_HEIGHT_INCHES * dpi)
+
+
+def render_sheet(
+    ballots: Sequence[Ballot],
+    columns: int = config.BALLOT_SHEET_COLUMNS,
+    rows: int = config.BALLOT_SHEET_ROWS,
+    dpi: int = config.BALLOT_SHEET_DPI,
+) -> Image.Image:
+    """Lays out up to ``columns * rows`` ballots on a white greyscale page."""
+    if len(ballots) > columns * rows:
+        raise ValueError("Too many ballots for one sheet.")
+    width, height = _sheet_size(dpi)
+    margin = dpi // 2
+    cell_width = (width - 2 * margin) // columns
+    cell_height = (height - 2 * margin) // rows
+    font_size = max(dpi // 8, 8)
+    qr_size = min(cell_width, cell_height - 2 * font_size) - font_size
+
+    sheet = Image.new("L", (width, height), color=255)
+    draw = ImageDraw.Draw(sheet)
+    font = ImageFont.load_default(size=font_size)
+    for i, (token, label) in enumerate(ballots):
+        left = margin + (i % columns) * cell_width
+        top = margin + (i // columns) * cell_height
+        # reuse codes already rendered for viewing or an earlier print run
+        png = qr_cache.get_qr_code(token, QRCodeFormats.PNG)
+        with Image.open(io.BytesIO(png)) as qr:
+            code = qr.convert("L").resize(
+                (qr_size, qr_size), resample=Image.Resampling.NEAREST
+            )
+        sheet.paste(code, (left + (cell_width - qr_size) // 2, top))
+        draw.text(
+            (left + cell_width // 2, top + qr_size + font_size // 2),
+            label,
+            fill=0,
+            font=font,
+            anchor="mt",
+        )
+    return sheet
+
+
+def render_sheet_png(
+    ballots: Sequence[Ballot],
+    columns: int = config.BALLOT_SHEET_COLUMNS,
+    rows: int = config.BALLOT_SHEET_ROWS,
+    dpi: int = config.BALLOT_SHEET_DPI,
+) -> bytes:
+    """Renders a sheet to the bytes of a PNG file."""
+    buffer = io.BytesIO()
+    render_sheet(ballots, columns=columns, rows=rows, dpi=dpi).save(
+        buffer, format="PNG", dpi=(dpi, dpi)
+    )
+    return buffer.getvalue()
+
+
+def render_sheet_pixels(
+    ballots: Sequence[Ballot],
+    columns: int = config.BALLOT_SHEET_COLUMNS,
+    rows: int = config.BALLOT_SHEET_ROWS,
+    dpi: int = config.BALLOT_SHEET_DPI,
+) -> tuple[int, int, bytes]:
+    """Renders a sheet to ``(width, height, deflated 8-bit grey pixels)``.
+
+    This is the image data of a PDF page, so the compression is done by the
+    worker rendering the sheet rather than by the process writing the PDF.
+    """
+    sheet = render_sheet(ballots, columns=columns, rows=rows, dpi=dpi)
+    return sheet.width, sheet.height, zlib.compress(sheet.tobytes())
+
+
+class PdfStreamWriter:
+    """Writes a PDF of full-page greyscale images one page at a time.
+
+    Object 1 is the catalog and object 2 the page tree, which is written last
+    once every page is known. Each page takes three objects: the page, its
+    content stream and its image.
+    """
+
+    def __init__(self: Self, dpi: int = config.BALLOT_SHEET_DPI) -> None:
+        self.dpi = dpi
+        self._offset = 0
+        self._offsets: dict[int, int] = {}
+        self._pages: list[int] = []
+
+    def _object(self: Self, number: int, body: bytes) -> bytes:
+        self._offsets[number] = self._offset
+        content = b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        self._offset += len(content)
+        return content
+
+    def _stream(self: Self, number: int, header: bytes, data: bytes) -> bytes:
+        body = b"<< " + header + b" /Length %d >>\nstream\n" % len(data)
+        return self._object(number, body + data + b"\nendstream")
+
+    def start(self: Self) -> bytes:
+        """The file header."""
+        content = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self._offset += len(content)
+        return content
+
+    def add_page(self: Self, width: int, height: int, pixels: bytes) -> bytes:
+        """A page showing deflated greyscale ``pixels`` across the whole page."""
+        page = 3 + 3 * len(self._pages)
+        contents, image = page + 1, page + 2
+        self._pages.append(page)
+        # PDF units are points, 72 to the inch
+        page_width = width * 72 / self.dpi
+        page_height = height * 72 / self.dpi
+        drawing = b"q %.2f 0 0 %.2f 0 0 cm /Im0 Do Q" % (page_width, page_height)
+        return (
+            self._object(
+                page,
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+                b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+                % (page_width, page_height, image, contents),
+            )
+            + self._stream(contents, b"", drawing)
+            + self._stream(
+                image,
+                b"/Type /XObject /Subtype /Image /Width %d /Height %d "
+                b"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode"
+                % (width, height),
+                pixels,
+            )
+        )
+
+    def finish(self: Self) -> bytes:
+        """The page tree, catalog and cross-reference table."""
+        kids = b" ".join(b"%d 0 R" % x for x in self._pages)
+        content = self._object(
+            2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages))
+        )
+        content += self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self._offset
+        size = max(self._offsets) + 1
+        xref = b"xref\n0 %d\n0000000000 65535 f \n" % size
+        for number in range(1, size):
+            xref += b"%010d 00000 n \n" % self._offsets[number]
+        trailer = b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            size,
+            xref_offset,
+        )
+        return content + xref + trailer
@@ -0,0 +1,85 @@
+import hashlib
+import math
+import threading
+from collections.abc import Iterable
+from typing import Self
+
+import numpy as np
+import numpy.typing as npt
+
+_UINT64_MASK = 2**64 - 1
+
+
+def _hash_pair(item: str) -> tuple[int, int]:
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    # an odd step visits every bit position before repeating
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(
+        digest[8:], "little"
+    ) | 1
+
+
+class BloomFilter:
+    """A thread-safe set of strings that can answer "definitely not present".
+
+    Membership tests have no false negatives, and false positives at about
+    ``error_rate`` while no more than ``capacity`` items have been added. Items
+    can't be removed. Bit positions are derived from one BLAKE2b digest per item
+    by double hashing.
+    """
+
+    def __init__(self: Self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.bit_count = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.item_count = 0
+        self._bits = np.zeros(-(-self.bit_count // 8), dtype=np.uint8)
+        self._lock = threading.Lock()
+
+    def _positions(self: Self, item: str) -> list[int]:
+        h1, h2 = _hash_pair(item)
+        return [
+            ((h1 + i * h2) & _UINT64_MASK) % self.bit_count
+            for i in range(self.hash_count)
+        ]
+
+    def _positions_many(self: Self, items: list[str]) -> npt.NDArray[np.uint64]:
+        pairs = np.array([_hash_pair(x) for x in items], dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        # uint64 arithmetic wraps like the masking in `_positions`
+        return (pairs[:, :1] + steps * pairs[:, 1:]) % np.uint64(self.bit_count)
+
+    def __contains__(self: Self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[x >> 3] >> (x & 7) & 1 for x in self._positions(item))
+
+    def add(self: Self, item: str) -> None:
+        positions = self._positions(item)
+        with self._lock:
+            for x in positions:
+                self._bits[x >> 3] |= 1 << (x & 7)
+            self.item_count += 1
+
+    def update(self: Self, items: Iterable[str]) -> None:
+        """Adds many items, hashing them all in one vectorized pass."""
+        items = list(items)
+        if not items:
+            return
+        positions = self._positions_many(items).ravel()
+        with self._lock:
+            np.bitwise_or.at(
+                self._bits,
+                positions >> np.uint64(3),
+                np.left_shift(1, positions & np.uint64(7)).astype(np.uint8),
+            )
+            self.item_count += len(items)
+
+    @property
+    def memory_bytes(self: Self) -> int:
+        return self._bits.nbytes
+
+    @property
+    def false_positive_rate(self: Self) -> float:
+        """The chance that an absent item tests as present, from the fraction of
+        bits that are set."""
+        fill = np.unpackbits(self._bits)[: self.bit_count].mean()
+        return float(fill**self.hash_count)
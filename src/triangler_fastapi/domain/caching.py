@@ -0,0 +1,51 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic
+from typing import Self
+from typing import TypeVar
+
+Key = TypeVar("Key", bound=Hashable)
+Value = TypeVar("Value")
+
+
+class LRUCache(Generic[Key, Value]):
+    """A thread-safe mapping that evicts the least recently used entry when full."""
+
+    def __init__(self: Self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Key, Value] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self: Self) -> int:
+        return len(self._data)
+
+    def get(self: Self, key: Key) -> Value | None:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self: Self, key: Key, value: Value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self: Self, key: Key) -> Value | None:
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self: Self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,52 @@
+"""Serving designs for panels of sample flights.
+
+A triangle flight serves three cups, two of one product and one of the other.
+With the products labelled X and Y there are six serving orders, and a panel is
+balanced when each order is served equally often, so neither the odd cup's
+position nor which product is odd favours a result.
+
+Balanced designs are built from blocks of six flights, each block a random
+permutation of all six orders, like the rows of a Latin square. A panel that is
+not a multiple of six ends with a partial block of distinct orders.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+from triangler_fastapi.constants import DiscriminationTests
+
+# the samples a taster is served in each test, the correct sample is one of them
+SAMPLE_NAMES = {
+    DiscriminationTests.TRIANGLE: ("A", "B", "C"),
+    DiscriminationTests.DUO_TRIO: ("A", "B"),
+    DiscriminationTests.TETRAD: ("A", "B", "C", "D"),
+    DiscriminationTests.TWO_AFC: ("A", "B"),
+}
+
+SERVING_ORDERS = ("XXY", "XYX", "YXX", "XYY", "YXY", "YYX")
+# the cup holding the odd product in each serving order
+ODD_SAMPLES = ("C", "B", "A", "A", "B", "C")
+
+_SERVING_ORDERS = np.array(SERVING_ORDERS)
+_ODD_SAMPLES = np.array(ODD_SAMPLES)
+
+
+def sample_names(test_type: DiscriminationTests) -> tuple[str, ...]:
+    """The names of the samples served in a test of ``test_type``."""
+    return SAMPLE_NAMES[test_type]
+
+
+def balanced_triangle_design(
+    panel_size: int, rng: np.random.Generator | None = None
+) -> tuple[npt.NDArray[np.str_], npt.NDArray[np.str_]]:
+    """Draws a balanced, randomized design for a triangle panel.
+
+    Returns the serving order and the correct (odd) sample of each flight.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    block_size = len(SERVING_ORDERS)
+    block_count = -(-panel_size // block_size)
+    blocks = np.tile(np.arange(block_size), (block_count, 1))
+    design = rng.permuted(blocks, axis=1).ravel()[:panel_size]
+    return _SERVING_ORDERS[design], _ODD_SAMPLES[design]
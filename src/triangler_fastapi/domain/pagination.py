@@ -0,0 +1,32 @@
+"""Opaque cursors for keyset pagination.
+
+Lists are served newest first, ordered by descending id, and a page starts
+after the id of the last row of the previous page. That is a primary-key range
+scan however deep the page, unlike ``OFFSET`` which reads and discards every
+row before it. The cursor is the unpadded URL-safe base64 of that id, so that
+clients treat it as opaque.
+"""
+
+import base64
+import binascii
+import struct
+
+from triangler_fastapi.exceptions import errors
+
+_CURSOR = struct.Struct(">Q")
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(_CURSOR.pack(last_id)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Gets the last id of the previous page, raises `InvalidCursorError` for a
+    cursor that was not made by `encode_cursor`."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise errors.InvalidCursorError("Page cursor is malformed.") from e
+    if len(data) != _CURSOR.size or encode_cursor(_CURSOR.unpack(data)[0]) != cursor:
+        raise errors.InvalidCursorError("Page cursor is malformed.")
+    return _CURSOR.unpack(data)[0]
@@ -0,0 +1,120 @@
+"""Render cache for token QR codes.
+
+Rendering a QR code with high error correction and rounded modules is slow, and
+the same codes are viewed and reprinted many times. Rendered images are keyed by
+``(token, HOST_NAME, format, size)``, since the host name is encoded in the URL,
+and kept in two tiers: a bounded in-memory LRU of bytes in front of a directory
+of pre-rendered files named by the hash of the key. Files are written to a
+temporary name and renamed into place so readers never see a partial image.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from triangler_fastapi import config
+from triangler_fastapi.constants import QRCodeFormats
+from triangler_fastapi.domain import token_utils
+from triangler_fastapi.domain.caching import LRUCache
+
+MEDIA_TYPES = {
+    QRCodeFormats.SVG: "image/svg+xml",
+    QRCodeFormats.PNG: "image/png",
+}
+
+QRCodeKey = tuple[str, str, QRCodeFormats, int]
+
+_memory_cache: LRUCache[QRCodeKey, bytes] = LRUCache(maxsize=config.QR_CODE_CACHE_SIZE)
+
+
+def _key(token: str, qr_format: QRCodeFormats, size: int) -> QRCodeKey:
+    return (token, config.HOST_NAME, qr_format, size)
+
+
+def _path(key: QRCodeKey) -> Path:
+    token, host_name, qr_format, size = key
+    digest = hashlib.sha256(
+        f"{token}\0{host_name}\0{qr_format.value}\0{size}".encode()
+    ).hexdigest()
+    # fan out over subdirectories to keep directory listings short
+    return Path(config.QR_CODE_CACHE_DIR, digest[:2], f"{digest}.{qr_format.value}")
+
+
+def _write(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def get_rendered_qr_code(
+    token: str,
+    qr_format: QRCodeFormats = QRCodeFormats.SVG,
+    size: int = config.QR_CODE_BOX_SIZE,
+) -> bytes | None:
+    """Gets a QR code only if it is already in memory, without any I/O."""
+    return _memory_cache.get(_key(token, qr_format, size))
+
+
+def get_rendered_qr_code_path(
+    token: str,
+    qr_format: QRCodeFormats = QRCodeFormats.SVG,
+    size: int = config.QR_CODE_BOX_SIZE,
+) -> Path | None:
+    """Gets the path of a QR code file only if it has already been rendered."""
+    path = _path(_key(token, qr_format, size))
+    return path if path.exists() else None
+
+
+def get_qr_code_path(
+    token: str,
+    qr_format: QRCodeFormats = QRCodeFormats.SVG,
+    size: int = config.QR_CODE_BOX_SIZE,
+) -> Path:
+    """Gets the path of a pre-rendered QR code file, rendering it if needed.
+
+    The file can be served directly, e.g. with ``sendfile``.
+    """
+    key = _key(token, qr_format, size)
+    path = _path(key)
+    if not path.exists():
+        content = _memory_cache.get(key)
+        if content is None:
+            content = token_utils.render_qr_code(token, qr_format, size=size)
+            _memory_cache.put(key, content)
+        _write(path, content)
+    return path
+
+
+def get_qr_code(
+    token: str,
+    qr_format: QRCodeFormats = QRCodeFormats.SVG,
+    size: int = config.QR_CODE_BOX_SIZE,
+) -> bytes:
+    """Gets the rendered QR code of a token from memory, disk or a fresh render."""
+    key = _key(token, qr_format, size)
+    content = _memory_cache.get(key)
+    if content is not None:
+        return content
+    path = _path(key)
+    try:
+        content = path.read_bytes()
+    except FileNotFoundError:
+        content = token_utils.render_qr_code(token, qr_format, size=size)
+        _write(path, content)
+    _memory_cache.put(key, content)
+    return content
+
+
+def discard_qr_codes(token: str, size: int = config.QR_CODE_BOX_SIZE) -> None:
+    """Removes the cached QR codes of a token, e.g. once it has expired."""
+    for qr_format in QRCodeFormats:
+        key = _key(token, qr_format, size)
+        _memory_cache.pop(key)
+        _path(key).unlink(missing_ok=True)
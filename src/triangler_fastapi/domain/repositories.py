@@ -1,14 +1,45 @@
+from collections import Counter
+from collections.abc import Collection
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from collections.abc import Sequence
+from datetime import date
+from datetime import datetime
+from typing import Any
+from typing import ClassVar
 from typing import Generic
 from typing import Self
 from typing import TypeVar
 
 from sqlalchemy import ColumnElement
+from sqlalchemy import Row
+from sqlalchemy import Select
+from sqlalchemy import delete
+from sqlalchemy import event
+from sqlalchemy import exists
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import inspect
 from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
+from sqlalchemy.orm import SessionTransaction
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
 
+from triangler_fastapi import config
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.constants import ExperienceLevels
 from triangler_fastapi.data import auth_models
 from triangler_fastapi.data import models
 from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import statistics
+from triangler_fastapi.domain import token_filter
+from triangler_fastapi.domain import token_utils
 from triangler_fastapi.domain.auth import schemas as auth_schemas
 
 SchemaIn = TypeVar("SchemaIn", bound=schemas.TrianglerBaseInSchema)
@@ -17,6 +48,13 @@ DataModel = TypeVar("DataModel", bound=models.TrianglerBaseModel)
 
 
 class Repository(Generic[DataModel, SchemaIn, SchemaOut]):
+    # relationships that `schema_out` reads, these are `lazy="raise"` on the
+    # models so they have to be loaded up front
+    eager_relationships: ClassVar[tuple[str, ...]] = ()
+    # whether `bulk_update` only writes the fields each item was sent with,
+    # rather than every field of the update schema
+    partial_bulk_updates: ClassVar[bool] = False
+
     def __init__(
         self: Self,
         session: Session,
@@ -29,65 +67,984 @@ class Repository(Generic[DataModel, SchemaIn, SchemaOut]):
         self.schema_in = schema_in
         self.schema_out = schema_out
 
+    @property
+    def _load_options(self: Self) -> list[LoaderOption]:
+        return [
+            selectinload(getattr(self.data_model, x)) for x in self.eager_relationships
+        ]
+
+    def _select(self: Self) -> Select[tuple[DataModel]]:
+        return select(self.data_model).options(*self._load_options)
+
+    def _to_schema(self: Self, result: DataModel) -> SchemaOut:
+        if self.eager_relationships:
+            self.session.refresh(result, attribute_names=self.eager_relationships)
+        return self.schema_out.model_validate(result)
+
+    def _after_create(self: Self, result: DataModel) -> None:
+        """Hook run after a new row is flushed, in the same transaction."""
+
+    def _before_update(self: Self, result: DataModel) -> None:
+        """Hook run before a row is modified, in the same transaction."""
+
+    def _after_update(self: Self, result: DataModel) -> None:
+        """Hook run after a modified row is flushed, in the same transaction."""
+
+    def _before_delete(self: Self, result: DataModel) -> None:
+        """Hook run before a row is deleted, in the same transaction."""
+
+    # the bulk hooks run the row hooks on each row, override them where the
+    # work can be done for the whole batch at once
+
+    def _after_bulk_create(self: Self, results: Sequence[DataModel]) -> None:
+        """Hook run after `bulk_create` inserts its rows, in the same transaction."""
+        for result in results:
+            self._after_create(result)
+
+    def _before_bulk_update(self: Self, results: Sequence[DataModel]) -> None:
+        """Hook run before `bulk_update` modifies its rows, in the same transaction."""
+        for result in results:
+            self._before_update(result)
+
+    def _after_bulk_update(self: Self, results: Sequence[DataModel]) -> None:
+        """Hook run after `bulk_update` modifies its rows, in the same transaction."""
+        for result in results:
+            self._after_update(result)
+
+    def _before_bulk_delete(self: Self, results: Sequence[DataModel]) -> None:
+        """Hook run before `bulk_delete` deletes its rows, in the same transaction."""
+        for result in results:
+            self._before_delete(result)
+
+    def _column_values(
+        self: Self, data: schemas.TrianglerBaseSchema, *, sent_only: bool = False
+    ) -> dict[str, Any]:
+        """The fields of ``data`` that are columns of the table, leaving out
+        relationships such as a sample flight's response, and with ``sent_only``
+        the fields that were not sent or sent as null."""
+        columns = inspect(self.data_model).column_attrs.keys()
+        values = data.model_dump(exclude_unset=sent_only, exclude_none=sent_only)
+        return {k: v for k, v in values.items() if k in columns}
+
+    def _get_many(
+        self: Self, ids: Collection[int], *filters: ColumnElement[bool]
+    ) -> Sequence[DataModel]:
+        """Gets the rows with ``ids`` in one query, raises `NoResultFound` if
+        any of them does not exist or is excluded by ``filters``."""
+        results = self.session.scalars(
+            select(self.data_model).where(self.data_model.id.in_(ids), *filters)
+        ).all()
+        missing = set(ids).difference(x.id for x in results)
+        if missing:
+            raise NoResultFound(
+                f"No {self.data_model.__tablename__} with ids {sorted(missing)}."
+            )
+        return results
+
+    def _get_schemas(self: Self, ids: Collection[int]) -> list[SchemaOut]:
+        statement = (
+            self._select()
+            .where(self.data_model.id.in_(ids))
+            .order_by(self.data_model.id)
+        )
+        return [
+            self.schema_out.model_validate(x) for x in self.session.scalars(statement)
+        ]
+
     def get_all(self: Self) -> list[SchemaOut]:
         results = [
             self.schema_out.model_validate(x)
-            for x in self.session.scalars(select(self.data_model))
+            for x in self.session.scalars(self._select())
         ]
         return results
 
     def get_by_id(self: Self, id: int) -> SchemaOut:
-        result = self.session.get_one(self.data_model, id)
+        result = self.session.get_one(self.data_model, id, options=self._load_options)
         result_schema = self.schema_out.model_validate(result)
         return result_schema
 
     def filter(self: Self, *filters: ColumnElement[bool]) -> list[SchemaOut]:
         results = [
             self.schema_out.model_validate(x)
-            for x in self.session.scalars(select(self.data_model).filter(*filters))
+            for x in self.session.scalars(self._select().filter(*filters))
         ]
         return results
 
+    def iter_all(
+        self: Self,
+        *filters: ColumnElement[bool],
+        batch_size: int = config.STREAMING_BATCH_SIZE,
+    ) -> Iterator[SchemaOut]:
+        """Iterates over the matching rows in id order, fetching and validating
+        ``batch_size`` rows at a time so memory does not grow with the table."""
+        statement = (
+            self._select()
+            .filter(*filters)
+            .order_by(self.data_model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for result in self.session.scalars(statement):
+            yield self.schema_out.model_validate(result)
+
+    def get_page(
+        self: Self,
+        *filters: ColumnElement[bool],
+        limit: int = config.PAGE_SIZE_DEFAULT,
+        after_id: int | None = None,
+    ) -> tuple[list[SchemaOut], int | None]:
+        """Gets up to ``limit`` rows, newest first, starting after ``after_id``.
+
+        Returns the rows and the id to start the next page after, or ``None``
+        on the last page. Pages are keyed on the primary key, so a deep page
+        costs no more than the first.
+        """
+        statement = self._select().filter(*filters)
+        if after_id is not None:
+            statement = statement.filter(self.data_model.id < after_id)
+        rows = self.session.scalars(
+            statement.order_by(self.data_model.id.desc()).limit(limit + 1)
+        ).all()
+        results = [self.schema_out.model_validate(x) for x in rows[:limit]]
+        next_id = rows[limit - 1].id if len(rows) > limit else None
+        return results, next_id
+
     def create(self: Self, data: SchemaIn) -> SchemaOut:
         new_data = self.data_model(**data.model_dump())
         self.session.add(new_data)
+        self.session.flush()
+        self._after_create(new_data)
         self.session.commit()
-        result_schema = self.schema_out.model_validate(new_data)
+        result_schema = self._to_schema(new_data)
         return result_schema
 
     def update(self: Self, data: SchemaOut) -> SchemaOut:
         result = self.session.get_one(self.data_model, data.id)
+        self._before_update(result)
         for key, value in data.model_dump().items():  # pyright: ignore[reportAny]
             setattr(result, key, value)
         self.session.add(result)
+        self.session.flush()
+        self._after_update(result)
         self.session.commit()
-        result_schema = self.schema_out.model_validate(result)
+        result_schema = self._to_schema(result)
         return result_schema
 
     def delete(self: Self, id: int) -> bool:
         result = self.session.get_one(self.data_model, id)
+        self._before_delete(result)
         self.session.delete(result)
         self.session.commit()
         return True
 
+    def get_missing_ids(
+        self: Self, ids: Collection[int], *filters: ColumnElement[bool]
+    ) -> set[int]:
+        """The ``ids`` without a row, or whose row is excluded by ``filters``."""
+        found = self.session.scalars(
+            select(self.data_model.id).where(self.data_model.id.in_(ids), *filters)
+        )
+        return set(ids).difference(found)
 
-ExperimentRepository = Repository[
-    models.Experiment, schemas.ExperimentInSchema, schemas.ExperimentOutSchema
-]
+    def bulk_create(self: Self, data: Sequence[SchemaIn]) -> list[SchemaOut]:
+        """Creates many rows with one multi-row ``INSERT ... RETURNING`` and
+        commits them together.
 
-SampleFlightRepository = Repository[
-    models.SampleFlight, schemas.SampleFlightInSchema, schemas.SampleFlightOutSchema
-]
+        Returns the new rows in id order, which is the order of ``data``
+        wherever ids are assigned in insert order, e.g. SQLite and PostgreSQL
+        sequences.
+        """
+        if not data:
+            return []
+        results = self.session.scalars(
+            insert(self.data_model).returning(self.data_model),
+            [self._column_values(x) for x in data],
+        ).all()
+        self._after_bulk_create(results)
+        self.session.commit()
+        return self._get_schemas([x.id for x in results])
 
-ResponseRepository = Repository[
-    models.Response, schemas.ResponseInSchema, schemas.ResponseOutSchema
-]
+    def bulk_update(
+        self: Self,
+        data: Sequence[schemas.JustIdSchema],
+        *filters: ColumnElement[bool],
+    ) -> list[SchemaOut]:
+        """Updates many rows by id in one transaction and commits them together.
+
+        The columns present in each item of ``data`` are written with a single
+        executemany ``UPDATE ... WHERE id = ?``. Raises `NoResultFound`, before
+        anything is changed, if any id does not exist or is excluded by
+        ``filters``. Returns the updated rows in id order.
+        """
+        if not data:
+            return []
+        ids = [x.id for x in data]
+        results = self._get_many(ids, *filters)
+        self._before_bulk_update(results)
+        self.session.execute(
+            update(self.data_model),
+            [self._column_values(x, sent_only=self.partial_bulk_updates) for x in data],
+        )
+        results = self.session.scalars(
+            select(self.data_model)
+            .where(self.data_model.id.in_(ids))
+            .execution_options(populate_existing=True)
+        ).all()
+        self._after_bulk_update(results)
+        self.session.commit()
+        return self._get_schemas(ids)
+
+    def bulk_delete(
+        self: Self, ids: Collection[int], *filters: ColumnElement[bool]
+    ) -> int:
+        """Deletes many rows by id with one ``DELETE ... WHERE id IN`` and
+        commits.
+
+        Raises `NoResultFound`, before anything is deleted, if any id does not
+        exist or is excluded by ``filters``. Returns the number of rows deleted.
+        """
+        if not ids:
+            return 0
+        results = self._get_many(ids, *filters)
+        self._before_bulk_delete(results)
+        self.session.execute(delete(self.data_model).where(self.data_model.id.in_(ids)))
+        self.session.commit()
+        return len(results)
+
+
+def _add_to_token_filter_on_commit(session: Session, tokens: Iterable[str]) -> None:
+    """Adds ``tokens`` to the token filter once ``session`` commits, tokens of a
+    transaction that is rolled back never reach it."""
+    session.info.setdefault("new_tokens", []).extend(tokens)
+
+
+@event.listens_for(Session, "after_commit")
+def _add_committed_tokens(session: Session) -> None:
+    token_filter.add(session.info.pop("new_tokens", ()))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_rolled_back_tokens(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("new_tokens", None)
+
+
+def _correct_response_count() -> ColumnElement[int]:
+    return func.count(models.Response.id).filter(
+        models.Response.chosen_sample == models.SampleFlight.correct_sample
+    )
+
+
+def _count_experiment_results(
+    session: Session, experiment_id: int, test_type: DiscriminationTests
+) -> models.ExperimentStats:
+    """Counts an experiment's flights and responses from the source tables."""
+    sample_flight = models.SampleFlight
+    response = models.Response
+    total_flights, total_responses, correct_responses = session.execute(
+        select(
+            func.count(sample_flight.id.distinct()),
+            func.count(response.id),
+            _correct_response_count(),
+        )
+        .select_from(sample_flight)
+        .outerjoin(response, response.sample_flight_id == sample_flight.id)
+        .where(sample_flight.experiment_id == experiment_id)
+    ).one()
+    return models.ExperimentStats(
+        experiment_id=experiment_id,
+        total_flights=total_flights,
+        total_responses=total_responses,
+        correct_responses=correct_responses,
+        log_likelihood_ratio=statistics.log_likelihood_ratio(
+            correct_responses,
+            total_responses,
+            p0=statistics.CHANCE_PROBABILITIES[test_type],
+        ),
+    )
+
+
+def increment_experiment_stats(
+    session: Session,
+    experiment_id: int,
+    *,
+    flights: int = 0,
+    responses: int = 0,
+    correct: int = 0,
+    test_type: DiscriminationTests = DiscriminationTests.TRIANGLE,
+) -> None:
+    """Applies deltas to an experiment's counters in the current transaction.
+
+    Response deltas need the experiment's ``test_type`` for the log-likelihood
+    ratio. Experiments without a counter row are skipped, the row is rebuilt
+    from the source tables the next time it is read.
+    """
+    stats = models.ExperimentStats
+    session.execute(
+        update(stats)
+        .where(stats.experiment_id == experiment_id)
+        .values(
+            total_flights=stats.total_flights + flights,
+            total_responses=stats.total_responses + responses,
+            correct_responses=stats.correct_responses + correct,
+            log_likelihood_ratio=stats.log_likelihood_ratio
+            + statistics.log_likelihood_ratio(
+                correct, responses, p0=statistics.CHANCE_PROBABILITIES[test_type]
+            ),
+        )
+    )
+
+
+def _increment_response_stats(
+    session: Session, *filters: ColumnElement[bool], sign: int
+) -> None:
+    """Adds (``sign=1``) or removes (``sign=-1``) the responses matching
+    ``filters`` to or from their experiments' counters, one update per
+    experiment."""
+    sample_flight = models.SampleFlight
+    experiment = models.Experiment
+    rows = session.execute(
+        select(
+            sample_flight.experiment_id,
+            experiment.test_type,
+            func.count(models.Response.id),
+            _correct_response_count(),
+        )
+        .select_from(models.Response)
+        .join(sample_flight, sample_flight.id == models.Response.sample_flight_id)
+        .join(experiment, experiment.id == sample_flight.experiment_id)
+        .where(*filters)
+        .group_by(sample_flight.experiment_id, experiment.test_type)
+    ).all()
+    for experiment_id, test_type, responses, correct in rows:
+        increment_experiment_stats(
+            session,
+            experiment_id,
+            responses=sign * responses,
+            correct=sign * correct,
+            test_type=test_type,
+        )
+
+
+class ExperimentRepository(
+    Repository[
+        models.Experiment, schemas.ExperimentInSchema, schemas.ExperimentOutSchema
+    ]
+):
+    # a batch item without a test type keeps the experiment's
+    partial_bulk_updates = True
+
+    def _after_create(self: Self, result: models.Experiment) -> None:
+        self.session.add(models.ExperimentStats(experiment_id=result.id))
+
+    def _before_delete(self: Self, result: models.Experiment) -> None:
+        self._before_bulk_delete([result])
+
+    def _before_bulk_delete(self: Self, results: Sequence[models.Experiment]) -> None:
+        self.session.execute(
+            delete(models.ExperimentStats).where(
+                models.ExperimentStats.experiment_id.in_([x.id for x in results])
+            )
+        )
+
+    def _after_update(self: Self, result: models.Experiment) -> None:
+        self._after_bulk_update([result])
+
+    def _after_bulk_update(self: Self, results: Sequence[models.Experiment]) -> None:
+        # a changed test type changes the chance probability of every response
+        test_types = {x.id: x.test_type for x in results}
+        for stats in self.session.scalars(
+            select(models.ExperimentStats).where(
+                models.ExperimentStats.experiment_id.in_(test_types)
+            )
+        ):
+            stats.log_likelihood_ratio = statistics.log_likelihood_ratio(
+                stats.correct_responses,
+                stats.total_responses,
+                p0=statistics.CHANCE_PROBABILITIES[test_types[stats.experiment_id]],
+            )
+
+    def update_fields(
+        self: Self, id: int, values: Mapping[str, Any]
+    ) -> schemas.ExperimentOutSchema | None:
+        """Sets only the given columns of an experiment and commits.
+
+        This is one ``UPDATE ... WHERE id = ? RETURNING`` instead of reading
+        the row and writing every column back as `update` does. The counters
+        are only touched when the test type changes. When only one end of the
+        date range is given it is checked against the stored other end in the
+        same statement, and ``None`` is returned if the range would be invalid.
+        Raises `NoResultFound` if there is no such experiment.
+        """
+        if not values:
+            return self.get_by_id(id)
+        experiment = models.Experiment
+        conditions: list[ColumnElement[bool]] = []
+        if "start_on" in values and "end_on" not in values:
+            conditions.append(experiment.end_on >= values["start_on"])
+        if "end_on" in values and "start_on" not in values:
+            conditions.append(experiment.start_on <= values["end_on"])
+        result = self.session.scalars(
+            update(experiment)
+            .where(experiment.id == id, *conditions)
+            .values(**values)
+            .returning(experiment)
+        ).one_or_none()
+        if result is None:
+            exists = self.session.scalar(
+                select(experiment.id).where(experiment.id == id)
+            )
+            self.session.rollback()
+            if exists is None:
+                raise NoResultFound(f"No experiment with id {id}.")
+            return None
+        if "test_type" in values:
+            self._after_update(result)
+        # validate before the commit expires the row
+        result_schema = self.schema_out.model_validate(result)
+        self.session.commit()
+        return result_schema
+
+    def get_stats(self: Self, id: int) -> schemas.ExperimentStatsSchema:
+        """Gets the result counters for an experiment by its id."""
+        stats = self.session.get(models.ExperimentStats, id)
+        if stats is None:
+            # raises if the experiment itself does not exist
+            experiment = self.session.get_one(self.data_model, id)
+            stats = _count_experiment_results(self.session, id, experiment.test_type)
+            self.session.add(stats)
+            self.session.commit()
+        return schemas.ExperimentStatsSchema.model_validate(stats)
+
+    def get_result_counts(
+        self: Self, *filters: ColumnElement[bool]
+    ) -> Sequence[Row[tuple[int, str, DiscriminationTests, date, date, int, int, int]]]:
+        """Counts flights, responses and correct responses for many experiments.
+
+        Returns ``(id, name, test_type, start_on, end_on, total_flights,
+        total_responses, correct_responses)`` rows ordered by experiment id, from
+        a single aggregated query.
+        """
+        experiment = models.Experiment
+        sample_flight = models.SampleFlight
+        response = models.Response
+        return self.session.execute(
+            select(
+                experiment.id,
+                experiment.name,
+                experiment.test_type,
+                experiment.start_on,
+                experiment.end_on,
+                func.count(sample_flight.id.distinct()).label("total_flights"),
+                func.count(response.id).label("total_responses"),
+                _correct_response_count().label("correct_responses"),
+            )
+            .outerjoin(sample_flight, sample_flight.experiment_id == experiment.id)
+            .outerjoin(response, response.sample_flight_id == sample_flight.id)
+            .where(*filters)
+            .group_by(
+                experiment.id,
+                experiment.name,
+                experiment.test_type,
+                experiment.start_on,
+                experiment.end_on,
+            )
+            .order_by(experiment.id)
+        ).all()
+
+    def get_experience_level_counts(
+        self: Self, id: int
+    ) -> Sequence[Row[tuple[ExperienceLevels, int, int]]]:
+        """Counts responses and correct responses per experience level.
+
+        Returns ``(experience_level, total_responses, correct_responses)`` rows
+        for the levels that have responses, from a single aggregated query.
+        """
+        sample_flight = models.SampleFlight
+        response = models.Response
+        return self.session.execute(
+            select(
+                response.experience_level,
+                func.count(response.id),
+                _correct_response_count(),
+            )
+            .join(sample_flight, response.sample_flight_id == sample_flight.id)
+            .where(sample_flight.experiment_id == id)
+            .group_by(response.experience_level)
+        ).all()
+
+
+class SampleFlightRepository(
+    Repository[
+        models.SampleFlight,
+        schemas.SampleFlightInSchema,
+        schemas.SampleFlightOutSchema,
+    ]
+):
+    eager_relationships = ("response",)
+
+    def _increment_flight_stats(
+        self: Self, results: Sequence[models.SampleFlight], sign: int
+    ) -> None:
+        for experiment_id, count in Counter(x.experiment_id for x in results).items():
+            increment_experiment_stats(
+                self.session, experiment_id, flights=sign * count
+            )
+
+    def _after_create(self: Self, result: models.SampleFlight) -> None:
+        self._after_bulk_create([result])
+
+    def _after_bulk_create(self: Self, results: Sequence[models.SampleFlight]) -> None:
+        self._increment_flight_stats(results, sign=1)
+
+    def _before_bulk_update(self: Self, results: Sequence[models.SampleFlight]) -> None:
+        # a changed correct sample or experiment moves the flight's response
+        self._increment_flight_stats(results, sign=-1)
+        _increment_response_stats(
+            self.session,
+            models.Response.sample_flight_id.in_([x.id for x in results]),
+            sign=-1,
+        )
+
+    def _after_bulk_update(self: Self, results: Sequence[models.SampleFlight]) -> None:
+        self._increment_flight_stats(results, sign=1)
+        _increment_response_stats(
+            self.session,
+            models.Response.sample_flight_id.in_([x.id for x in results]),
+            sign=1,
+        )
+
+    def create_many_with_tokens(
+        self: Self,
+        experiment_id: int,
+        correct_samples: Sequence[str],
+        tokens: Sequence[str] | None,
+        expiry_date: datetime,
+        serving_orders: Sequence[str] | None = None,
+    ) -> list[schemas.ObservationAwaitingResponseSchema]:
+        """Creates a sample flight for each correct sample, each with one of
+        ``tokens`` and optionally a serving order, in a single transaction.
+
+        Without ``tokens``, each flight gets a signed token of its id, see
+        `token_utils.generate_signed_token`.
+
+        Flights and tokens are each written with one multi-row
+        ``INSERT ... RETURNING``, rather than a flush and commit per row. The
+        order of returned rows is not guaranteed, so tokens are matched back to
+        their flights by id.
+
+        Rolls back and raises `IntegrityError` if one of ``tokens`` is taken.
+        """
+        sample_flight = models.SampleFlight
+        token = models.SampleFlightToken
+        flights = self.session.execute(
+            insert(sample_flight).returning(
+                sample_flight.id,
+                sample_flight.created_at,
+                sample_flight.updated_at,
+                sample_flight.experiment_id,
+                sample_flight.correct_sample,
+                sample_flight.serving_order,
+            ),
+            [
+                {
+                    "experiment_id": experiment_id,
+                    "correct_sample": correct_sample,
+                    "serving_order": serving_order,
+                }
+                for correct_sample, serving_order in zip(
+                    correct_samples,
+                    serving_orders or [None] * len(correct_samples),
+                    strict=True,
+                )
+            ],
+        ).all()
+        try:
+            flight_tokens = self.session.execute(
+                insert(token).returning(
+                    token.id,
+                    token.created_at,
+                    token.updated_at,
+                    token.token,
+                    token.expiry_date,
+                    token.response_id,
+                    token.sample_flight_id,
+                ),
+                [
+                    {
+                        "token": x,
+                        "expiry_date": expiry_date,
+                        "sample_flight_id": flight.id,
+                    }
+                    for flight, x in zip(
+                        flights,
+                        tokens
+                        or [
+                            token_utils.generate_signed_token(x.id, expiry_date)
+                            for x in flights
+                        ],
+                        strict=True,
+                    )
+                ],
+            ).all()
+        except IntegrityError:
+            self.session.rollback()
+            raise
+        token_by_flight = {x.sample_flight_id: x for x in flight_tokens}
+        _add_to_token_filter_on_commit(self.session, (x.token for x in flight_tokens))
+        increment_experiment_stats(self.session, experiment_id, flights=len(flights))
+        self.session.commit()
+        return [
+            schemas.ObservationAwaitingResponseSchema(
+                sample_flight=schemas.SampleFlightOutSchema.model_validate(
+                    flight._mapping
+                ),
+                token=schemas.SampleFlightTokenOutSchema.model_validate(
+                    token_by_flight[flight.id]._mapping
+                ),
+            )
+            for flight in flights
+        ]
+
+    def _before_delete(self: Self, result: models.SampleFlight) -> None:
+        self._before_bulk_delete([result])
+
+    def _before_bulk_delete(self: Self, results: Sequence[models.SampleFlight]) -> None:
+        # a flight's token and response go with it, and so do their counts
+        ids = [x.id for x in results]
+        self._increment_flight_stats(results, sign=-1)
+        _increment_response_stats(
+            self.session, models.Response.sample_flight_id.in_(ids), sign=-1
+        )
+        self.session.execute(
+            delete(models.SampleFlightToken).where(
+                models.SampleFlightToken.sample_flight_id.in_(ids)
+            )
+        )
+        self.session.execute(
+            delete(models.Response).where(models.Response.sample_flight_id.in_(ids))
+        )
+
+    def purge_unanswered(
+        self: Self, closed_before: date, batch_size: int
+    ) -> tuple[int, list[str]]:
+        """Deletes up to ``batch_size`` unanswered flights of experiments that
+        ended before ``closed_before``, with their tokens, and commits.
+
+        Returns the number of flights deleted and the tokens deleted with them.
+        """
+        sample_flight = models.SampleFlight
+        token = models.SampleFlightToken
+        response = models.Response
+        flight_ids = self.session.scalars(
+            select(sample_flight.id)
+            .join(
+                models.Experiment, models.Experiment.id == sample_flight.experiment_id
+            )
+            .outerjoin(response, response.sample_flight_id == sample_flight.id)
+            .where(models.Experiment.end_on < closed_before, response.id.is_(None))
+            .limit(batch_size)
+        ).all()
+        if not flight_ids:
+            return 0, []
+        tokens = self.session.scalars(
+            delete(token)
+            .where(token.sample_flight_id.in_(flight_ids))
+            .returning(token.token)
+        ).all()
+        experiment_ids = self.session.scalars(
+            delete(sample_flight)
+            .where(sample_flight.id.in_(flight_ids))
+            .returning(sample_flight.experiment_id)
+        ).all()
+        for experiment_id, count in Counter(experiment_ids).items():
+            increment_experiment_stats(self.session, experiment_id, flights=-count)
+        self.session.commit()
+        return len(experiment_ids), list(tokens)
+
+    def get_observations_page(
+        self: Self,
+        experiment_id: int,
+        limit: int = config.PAGE_SIZE_DEFAULT,
+        after_id: int | None = None,
+    ) -> tuple[list[schemas.ObservationSchema], int | None]:
+        """Gets a page of an experiment's observations in one query.
+
+        There is one observation per token, with its sample flight and the
+        flight's response if it has one, newest token first. Pages are keyed
+        on the token id like `get_page`.
+        """
+        sample_flight = models.SampleFlight
+        token = models.SampleFlightToken
+        response = models.Response
+        statement = (
+            select(sample_flight, token, response)
+            .join(token, token.sample_flight_id == sample_flight.id)
+            .outerjoin(response, response.sample_flight_id == sample_flight.id)
+            .where(sample_flight.experiment_id == experiment_id)
+            .options(contains_eager(sample_flight.response))
+        )
+        if after_id is not None:
+            statement = statement.where(token.id < after_id)
+        rows = self.session.execute(
+            statement.order_by(token.id.desc()).limit(limit + 1)
+        ).all()
+        observations = [
+            schemas.ObservationSchema(
+                experiment_id=experiment_id,
+                sample_flight=schemas.SampleFlightOutSchema.model_validate(flight),
+                token=schemas.SampleFlightTokenOutSchema.model_validate(flight_token),
+                response=None
+                if flight_response is None
+                else schemas.ResponseOutSchema.model_validate(flight_response),
+            )
+            for flight, flight_token, flight_response in rows[:limit]
+        ]
+        next_id = rows[limit - 1][1].id if len(rows) > limit else None
+        return observations, next_id
+
+    def get_ballot_state(
+        self: Self, id: int
+    ) -> Row[tuple[DiscriminationTests, int | None]]:
+        """Gets ``(test_type, response_id)`` of a sample flight, where the
+        response id is ``None`` when it has not been answered. Raises
+        `NoResultFound` when there is no such flight."""
+        sample_flight = models.SampleFlight
+        response = models.Response
+        return self.session.execute(
+            select(models.Experiment.test_type, response.id.label("response_id"))
+            .select_from(sample_flight)
+            .join(
+                models.Experiment, models.Experiment.id == sample_flight.experiment_id
+            )
+            .outerjoin(response, response.sample_flight_id == sample_flight.id)
+            .where(sample_flight.id == id)
+        ).one()
+
+
+class ResponseRepository(
+    Repository[models.Response, schemas.ResponseInSchema, schemas.ResponseOutSchema]
+):
+    def _apply_to_stats(
+        self: Self, results: Sequence[models.Response], sign: int
+    ) -> None:
+        _increment_response_stats(
+            self.session,
+            models.Response.id.in_([x.id for x in results]),
+            sign=sign,
+        )
+
+    def _after_create(self: Self, result: models.Response) -> None:
+        self._apply_to_stats([result], sign=1)
+
+    def _before_update(self: Self, result: models.Response) -> None:
+        self._apply_to_stats([result], sign=-1)
+
+    def _after_update(self: Self, result: models.Response) -> None:
+        self._apply_to_stats([result], sign=1)
+
+    def _before_delete(self: Self, result: models.Response) -> None:
+        self._before_bulk_delete([result])
+
+    def _after_bulk_create(self: Self, results: Sequence[models.Response]) -> None:
+        self._apply_to_stats(results, sign=1)
+
+    def _before_bulk_update(self: Self, results: Sequence[models.Response]) -> None:
+        self._apply_to_stats(results, sign=-1)
+
+    def _after_bulk_update(self: Self, results: Sequence[models.Response]) -> None:
+        self._apply_to_stats(results, sign=1)
+
+    def _before_bulk_delete(self: Self, results: Sequence[models.Response]) -> None:
+        self._apply_to_stats(results, sign=-1)
+        # the ballots of deleted responses can be answered again
+        token = models.SampleFlightToken
+        self.session.execute(
+            update(token)
+            .where(token.response_id.in_([x.id for x in results]))
+            .values(response_id=None)
+        )
+
+    def create(self: Self, data: schemas.ResponseInSchema) -> schemas.ResponseOutSchema:
+        """Rolls back and raises `IntegrityError` if the flight already has a
+        response."""
+        try:
+            return super().create(data)
+        except IntegrityError:
+            self.session.rollback()
+            raise
+
+    def bulk_create(
+        self: Self, data: Sequence[schemas.ResponseInSchema]
+    ) -> list[schemas.ResponseOutSchema]:
+        """Rolls back and raises `IntegrityError` if any flight already has a
+        response or is answered twice in ``data``."""
+        try:
+            return super().bulk_create(data)
+        except IntegrityError:
+            self.session.rollback()
+            raise
+
+    def bulk_update(
+        self: Self,
+        data: Sequence[schemas.JustIdSchema],
+        *filters: ColumnElement[bool],
+    ) -> list[schemas.ResponseOutSchema]:
+        """Rolls back and raises `IntegrityError` if a response is moved to a
+        flight that already has one."""
+        try:
+            return super().bulk_update(data, *filters)
+        except IntegrityError:
+            self.session.rollback()
+            raise
+
+    def create_for_token(
+        self: Self, data: schemas.ResponseInSchema, token: str
+    ) -> schemas.ResponseOutSchema | None:
+        """Creates a response and claims the token it answers, in one
+        transaction.
+
+        The token is claimed with ``UPDATE ... WHERE response_id IS NULL``, so
+        of two concurrent redemptions only one succeeds. Returns ``None``, and
+        rolls back, if the token was already claimed. Raises `NoResultFound` if
+        there is no such token and `IntegrityError` if the flight already has a
+        response.
+        """
+        result = models.Response(**data.model_dump())
+        self.session.add(result)
+        try:
+            self.session.flush()
+        except IntegrityError:
+            self.session.rollback()
+            raise
+        flight_token = models.SampleFlightToken
+        claimed = self.session.execute(
+            update(flight_token)
+            .where(flight_token.token == token, flight_token.response_id.is_(None))
+            .values(response_id=result.id)
+        ).rowcount
+        if not claimed:
+            exists = self.session.scalar(
+                select(flight_token.id).where(flight_token.token == token)
+            )
+            self.session.rollback()
+            if exists is None:
+                raise NoResultFound(f"No sample_flight_token {token!r}.")
+            return None
+        self._after_create(result)
+        self.session.commit()
+        return self._to_schema(result)
+
+
+class SampleFlightTokenRepository(
+    Repository[
+        models.SampleFlightToken,
+        schemas.SampleFlightTokenInSchema,
+        schemas.SampleFlightTokenOutSchema,
+    ]
+):
+    def _after_create(self: Self, result: models.SampleFlightToken) -> None:
+        self._after_bulk_create([result])
+
+    def _after_bulk_create(
+        self: Self, results: Sequence[models.SampleFlightToken]
+    ) -> None:
+        _add_to_token_filter_on_commit(self.session, (x.token for x in results))
+
+    def iter_tokens(
+        self: Self, batch_size: int = config.STREAMING_BATCH_SIZE
+    ) -> Iterator[str]:
+        """Iterates over every token, fetching ``batch_size`` at a time."""
+        yield from self.session.scalars(
+            select(models.SampleFlightToken.token).execution_options(
+                yield_per=batch_size
+            )
+        )
+
+    def resolve(self: Self, value: str) -> Row[tuple[int, datetime]] | None:
+        """Gets ``(sample_flight_id, expiry_date)`` of a token, if it exists."""
+        token = models.SampleFlightToken
+        return self.session.execute(
+            select(token.sample_flight_id, token.expiry_date).where(
+                token.token == value
+            )
+        ).one_or_none()
+
+    def purge_expired(
+        self: Self, expired_before: datetime, batch_size: int
+    ) -> list[str]:
+        """Deletes up to ``batch_size`` unanswered tokens that expired before
+        ``expired_before``, commits, and returns the deleted tokens.
+
+        Tokens of answered flights are kept, observations are listed through
+        them. A flight counts as answered when it has a response, whether or
+        not the response came in through its token.
+        """
+        token = models.SampleFlightToken
+        response = models.Response
+        tokens = self.session.scalars(
+            delete(token)
+            .where(
+                token.id.in_(
+                    select(token.id)
+                    .where(
+                        token.expiry_date < expired_before,
+                        ~exists().where(
+                            response.sample_flight_id == token.sample_flight_id
+                        ),
+                    )
+                    .limit(batch_size)
+                )
+            )
+            .returning(token.token)
+        ).all()
+        self.session.commit()
+        return list(tokens)
+
+    def get_existing_tokens(self: Self, tokens: Collection[str]) -> set[str]:
+        """Gets which of ``tokens`` are already taken, in one indexed lookup."""
+        token = models.SampleFlightToken
+        return set(
+            self.session.scalars(select(token.token).where(token.token.in_(tokens)))
+        )
+
+    def get_outstanding(
+        self: Self, experiment_id: int
+    ) -> Sequence[Row[tuple[str, int]]]:
+        """Gets the unexpired tokens of an experiment's unanswered sample flights.
+
+        Returns ``(token, sample_flight_id)`` rows ordered by sample flight.
+        """
+        token = models.SampleFlightToken
+        sample_flight = models.SampleFlight
+        response = models.Response
+        return self.session.execute(
+            select(token.token, token.sample_flight_id)
+            .join(sample_flight, token.sample_flight_id == sample_flight.id)
+            .outerjoin(response, response.sample_flight_id == sample_flight.id)
+            .where(
+                sample_flight.experiment_id == experiment_id,
+                response.id.is_(None),
+                # expiry dates are naive local times, see `token_utils`
+                token.expiry_date > datetime.now(),
+            )
+            .order_by(token.sample_flight_id)
+        ).all()
+
+    def iter_for_experiment(
+        self: Self, experiment_id: int, batch_size: int = config.STREAMING_BATCH_SIZE
+    ) -> Iterator[Row[tuple[str, int]]]:
+        """Iterates over ``(token, sample_flight_id)`` of every token of an
+        experiment, fetching ``batch_size`` rows at a time from the cursor."""
+        token = models.SampleFlightToken
+        sample_flight = models.SampleFlight
+        yield from self.session.execute(
+            select(token.token, token.sample_flight_id)
+            .join(sample_flight, token.sample_flight_id == sample_flight.id)
+            .where(sample_flight.experiment_id == experiment_id)
+            .order_by(token.id)
+            .execution_options(yield_per=batch_size)
+        )
 
-SampleFlightTokenRepository = Repository[
-    models.SampleFlightToken,
-    schemas.SampleFlightTokenInSchema,
-    schemas.SampleFlightTokenOutSchema,
-]
 
 UserRepository = Repository[
     auth_models.User, auth_schemas.UserCreate, auth_schemas.User
@@ -8,16 +8,38 @@ from typing import Self
 
 import pytz as tz
 from pydantic import BaseModel
+from pydantic import BeforeValidator
 from pydantic import ConfigDict
 from pydantic import Field
 from pydantic import model_validator
-from scipy import stats
 
-from triangler_fastapi.domain import token_utils
+from triangler_fastapi import config
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.constants import ExperienceLevels
+from triangler_fastapi.constants import FlightDesigns
+from triangler_fastapi.constants import QRCodeFormats
+from triangler_fastapi.constants import SampleNames
+from triangler_fastapi.constants import SequentialDecisions
+from triangler_fastapi.domain import designs
+from triangler_fastapi.domain import qr_cache
+from triangler_fastapi.domain import statistics
+from triangler_fastapi.domain.value_types import DateRange
 
 PositiveInt = Annotated[int, Field(ge=0)]
 
 
+def _sample_name_from_enum(value: Any) -> Any:  # noqa: ANN401
+    """The database stores samples as `SampleNames` members, keyed by name."""
+    if isinstance(value, SampleNames):
+        return value.name
+    return value
+
+
+SampleName = Annotated[
+    Literal["A", "B", "C", "D"], BeforeValidator(_sample_name_from_enum)
+]
+
+
 class TrianglerBaseSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -64,6 +86,7 @@ class ExperimentBaseSchema(TrianglerBaseSchema):
     description: str
     start_on: date
     end_on: date
+    test_type: DiscriminationTests = DiscriminationTests.TRIANGLE
 
     @model_validator(mode="after")
     def ensure_valid_range(self: Self) -> Self:
@@ -80,11 +103,30 @@ class ExperimentUpdateSchema(ExperimentBaseSchema, TrianglerBaseInSchema):
     description: str | None = None  # pyright: ignore[reportIncompatibleVariableOverride]
     start_on: date | None = None  # pyright: ignore[reportIncompatibleVariableOverride]
     end_on: date | None = None  # pyright: ignore[reportIncompatibleVariableOverride]
+    test_type: DiscriminationTests | None = None  # pyright: ignore[reportIncompatibleVariableOverride]
+
+    @model_validator(mode="after")
+    def ensure_valid_range(self: Self) -> Self:
+        # either end of the range may be left as it is
+        if self.start_on is not None and self.end_on is not None:
+            return super().ensure_valid_range()
+        return self
 
 
 class ExperimentOutSchema(TrianglerBaseOutSchema, ExperimentBaseSchema): ...
 
 
+class ExperimentBatchUpdateSchema(JustIdSchema, ExperimentBaseSchema):
+    """Replaces the fields of the experiment with ``id``, its test type only when
+    one is given."""
+
+    test_type: DiscriminationTests | None = None  # pyright: ignore[reportIncompatibleVariableOverride]
+
+
+class BatchDeleteSchema(TrianglerBaseSchema):
+    ids: list[PositiveInt] = Field(min_length=1, max_length=config.BATCH_MAX_SIZE)
+
+
 class ExperimentEnrichedSchema(TrianglerBaseOutSchema, ExperimentBaseSchema):
     sample_flights: list["SampleFlightOutSchema"]
 
@@ -92,34 +134,207 @@ class ExperimentEnrichedSchema(TrianglerBaseOutSchema, ExperimentBaseSchema):
     def sample_size(self: Self) -> int:
         return len(self.sample_flights)
 
+    @property
+    def correct_count(self: Self) -> int:
+        return sum(x.is_correct for x in self.sample_flights)
+
+    @property
+    def p_value(self: Self) -> float:
+        return statistics.p_value(
+            n_correct=self.correct_count,
+            n_total=self.sample_size,
+            p0=statistics.CHANCE_PROBABILITIES[self.test_type],
+        )
+
+
+class ExperimentStatsSchema(TrianglerBaseSchema):
+    experiment_id: int
+    total_flights: PositiveInt
+    total_responses: PositiveInt
+    correct_responses: PositiveInt
+    log_likelihood_ratio: float
+    test_type: DiscriminationTests = DiscriminationTests.TRIANGLE
+
     @property
     def p_value(self: Self) -> float:
-        n_samples = float(self.sample_size)
-        if n_samples < 1:
-            return 1.0
-        # expected 1/3 of the time to be correct
-        expected_correct = n_samples / 3
-        # expected 2/3 of the time to be incorrect
-        expected_incorrect = expected_correct * 2
+        return statistics.p_value(
+            n_correct=self.correct_responses,
+            n_total=self.total_responses,
+            p0=statistics.CHANCE_PROBABILITIES[self.test_type],
+        )
+
+
+class SequentialAnalysisSchema(TrianglerBaseSchema):
+    total_responses: PositiveInt
+    correct_responses: PositiveInt
+    log_likelihood_ratio: float
+    lower_boundary: float
+    upper_boundary: float
+    decision: SequentialDecisions
+
+    @classmethod
+    def from_stats(cls: type[Self], stats: ExperimentStatsSchema) -> Self:
+        lower, upper = statistics.sequential_boundaries()
+        return cls(
+            total_responses=stats.total_responses,
+            correct_responses=stats.correct_responses,
+            log_likelihood_ratio=stats.log_likelihood_ratio,
+            lower_boundary=lower,
+            upper_boundary=upper,
+            decision=statistics.sequential_decision(stats.log_likelihood_ratio),
+        )
+
 
-        # number of correct responses
-        observed_correct = len([1 for x in self.sample_flights if x.is_correct])
-        observed_incorrect = n_samples - observed_correct
+class ExperimentDetailSchema(ExperimentOutSchema):
+    sequential_analysis: SequentialAnalysisSchema
 
-        correct_x2 = (abs(observed_correct - expected_correct) ** 2) / expected_correct
-        incorrect_x2 = (
-            abs(observed_incorrect - expected_incorrect) ** 2
-        ) / expected_incorrect
 
-        x2 = correct_x2 + incorrect_x2
+class PosteriorSchema(TrianglerBaseSchema):
+    alpha: float
+    beta: float
+    credible_level: float
+    proportion_correct_mean: float
+    proportion_correct_interval: tuple[float, float]
+    discriminator_proportion_mean: float
+    discriminator_proportion_interval: tuple[float, float]
 
-        return float(1 - stats.chi2.cdf(x2, 1))
+
+class ExperimentReportRowSchema(TrianglerBaseSchema):
+    experiment_id: int
+    name: str
+    test_type: DiscriminationTests
+    total_flights: PositiveInt
+    sample_size: PositiveInt
+    correct_count: PositiveInt
+    p_value: float
+    is_significant: bool
+    posterior: PosteriorSchema
+
+
+class ExperimentReportSchema(TrianglerBaseSchema):
+    significance_level: float
+    experiments: list[ExperimentReportRowSchema]
+
+
+class AdjustedReportRowSchema(TrianglerBaseSchema):
+    experiment_id: int
+    name: str
+    test_type: DiscriminationTests
+    start_on: date
+    end_on: date
+    sample_size: PositiveInt
+    correct_count: PositiveInt
+    p_value: float
+    bh_adjusted_p_value: float
+    holm_adjusted_p_value: float
+    is_significant_bh: bool
+    is_significant_holm: bool
+
+
+class AdjustedReportSchema(TrianglerBaseSchema):
+    date_range: DateRange
+    significance_level: float
+    # experiments with responses, the family the p-values are adjusted over
+    family_size: PositiveInt
+    experiments: list[AdjustedReportRowSchema]
+
+
+class StratumResultSchema(TrianglerBaseSchema):
+    sample_size: PositiveInt
+    correct_count: PositiveInt
+    correct_rate: float | None
+    p_value: float
+    is_significant: bool
+
+
+class ExperienceLevelResultSchema(StratumResultSchema):
+    experience_level: ExperienceLevels
+
+
+class ExperimentStratifiedReportSchema(TrianglerBaseSchema):
+    experiment_id: int
+    test_type: DiscriminationTests
+    significance_level: float
+    experience_levels: list[ExperienceLevelResultSchema]
+    pooled: StratumResultSchema
+
+
+class SampleSizePlanSchema(TrianglerBaseSchema):
+    test_type: DiscriminationTests
+    discriminator_proportion: float
+    significance_level: float
+    beta: float
+    sample_size: PositiveInt | None
+    critical_value: PositiveInt | None
+    power: float | None
+
+
+class CriticalValueSchema(TrianglerBaseSchema):
+    test_type: DiscriminationTests
+    sample_size: PositiveInt
+    significance_level: float
+    critical_value: PositiveInt
+    discriminator_proportion: float | None = None
+    power: float | None = None
+
+
+class SimulationInSchema(TrianglerBaseInSchema):
+    test_type: DiscriminationTests = DiscriminationTests.TRIANGLE
+    panel_size: int = Field(gt=0, le=config.PLANNING_MAX_N)
+    discriminator_proportion: float = Field(ge=0, le=1)
+    # relative share of tasters at each experience level, all levels are
+    # treated alike when this is empty
+    experience_mix: dict[ExperienceLevels, Annotated[float, Field(ge=0)]] = Field(
+        default_factory=dict
+    )
+    # per level overrides of `discriminator_proportion`
+    experience_discriminator_proportion: dict[
+        ExperienceLevels, Annotated[float, Field(ge=0, le=1)]
+    ] = Field(default_factory=dict)
+    n_simulations: int = Field(
+        default=10_000, gt=0, le=config.SIMULATION_MAX_SIMULATIONS
+    )
+    significance_level: float = Field(default=config.SIGNIFICANCE_LEVEL, gt=0, lt=1)
+    seed: int | None = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def ensure_valid_mix(self: Self) -> Self:
+        if self.experience_mix and sum(self.experience_mix.values()) <= 0:
+            raise ValueError("Experience mix must have at least one positive weight.")
+        return self
+
+    @model_validator(mode="after")
+    def ensure_within_limit(self: Self) -> Self:
+        if self.n_simulations * self.panel_size > config.SIMULATION_MAX_RESPONSES:
+            raise ValueError(
+                "Number of simulations times the panel size must be at most "
+                f"{config.SIMULATION_MAX_RESPONSES}."
+            )
+        return self
+
+
+class HistogramBinSchema(TrianglerBaseSchema):
+    lower: float
+    upper: float
+    count: PositiveInt
+
+
+class SimulationResultSchema(TrianglerBaseSchema):
+    test_type: DiscriminationTests
+    panel_size: PositiveInt
+    n_simulations: PositiveInt
+    significance_level: float
+    critical_value: PositiveInt
+    power: float
+    mean_correct: float
+    p_value_quantiles: dict[str, float]
+    p_value_histogram: list[HistogramBinSchema]
 
 
 class ResponseBaseSchema(TrianglerBaseSchema):
-    response_id: int
-    response_choice: Literal["A", "B", "C"]
-    is_correct: bool
+    sample_flight_id: int
+    experience_level: ExperienceLevels
+    chosen_sample: SampleName
 
 
 class ResponseInSchema(ResponseBaseSchema, TrianglerBaseInSchema): ...
@@ -128,16 +343,31 @@ class ResponseInSchema(ResponseBaseSchema, TrianglerBaseInSchema): ...
 class ResponseOutSchema(TrianglerBaseOutSchema, ResponseBaseSchema): ...
 
 
+class ResponseBatchUpdateSchema(JustIdSchema):
+    """Replaces the answer of the response with ``id``."""
+
+    experience_level: ExperienceLevels
+    chosen_sample: SampleName
+
+
+class TokenResponseInSchema(TrianglerBaseSchema):
+    """An anonymous taster's answer to the ballot of an observation token."""
+
+    experience_level: ExperienceLevels
+    chosen_sample: SampleName
+
+
 class SampleFlightBaseSchema(TrianglerBaseSchema):
     experiment_id: int
-    correct_sample: Literal["A", "B", "C"]
+    correct_sample: SampleName
+    serving_order: str | None = None
     response: ResponseBaseSchema | None = None
 
     @property
     def is_correct(self: Self) -> bool:
         if self.response is None:
             return False
-        return self.correct_sample == self.response.response_choice
+        return self.correct_sample == self.response.chosen_sample
 
 
 class SampleFlightInSchema(SampleFlightBaseSchema, TrianglerBaseInSchema):
@@ -145,11 +375,12 @@ class SampleFlightInSchema(SampleFlightBaseSchema, TrianglerBaseInSchema):
     def new(
         cls: type[Self],
         experiment_id: int,
-        correct_sample: Literal["A", "B", "C"] | None = None,
+        correct_sample: Literal["A", "B", "C", "D"] | None = None,
         response: ResponseBaseSchema | None = None,
+        test_type: DiscriminationTests = DiscriminationTests.TRIANGLE,
     ) -> Self:
         if correct_sample is None:
-            correct_sample = random.choice(["A", "B", "C"])  # noqa: S311
+            correct_sample = random.choice(designs.sample_names(test_type))  # noqa: S311
         return cls(
             experiment_id=experiment_id,
             correct_sample=correct_sample,
@@ -160,14 +391,41 @@ class SampleFlightInSchema(SampleFlightBaseSchema, TrianglerBaseInSchema):
 class SampleFlightOutSchema(TrianglerBaseOutSchema, SampleFlightBaseSchema): ...
 
 
+class SampleFlightBatchItemSchema(TrianglerBaseSchema):
+    """A sample flight of a batch, for the experiment the batch is sent to."""
+
+    correct_sample: SampleName
+    serving_order: str | None = None
+
+
+class SampleFlightBatchUpdateSchema(JustIdSchema, SampleFlightBatchItemSchema):
+    """Replaces the samples of the sample flight with ``id``."""
+
+
+class SampleFlightBatchInSchema(TrianglerBaseSchema):
+    """Mints ``count`` sample flights, each with its observation token."""
+
+    count: int = Field(gt=0, le=config.SAMPLE_FLIGHT_BATCH_MAX_SIZE)
+    design: FlightDesigns = FlightDesigns.RANDOM
+    # drawn at random for each flight when not given, random designs only
+    correct_sample: SampleName | None = None
+
+    @model_validator(mode="after")
+    def ensure_design_allows_correct_sample(self: Self) -> Self:
+        if self.design != FlightDesigns.RANDOM and self.correct_sample is not None:
+            raise ValueError("A correct sample can only be fixed for random designs.")
+        return self
+
+
 class SampleFlightTokenBaseSchema(TrianglerBaseSchema):
     token: str
     expiry_date: datetime
-    response_id: int
+    response_id: int | None = None
+    sample_flight_id: int
 
     @property
     def qr_code_svg(self: Self) -> bytes:
-        return token_utils.generate_qr_code_svg(self.token)
+        return qr_cache.get_qr_code(self.token, QRCodeFormats.SVG)
 
 
 class SampleFlightTokenInSchema(SampleFlightTokenBaseSchema, TrianglerBaseInSchema): ...
@@ -201,4 +459,59 @@ class ObservationSchema(TrianglerBaseSchema):
     def is_correct(self: Self) -> bool:
         if self.response is None:
             return False
-        return self.sample_flight.correct_sample == self.response.response_choice
+        return self.sample_flight.correct_sample == self.response.chosen_sample
+
+
+class LatencyStatsSchema(TrianglerBaseSchema):
+    count: PositiveInt
+    mean_ms: float | None
+    p50_ms: float | None
+    p95_ms: float | None
+    max_ms: float | None
+
+
+class QRRenderStatsSchema(TrianglerBaseSchema):
+    threads: PositiveInt
+    max_queue_depth: PositiveInt
+    queued: PositiveInt
+    running: PositiveInt
+    submitted: PositiveInt
+    completed: PositiveInt
+    failed: PositiveInt
+    rejected: PositiveInt
+    # views answered from the in-memory cache without queueing
+    memory_cache_hits: PositiveInt
+    queue_wait: LatencyStatsSchema
+    render_time: LatencyStatsSchema
+
+
+class TokenFilterStatsSchema(TrianglerBaseSchema):
+    # false until the filter has been built, every token is let through
+    ready: bool
+    tokens: PositiveInt
+    capacity: PositiveInt
+    bits: PositiveInt
+    hash_count: PositiveInt
+    memory_bytes: PositiveInt
+    false_positive_rate: float | None
+    lookups: PositiveInt
+    # tokens turned away without a database lookup
+    rejected: PositiveInt
+    # tokens let through that were not found in the database
+    false_positives: PositiveInt
+
+
+class PurgeRunSchema(TrianglerBaseSchema):
+    started_at: datetime
+    duration_ms: float
+    batches: PositiveInt
+    expired_tokens: PositiveInt
+    orphaned_flights: PositiveInt
+
+
+class PurgeStatsSchema(TrianglerBaseSchema):
+    runs: PositiveInt
+    failed_runs: PositiveInt
+    expired_tokens: PositiveInt
+    orphaned_flights: PositiveInt
+    last_run: PurgeRunSchema | None
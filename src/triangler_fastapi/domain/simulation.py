@@ -0,0 +1,32 @@
+"""Monte Carlo simulation of discrimination test panels.
+
+Each simulated panel draws how many tasters fall in each experience level from
+a multinomial, then how many of those answer correctly from a binomial with the
+level's probability of a correct answer. Drawing the per-level counts rather
+than individual tasters keeps every draw a whole-array operation whose memory
+is independent of panel size.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+from triangler_fastapi.domain import statistics
+
+
+def simulate_correct_counts(
+    n_simulations: int,
+    panel_size: int,
+    level_weights: npt.ArrayLike,
+    level_discriminator_proportions: npt.ArrayLike,
+    seed: np.random.SeedSequence | int | None = None,
+    p0: float = statistics.TRIANGLE_CHANCE_PROBABILITY,
+) -> npt.NDArray[np.int64]:
+    """Simulates panels and returns the number of correct answers in each."""
+    rng = np.random.default_rng(seed)
+    weights = np.asarray(level_weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    pc = statistics.proportion_correct(level_discriminator_proportions, p0=p0)
+
+    tasters_per_level = rng.multinomial(panel_size, weights, size=n_simulations)
+    correct_per_level = rng.binomial(tasters_per_level, pc)
+    return correct_per_level.sum(axis=1, dtype=np.int64)
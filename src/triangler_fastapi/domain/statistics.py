@@ -0,0 +1,381 @@
+"""Exact binomial statistics for sensory discrimination tests.
+
+Under the null hypothesis every taster is guessing, so the number of correct
+answers in a panel of ``n_total`` follows ``Binomial(n_total, p0)`` where ``p0``
+is the chance probability of the test (1/3 for triangle and tetrad tests, 1/2
+for duo-trio and 2-AFC tests). The p-value is the one-sided upper tail
+``P(X >= n_correct)``.
+
+The functions take arrays of ``(n_correct, n_total, p0)`` so that batches mixing
+test types are evaluated together. Tail probabilities and critical values are
+precomputed into memoized tables, one per chance probability, for panels up to
+``config.STATISTICS_TABLE_MAX_N`` so that lookups are O(1). Larger panels fall
+back to a single vectorized ``scipy.stats.binom`` call.
+
+Power is computed against the alternative that a proportion ``pd`` of tasters
+can truly discriminate, the rest guess, so the probability of a correct answer
+is ``pc = p0 + pd * (1 - p0)``.
+
+Bayesian estimates use a uniform Beta(1, 1) prior on the proportion correct,
+so the posterior after ``n_correct`` of ``n_total`` is
+``Beta(1 + n_correct, 1 + n_total - n_correct)``. Its quantiles are memoized in
+a bounded LRU cache keyed by the counts, and cache misses are computed together
+in one vectorized call.
+
+When many experiments are reported together their p-values are adjusted for
+multiple comparisons, with Benjamini-Hochberg (false discovery rate) and Holm
+(family-wise error rate). Both step through the p-values in rank order, so they
+share a single sort of the whole vector.
+
+The sequential probability ratio test (SPRT) compares that alternative against
+guessing after every response. Its log-likelihood ratio is linear in the counts,
+so it can be kept as a running total and updated in O(1) as responses arrive.
+"""
+
+from collections.abc import Sequence
+from functools import cache
+from functools import lru_cache
+
+import numpy as np
+import numpy.typing as npt
+from scipy import stats
+
+from triangler_fastapi import config
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.constants import SequentialDecisions
+from triangler_fastapi.domain.caching import LRUCache
+
+TRIANGLE_CHANCE_PROBABILITY = 1 / 3
+CHANCE_PROBABILITIES: dict[DiscriminationTests, float] = {
+    DiscriminationTests.TRIANGLE: TRIANGLE_CHANCE_PROBABILITY,
+    DiscriminationTests.DUO_TRIO: 1 / 2,
+    DiscriminationTests.TETRAD: 1 / 3,
+    DiscriminationTests.TWO_AFC: 1 / 2,
+}
+POSTERIOR_PRIOR = (1.0, 1.0)
+
+_credible_interval_cache: LRUCache[tuple[int, int, float], tuple[float, float]] = (
+    LRUCache(maxsize=config.POSTERIOR_CACHE_SIZE)
+)
+
+
+def chance_probabilities(
+    test_types: Sequence[DiscriminationTests],
+) -> npt.NDArray[np.float64]:
+    """Chance probability ``p0`` of each test type."""
+    return np.array([CHANCE_PROBABILITIES[x] for x in test_types], dtype=np.float64)
+
+
+def _validate_counts(
+    n_correct: npt.NDArray[np.int64], n_total: npt.NDArray[np.int64]
+) -> None:
+    if np.any(n_total < 0) or np.any(n_correct < 0):
+        raise ValueError("Counts must be non-negative.")
+    if np.any(n_correct > n_total):
+        raise ValueError("Number correct cannot exceed the number of responses.")
+
+
+@cache
+def _tail_probability_table(p0: float, max_n: int) -> npt.NDArray[np.float64]:
+    """Builds the table ``T[n, k] = P(X >= k | n, p0)`` for ``0 <= k <= n + 1``.
+
+    Entries with ``k > n`` are zero, which is also the true tail value.
+    """
+    n = np.arange(max_n + 1)[:, np.newaxis]
+    k = np.arange(max_n + 2)[np.newaxis, :]
+    table = np.where(k <= n, stats.binom.sf(k - 1, n, p0), 0.0)
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=32)
+def _critical_value_table(p0: float, alpha: float, max_n: int) -> npt.NDArray[np.int64]:
+    """Builds the minimum number correct needed for significance, for every n.
+
+    A value of ``n + 1`` means significance is not reachable with ``n`` tasters.
+    """
+    # the last column of each row is always zero, so argmax always finds a hit
+    table = np.argmax(_tail_probability_table(p0, max_n) <= alpha, axis=1)
+    table.setflags(write=False)
+    return table
+
+
+def p_values(
+    n_correct: npt.ArrayLike,
+    n_total: npt.ArrayLike,
+    p0: npt.ArrayLike = TRIANGLE_CHANCE_PROBABILITY,
+) -> npt.NDArray[np.float64]:
+    """Exact one-sided binomial p-values for arrays of counts and ``p0``."""
+    correct, total, chance = np.broadcast_arrays(
+        np.asarray(n_correct, dtype=np.int64),
+        np.asarray(n_total, dtype=np.int64),
+        np.asarray(p0, dtype=np.float64),
+    )
+    _validate_counts(correct, total)
+
+    max_n = config.STATISTICS_TABLE_MAX_N
+    in_table = total <= max_n
+    result = np.empty(correct.shape, dtype=np.float64)
+    # one table lookup per distinct chance probability, not per row
+    for p in np.unique(chance[in_table]).tolist():
+        rows = in_table & (chance == p)
+        result[rows] = _tail_probability_table(p, max_n)[total[rows], correct[rows]]
+    if not in_table.all():
+        beyond = ~in_table
+        result[beyond] = stats.binom.sf(
+            correct[beyond] - 1, total[beyond], chance[beyond]
+        )
+    return result
+
+
+def p_value(
+    n_correct: int, n_total: int, p0: float = TRIANGLE_CHANCE_PROBABILITY
+) -> float:
+    """Exact one-sided binomial p-value of ``n_correct`` out of ``n_total``."""
+    return float(p_values(n_correct, n_total, p0=p0))
+
+
+def critical_values(
+    n_total: npt.ArrayLike,
+    alpha: float = config.SIGNIFICANCE_LEVEL,
+    p0: npt.ArrayLike = TRIANGLE_CHANCE_PROBABILITY,
+) -> npt.NDArray[np.int64]:
+    """Minimum number of correct answers for significance at ``alpha``."""
+    total, chance = np.broadcast_arrays(
+        np.asarray(n_total, dtype=np.int64), np.asarray(p0, dtype=np.float64)
+    )
+    if np.any(total < 0):
+        raise ValueError("Counts must be non-negative.")
+
+    max_n = config.STATISTICS_TABLE_MAX_N
+    in_table = total <= max_n
+    result = np.empty(total.shape, dtype=np.int64)
+    for p in np.unique(chance[in_table]).tolist():
+        rows = in_table & (chance == p)
+        result[rows] = _critical_value_table(p, alpha, max_n)[total[rows]]
+    if not in_table.all():
+        beyond = ~in_table
+        # isf gives the smallest k with P(X > k) <= alpha, so k + 1 is the
+        # first count whose upper tail is at or below alpha
+        candidate = (
+            stats.binom.isf(alpha, total[beyond], chance[beyond]).astype(np.int64) + 1
+        )
+        result[beyond] = np.minimum(candidate, total[beyond] + 1)
+    return result
+
+
+def critical_value(
+    n_total: int,
+    alpha: float = config.SIGNIFICANCE_LEVEL,
+    p0: float = TRIANGLE_CHANCE_PROBABILITY,
+) -> int:
+    """Minimum number of correct answers out of ``n_total`` for significance."""
+    return int(critical_values(n_total, alpha=alpha, p0=p0))
+
+
+def is_significant(
+    n_correct: int,
+    n_total: int,
+    alpha: float = config.SIGNIFICANCE_LEVEL,
+    p0: float = TRIANGLE_CHANCE_PROBABILITY,
+) -> bool:
+    """Whether ``n_correct`` out of ``n_total`` is significant at ``alpha``."""
+    return n_total > 0 and n_correct >= critical_value(n_total, alpha=alpha, p0=p0)
+
+
+def proportion_correct(
+    discriminator_proportion: npt.ArrayLike,
+    p0: npt.ArrayLike = TRIANGLE_CHANCE_PROBABILITY,
+) -> npt.NDArray[np.float64]:
+    """Probability of a correct answer when a proportion of tasters discriminate."""
+    chance = np.asarray(p0, dtype=np.float64)
+    return chance + np.asarray(discriminator_proportion, dtype=np.float64) * (
+        1 - chance
+    )
+
+
+@lru_cache(maxsize=config.STATISTICS_POWER_CACHE_SIZE)
+def _power_curve(
+    discriminator_proportion: float, alpha: float, p0: float, max_n: int
+) -> npt.NDArray[np.float64]:
+    """Builds the power of the test for every panel size from 0 to ``max_n``."""
+    n_total = np.arange(max_n + 1)
+    k = critical_values(n_total, alpha=alpha, p0=p0)
+    pc = proportion_correct(discriminator_proportion, p0=p0)
+    curve = stats.binom.sf(k - 1, n_total, pc)
+    curve.setflags(write=False)
+    return curve
+
+
+def powers(
+    n_total: npt.ArrayLike,
+    discriminator_proportion: npt.ArrayLike,
+    alpha: float = config.SIGNIFICANCE_LEVEL,
+    p0: npt.ArrayLike = TRIANGLE_CHANCE_PROBABILITY,
+) -> npt.NDArray[np.float64]:
+    """Probability that panels of ``n_total`` reach significance at ``alpha``."""
+    total, pd, chance = np.broadcast_arrays(
+        np.asarray(n_total, dtype=np.int64),
+        np.asarray(discriminator_proportion, dtype=np.float64),
+        np.asarray(p0, dtype=np.float64),
+    )
+    k = critical_values(total, alpha=alpha, p0=chance)
+    return stats.binom.sf(k - 1, total, proportion_correct(pd, p0=chance))
+
+
+def power(
+    n_total: int,
+    discriminator_proportion: float,
+    alpha: float = config.SIGNIFICANCE_LEVEL,
+    p0: float = TRIANGLE_CHANCE_PROBABILITY,
+) -> float:
+    """Probability that a panel of ``n_total`` reaches significance at ``alpha``."""
+    if n_total < 0:
+        raise ValueError("Counts must be non-negative.")
+    max_n = config.STATISTICS_TABLE_MAX_N
+    if n_total <= max_n:
+        return float(_power_curve(discriminator_proportion, alpha, p0, max_n)[n_total])
+    return float(powers(n_total, discriminator_proportion, alpha=alpha, p0=p0))
+
+
+def required_sample_size(
+    discriminator_proportion: float,
+    alpha: float = config.SIGNIFICANCE_LEVEL,
+    beta: float = 0.2,
+    p0: float = TRIANGLE_CHANCE_PROBABILITY,
+) -> int | None:
+    """Smallest panel whose power is at least ``1 - beta``.
+
+    Returns None if no panel up to ``config.PLANNING_MAX_N`` is large enough.
+    """
+    for max_n in (config.STATISTICS_TABLE_MAX_N, config.PLANNING_MAX_N):
+        reaches_power = _power_curve(discriminator_proportion, alpha, p0, max_n) >= (
+            1 - beta
+        )
+        if reaches_power.any():
+            return int(np.argmax(reaches_power))
+    return None
+
+
+def posterior_parameters(
+    n_correct: npt.ArrayLike, n_total: npt.ArrayLike
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Beta posterior ``(alpha, beta)`` of the proportion correct."""
+    correct = np.asarray(n_correct, dtype=np.int64)
+    total = np.asarray(n_total, dtype=np.int64)
+    correct, total = np.broadcast_arrays(correct, total)
+    _validate_counts(correct, total)
+    prior_alpha, prior_beta = POSTERIOR_PRIOR
+    return prior_alpha + correct, prior_beta + total - correct
+
+
+def credible_intervals(
+    n_correct: npt.ArrayLike,
+    n_total: npt.ArrayLike,
+    level: float = config.CREDIBLE_INTERVAL_LEVEL,
+) -> npt.NDArray[np.float64]:
+    """Equal-tailed credible intervals of the proportion correct.
+
+    Returns an array with a trailing ``(lower, upper)`` axis.
+    """
+    correct, total = np.broadcast_arrays(
+        np.asarray(n_correct, dtype=np.int64), np.asarray(n_total, dtype=np.int64)
+    )
+    a, b = posterior_parameters(correct.ravel(), total.ravel())
+    keys = [
+        (x, y, level)
+        for x, y in zip(correct.ravel().tolist(), total.ravel().tolist(), strict=True)
+    ]
+    result = np.empty((len(keys), 2), dtype=np.float64)
+    misses: list[int] = []
+    for i, key in enumerate(keys):
+        cached = _credible_interval_cache.get(key)
+        if cached is None:
+            misses.append(i)
+        else:
+            result[i] = cached
+    if misses:
+        tail = (1 - level) / 2
+        result[misses] = stats.beta.ppf(
+            [tail, 1 - tail], a[misses, np.newaxis], b[misses, np.newaxis]
+        )
+        for i in misses:
+            _credible_interval_cache.put(
+                keys[i], (float(result[i, 0]), float(result[i, 1]))
+            )
+    return result.reshape(*correct.shape, 2)
+
+
+def discriminator_proportion(
+    proportion_correct: npt.ArrayLike, p0: npt.ArrayLike = TRIANGLE_CHANCE_PROBABILITY
+) -> npt.NDArray[np.float64]:
+    """Proportion of discriminators implied by a proportion correct.
+
+    For a triangle test this is ``(3 * pc - 1) / 2``, clipped to ``[0, 1]``.
+    """
+    pc = np.asarray(proportion_correct, dtype=np.float64)
+    chance = np.asarray(p0, dtype=np.float64)
+    return np.clip((pc - chance) / (1 - chance), 0.0, 1.0)
+
+
+def adjusted_p_values(
+    p_values: npt.ArrayLike,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Benjamini-Hochberg and Holm adjusted p-values for a family of tests.
+
+    Returns ``(bh, holm)`` in the order of ``p_values``.
+    """
+    p = np.asarray(p_values, dtype=np.float64).ravel()
+    m = p.size
+    order = np.argsort(p, kind="stable")
+    ranked = p[order]
+    rank = np.arange(1, m + 1)
+
+    # BH: the smallest m / j * p_(j) over ranks at or above each p
+    bh_ranked = np.minimum.accumulate((m / rank * ranked)[::-1])[::-1]
+    # Holm: the largest (m - j + 1) * p_(j) over ranks at or below each p
+    holm_ranked = np.maximum.accumulate((m - rank + 1) * ranked)
+
+    bh = np.empty(m)
+    holm = np.empty(m)
+    bh[order] = np.minimum(bh_ranked, 1.0)
+    holm[order] = np.minimum(holm_ranked, 1.0)
+    return bh, holm
+
+
+def log_likelihood_ratio(
+    n_correct: int,
+    n_total: int,
+    discriminator_proportion: float = config.SEQUENTIAL_DISCRIMINATOR_PROPORTION,
+    p0: float = TRIANGLE_CHANCE_PROBABILITY,
+) -> float:
+    """SPRT log-likelihood ratio of the counts, alternative over guessing.
+
+    The ratio is a sum over responses, so it also gives the change to a running
+    total for a change in the counts, including negative changes.
+    """
+    pc = float(proportion_correct(discriminator_proportion, p0=p0))
+    correct_step = np.log(pc / p0)
+    incorrect_step = np.log((1 - pc) / (1 - p0))
+    return float(n_correct * correct_step + (n_total - n_correct) * incorrect_step)
+
+
+def sequential_boundaries(
+    alpha: float = config.SEQUENTIAL_ALPHA, beta: float = config.SEQUENTIAL_BETA
+) -> tuple[float, float]:
+    """Wald's ``(lower, upper)`` stopping boundaries for the log-likelihood ratio."""
+    return float(np.log(beta / (1 - alpha))), float(np.log((1 - beta) / alpha))
+
+
+def sequential_decision(
+    log_likelihood: float,
+    alpha: float = config.SEQUENTIAL_ALPHA,
+    beta: float = config.SEQUENTIAL_BETA,
+) -> SequentialDecisions:
+    """Whether the running log-likelihood ratio has crossed a boundary."""
+    lower, upper = sequential_boundaries(alpha=alpha, beta=beta)
+    if log_likelihood >= upper:
+        return SequentialDecisions.ACCEPT_ALTERNATIVE
+    if log_likelihood <= lower:
+        return SequentialDecisions.ACCEPT_NULL
+    return SequentialDecisions.CONTINUE
@@ -0,0 +1,84 @@
+"""Helpers for responses that are written while they are being generated."""
+
+import zipfile
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Self
+
+from pydantic import BaseModel
+
+from triangler_fastapi import config
+
+
+class _ChunkBuffer:
+    """A write-only file that hands its contents back in chunks.
+
+    It has no ``tell`` or ``seek``, so ``zipfile`` writes each entry's sizes in a
+    data descriptor after its data instead of seeking back to the header.
+    """
+
+    def __init__(self: Self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self: Self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self: Self) -> None: ...
+
+    def drain(self: Self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries: Iterable[tuple[str, bytes, int]]) -> Iterator[bytes]:
+    """Yields a ZIP archive of ``(name, content, compress_type)`` entries.
+
+    Each entry is yielded as soon as it is written, so only one entry is held in
+    memory at a time however many there are.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode="w") as archive:  # pyright: ignore[reportArgumentType]
+        for name, content, compress_type in entries:
+            archive.writestr(name, content, compress_type=compress_type)
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _encoded_batches(
+    items: Iterable[BaseModel], batch_size: int
+) -> Iterator[list[bytes]]:
+    batch: list[bytes] = []
+    for item in items:
+        batch.append(item.model_dump_json().encode())
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_ndjson(
+    items: Iterable[BaseModel], batch_size: int = config.STREAMING_BATCH_SIZE
+) -> Iterator[bytes]:
+    """Yields newline-delimited JSON, one document per item, ``batch_size``
+    items at a time."""
+    for batch in _encoded_batches(items, batch_size):
+        yield b"\n".join(batch) + b"\n"
+
+
+def stream_json_array(
+    items: Iterable[BaseModel], batch_size: int = config.STREAMING_BATCH_SIZE
+) -> Iterator[bytes]:
+    """Yields a JSON array of the items, ``batch_size`` items at a time.
+
+    The opening bracket is yielded before the first item is read, so the
+    response starts as soon as it is returned.
+    """
+    yield b"["
+    separator = b""
+    for batch in _encoded_batches(items, batch_size):
+        yield separator + b",".join(batch)
+        separator = b","
+    yield b"]"
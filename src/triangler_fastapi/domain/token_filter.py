@@ -0,0 +1,120 @@
+"""In-process filter of the observation tokens that exist.
+
+Tokens submitted on the anonymous redemption path are checked against a Bloom
+filter first, so that typos and scanners are turned away without a database
+round trip. The filter is rebuilt from the token table at startup and then
+periodically, and tokens are added once the transaction creating them commits.
+Until the first rebuild every token is let through.
+
+Deleted tokens stay in the filter until the next rebuild, which only costs a
+false positive. The filter has no false negatives as long as every token is
+created by this process, so with more than one worker it is never built and
+lets every token through, see `token_filter_service.is_single_worker`.
+"""
+
+import threading
+from collections.abc import Iterable
+
+from loguru import logger
+
+from triangler_fastapi import config
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain.bloom import BloomFilter
+
+_lock = threading.Lock()
+_filter: BloomFilter | None = None
+# tokens created while a rebuild is streaming, replayed into the new filter
+_pending: list[str] | None = None
+_lookups = 0
+_rejected = 0
+_false_positives = 0
+
+
+def add(tokens: Iterable[str]) -> None:
+    """Adds newly created tokens."""
+    tokens = list(tokens)
+    with _lock:
+        if _filter is not None:
+            _filter.update(tokens)
+        if _pending is not None:
+            _pending.extend(tokens)
+
+
+def rebuild(tokens: Iterable[str]) -> None:
+    """Replaces the filter with one of ``tokens``, every token that exists.
+
+    Tokens added while ``tokens`` is consumed are carried over, so a token
+    created during a rebuild is never missed.
+    """
+    global _filter, _pending
+    with _lock:
+        _pending = []
+    try:
+        new_filter = BloomFilter(
+            capacity=config.TOKEN_FILTER_CAPACITY,
+            error_rate=config.TOKEN_FILTER_ERROR_RATE,
+        )
+        batch: list[str] = []
+        for token in tokens:
+            batch.append(token)
+            if len(batch) >= config.STREAMING_BATCH_SIZE:
+                new_filter.update(batch)
+                batch.clear()
+        new_filter.update(batch)
+        with _lock:
+            new_filter.update(_pending)
+            _filter = new_filter
+    finally:
+        with _lock:
+            _pending = None
+    logger.info(f"Rebuilt token filter with {new_filter.item_count} tokens.")
+    if new_filter.item_count > new_filter.capacity:
+        logger.warning(
+            f"Token filter holds {new_filter.item_count} tokens, over its capacity "
+            f"of {new_filter.capacity}, raise TOKEN_FILTER_CAPACITY."
+        )
+
+
+def might_exist(token: str) -> bool:
+    """Whether a token may exist, ``False`` means it definitely does not."""
+    global _lookups, _rejected
+    current = _filter
+    present = current is None or token in current
+    with _lock:
+        _lookups += 1
+        _rejected += not present
+    return present
+
+
+def record_false_positive() -> None:
+    """Counts a token the filter let through that turned out not to exist."""
+    global _false_positives
+    with _lock:
+        _false_positives += 1
+
+
+def reset() -> None:
+    """Drops the filter and its counters, letting every token through."""
+    global _filter, _lookups, _rejected, _false_positives
+    with _lock:
+        _filter = None
+        _lookups = _rejected = _false_positives = 0
+
+
+def get_stats() -> schemas.TokenFilterStatsSchema:
+    """Gets the size, expected false-positive rate and counters of the filter."""
+    with _lock:
+        current = _filter
+        lookups, rejected, false_positives = _lookups, _rejected, _false_positives
+    return schemas.TokenFilterStatsSchema(
+        ready=current is not None,
+        tokens=current.item_count if current else 0,
+        capacity=current.capacity if current else config.TOKEN_FILTER_CAPACITY,
+        bits=current.bit_count if current else 0,
+        hash_count=current.hash_count if current else 0,
+        memory_bytes=current.memory_bytes if current else 0,
+        false_positive_rate=current.false_positive_rate if current else None,
+        lookups=lookups,
+        rejected=rejected,
+        false_positives=false_positives,
+    )
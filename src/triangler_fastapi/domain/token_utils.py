@@ -1,38 +1,128 @@
+import base64
+import hashlib
+import hmac
+import io
 import secrets
+import struct
+import time
 from datetime import datetime
 from datetime import timedelta
 
 import qrcode
 from qrcode.image.styledpil import StyledPilImage
 from qrcode.image.styles.moduledrawers.pil import RoundedModuleDrawer
+from qrcode.image.styles.moduledrawers.svg import SvgPathCircleDrawer
 from qrcode.image.svg import SvgPathImage
 
 from triangler_fastapi.config import HOST_NAME
 from triangler_fastapi.config import OBSERVATION_TOKEN_EXPIRY_DAYS
 from triangler_fastapi.config import OBSERVATION_TOKEN_LENGTH
+from triangler_fastapi.config import OBSERVATION_TOKEN_SECRET
+from triangler_fastapi.config import QR_CODE_BOX_SIZE
+from triangler_fastapi.config import QR_CODE_RASTERIZER
+from triangler_fastapi.constants import QRCodeFormats
+from triangler_fastapi.constants import QRCodeRasterizers
+from triangler_fastapi.domain import qr_raster
+from triangler_fastapi.exceptions import errors
+
+# Signed tokens are "s." and the unpadded URL-safe base64 of the sample flight
+# id and expiry as big-endian uint32s, followed by the first 12 bytes of their
+# HMAC-SHA256. That is 29 characters, within the 32 of the token column. "."
+# is not in the base64 alphabet, so they can't be confused with random tokens.
+SIGNED_TOKEN_PREFIX = "s."  # noqa: S105
+_SIGNED_PAYLOAD = struct.Struct(">II")
+_SIGNATURE_SIZE = 12
+_SIGNED_TOKEN_SIZE = _SIGNED_PAYLOAD.size + _SIGNATURE_SIZE
 
 
 def generate_unique_token() -> str:
     return secrets.token_urlsafe(OBSERVATION_TOKEN_LENGTH)
 
 
+def _signature(payload: bytes) -> bytes:
+    digest = hmac.new(OBSERVATION_TOKEN_SECRET.encode(), payload, hashlib.sha256)
+    return digest.digest()[:_SIGNATURE_SIZE]
+
+
+def generate_signed_token(sample_flight_id: int, expiry_date: datetime) -> str:
+    """Signs a token that resolves to ``sample_flight_id`` until ``expiry_date``.
+
+    Expiry dates are naive local times, like those of `calculate_expiry_date`.
+    """
+    payload = _SIGNED_PAYLOAD.pack(sample_flight_id, int(expiry_date.timestamp()))
+    encoded = base64.urlsafe_b64encode(payload + _signature(payload))
+    return SIGNED_TOKEN_PREFIX + encoded.decode().rstrip("=")
+
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith(SIGNED_TOKEN_PREFIX)
+
+
+def verify_signed_token(token: str) -> int:
+    """Checks a signed token without the database and returns its sample flight id.
+
+    Raises `InvalidTokenError` for a malformed or forged token and
+    `ExpiredTokenError` once it has expired.
+    """
+    if not is_signed_token(token):
+        raise errors.InvalidTokenError("Observation token is not signed.")
+    encoded = token.removeprefix(SIGNED_TOKEN_PREFIX)
+    try:
+        data = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+    except ValueError as e:
+        raise errors.InvalidTokenError("Observation token is malformed.") from e
+    # the decoder skips stray characters and the last character has spare bits,
+    # so only the one canonical encoding is accepted
+    if (
+        len(data) != _SIGNED_TOKEN_SIZE
+        or base64.urlsafe_b64encode(data).decode().rstrip("=") != encoded
+    ):
+        raise errors.InvalidTokenError("Observation token is malformed.")
+    payload, signature = data[: _SIGNED_PAYLOAD.size], data[_SIGNED_PAYLOAD.size :]
+    if not hmac.compare_digest(signature, _signature(payload)):
+        raise errors.InvalidTokenError("Observation token signature is invalid.")
+    sample_flight_id, expires_at = _SIGNED_PAYLOAD.unpack(payload)
+    if expires_at <= time.time():
+        raise errors.ExpiredTokenError("Observation token has expired.")
+    return sample_flight_id
+
+
 def calculate_expiry_date(n_days: int = OBSERVATION_TOKEN_EXPIRY_DAYS) -> datetime:
     return datetime.now() + timedelta(days=n_days)
 
 
-def generate_qr_code_svg(token: str) -> bytes:
+def generate_qr_code_svg(token: str, size: int = QR_CODE_BOX_SIZE) -> bytes:
     qrcode_url = f"https://{HOST_NAME}/observation/response/{token}"
-    qr = qrcode.QRCode(error_correction=qrcode.ERROR_CORRECT_H)
+    qr = qrcode.QRCode(error_correction=qrcode.ERROR_CORRECT_H, box_size=size)
     qr.add_data(qrcode_url)
     return qr.make_image(
-        image_factory=SvgPathImage, module_drawer=RoundedModuleDrawer
+        image_factory=SvgPathImage, module_drawer=SvgPathCircleDrawer()
     ).to_string()
 
 
-def generate_qr_code_png(token: str) -> StyledPilImage:
+def generate_qr_code_png(token: str, size: int = QR_CODE_BOX_SIZE) -> StyledPilImage:
     qrcode_url = f"https://{HOST_NAME}/observation/response/{token}"
-    qr = qrcode.QRCode(error_correction=qrcode.ERROR_CORRECT_H)
+    qr = qrcode.QRCode(error_correction=qrcode.ERROR_CORRECT_H, box_size=size)
     qr.add_data(qrcode_url)
     return qr.make_image(
-        image_factory=StyledPilImage, module_drawer=RoundedModuleDrawer
+        image_factory=StyledPilImage, module_drawer=RoundedModuleDrawer()
     )
+
+
+def render_qr_code(
+    token: str, qr_format: QRCodeFormats, size: int = QR_CODE_BOX_SIZE
+) -> bytes:
+    """Renders the QR code of a token to the bytes of an image file.
+
+    PNGs are drawn by the rasterizer chosen with ``config.QR_CODE_RASTERIZER``,
+    both give the same picture.
+    """
+    if qr_format == QRCodeFormats.SVG:
+        return generate_qr_code_svg(token, size=size)
+    if QR_CODE_RASTERIZER == QRCodeRasterizers.NUMPY:
+        return qr_raster.render_png(
+            f"https://{HOST_NAME}/observation/response/{token}", box_size=size
+        )
+    buffer = io.BytesIO()
+    generate_qr_code_png(token, size=size).save(buffer)
+    return buffer.getvalue()
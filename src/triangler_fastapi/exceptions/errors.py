@@ -17,9 +17,41 @@ class InvalidTokenError(TrianglerBaseError):
     """Raised when a token is invalid."""
 
 
+class ExpiredTokenError(InvalidTokenError):
+    """Raised when a token was valid but has expired."""
+
+
+class InvalidCursorError(TrianglerBaseError):
+    """Raised when a pagination cursor is invalid."""
+
+
 class ObjectNotFoundError(TrianglerBaseError):
     """Raised when an object is not found."""
 
 
 class ObjectAlreadyExistsError(TrianglerBaseError):
     """Raised when an object already exists."""
+
+
+class InvalidSampleError(TrianglerBaseError):
+    """Raised when a sample name is not served in an experiment's test type."""
+
+
+class InvalidDateRangeError(TrianglerBaseError):
+    """Raised when an update would make an experiment start after it ends."""
+
+
+class UnsupportedDesignError(TrianglerBaseError):
+    """Raised when a serving design is not available for a test type."""
+
+
+class OperationTimedOutError(TrianglerBaseError):
+    """Raised when a long running operation exceeds its time limit."""
+
+
+class WorkerUnavailableError(TrianglerBaseError):
+    """Raised when a worker process died and its work was lost."""
+
+
+class ServiceOverloadedError(TrianglerBaseError):
+    """Raised when a bounded work queue is full and new work is turned away."""
@@ -0,0 +1,74 @@
+import asyncio
+from collections.abc import AsyncIterator
+from functools import partial
+
+from triangler_fastapi import config
+from triangler_fastapi import workers
+from triangler_fastapi.domain import ballots
+from triangler_fastapi.domain.repositories import ExperimentRepository
+from triangler_fastapi.domain.repositories import SampleFlightTokenRepository
+from triangler_fastapi.services import experiment_service
+
+BALLOTS_PER_SHEET = config.BALLOT_SHEET_COLUMNS * config.BALLOT_SHEET_ROWS
+
+
+def get_outstanding_ballots(
+    *,
+    id: int,
+    experiment_repository: ExperimentRepository,
+    token_repository: SampleFlightTokenRepository,
+) -> list[ballots.Ballot]:
+    """Gets a ballot for every unanswered, unexpired token of an experiment."""
+    experiment_service.get_experiment_by_id(id=id, repository=experiment_repository)
+    return [
+        (token, f"Flight {sample_flight_id}")
+        for token, sample_flight_id in token_repository.get_outstanding(id)
+    ]
+
+
+def count_sheets(ballot_count: int) -> int:
+    """The number of sheets needed to print ``ballot_count`` ballots."""
+    return -(-ballot_count // BALLOTS_PER_SHEET)
+
+
+def _sheet(all_ballots: list[ballots.Ballot], page: int) -> list[ballots.Ballot]:
+    start = (page - 1) * BALLOTS_PER_SHEET
+    return all_ballots[start : start + BALLOTS_PER_SHEET]
+
+
+def render_sheet_png(*, all_ballots: list[ballots.Ballot], page: int) -> bytes:
+    """Renders one sheet, numbered from 1, as a PNG."""
+    return ballots.render_sheet_png(_sheet(all_ballots, page))
+
+
+async def stream_sheets_pdf(
+    *, all_ballots: list[ballots.Ballot]
+) -> AsyncIterator[bytes]:
+    """Renders every sheet across the process pool and yields a PDF as it is built.
+
+    All sheets are submitted up front and written in page order, so each page is
+    sent as soon as it and the pages before it are done. Sheets that have not
+    started are cancelled if the client goes away.
+    """
+    page_count = count_sheets(len(all_ballots))
+    render_tasks = [
+        partial(ballots.render_sheet_pixels, _sheet(all_ballots, page))
+        for page in range(1, page_count + 1)
+    ]
+    if len(render_tasks) == 1:
+        pending = [asyncio.ensure_future(asyncio.to_thread(render_tasks[0]))]
+    else:
+        loop = asyncio.get_running_loop()
+        pool = workers.get_process_pool()
+        pending = [loop.run_in_executor(pool, x) for x in render_tasks]
+
+    writer = ballots.PdfStreamWriter()
+    try:
+        yield writer.start()
+        for future in pending:
+            width, height, pixels = await future
+            yield writer.add_page(width, height, pixels)
+        yield writer.finish()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -1,17 +1,26 @@
 from loguru import logger
 from sqlalchemy.exc import NoResultFound
 
+from triangler_fastapi import config
+from triangler_fastapi.domain import pagination
 from triangler_fastapi.domain import schemas
 from triangler_fastapi.domain.repositories import ExperimentRepository
 from triangler_fastapi.exceptions import errors
 
 
-def get_all_experiments(
-    *, repository: ExperimentRepository
-) -> list[schemas.ExperimentOutSchema]:
-    """Gets all experiemnts from the database."""
-    results = repository.get_all()
-    return results
+def get_experiments_page(
+    *,
+    repository: ExperimentRepository,
+    cursor: str | None = None,
+    limit: int = config.PAGE_SIZE_DEFAULT,
+) -> tuple[list[schemas.ExperimentOutSchema], str | None]:
+    """Gets a page of experiments, newest first, and the cursor of the next page.
+
+    Raises `InvalidCursorError` for a cursor that was not returned by this.
+    """
+    after_id = None if cursor is None else pagination.decode_cursor(cursor)
+    results, next_id = repository.get_page(limit=limit, after_id=after_id)
+    return results, None if next_id is None else pagination.encode_cursor(next_id)
 
 
 def get_experiment_by_id(
@@ -27,6 +36,18 @@ def get_experiment_by_id(
         raise errors.ObjectNotFoundError(message=error_message) from e
 
 
+def get_experiment_detail_by_id(
+    *, id: int, repository: ExperimentRepository
+) -> schemas.ExperimentDetailSchema:
+    """Gets an experiment by its id, along with its sequential analysis."""
+    experiment = get_experiment_by_id(id=id, repository=repository)
+    stats = repository.get_stats(id)
+    return schemas.ExperimentDetailSchema(
+        **experiment.model_dump(),
+        sequential_analysis=schemas.SequentialAnalysisSchema.from_stats(stats),
+    )
+
+
 def create_experiment(
     *, data: schemas.ExperimentInSchema, repository: ExperimentRepository
 ) -> schemas.ExperimentOutSchema:
@@ -41,20 +62,54 @@ def update_experiment(
     update_data: schemas.ExperimentUpdateSchema,
     repository: ExperimentRepository,
 ) -> schemas.ExperimentOutSchema:
-    """Updates an experiment."""
+    """Updates the fields of an experiment that are given, leaving the rest.
+
+    Fields sent as null are left as they are, every column is required.
+    """
+    values = update_data.model_dump(exclude_unset=True, exclude_none=True)
     try:
-        existing_data = repository.get_by_id(id=id)
-    except NoResultFound:
+        result = repository.update_fields(id, values)
+    except NoResultFound as e:
         error_message = f"Experiment with id {id} not found."
         logger.error(error_message)
-        raise errors.ObjectNotFoundError(message=error_message)
-
-    existing_data.name = update_data.name or existing_data.name
-    existing_data.description = update_data.description or existing_data.description
-    existing_data.start_on = update_data.start_on or existing_data.start_on
-    existing_data.end_on = update_data.end_on or existing_data.end_on
-    updated_model_schema = repository.update(data=existing_data)
-    return updated_model_schema
+        raise errors.ObjectNotFoundError(message=error_message) from e
+    if result is None:
+        error_message = (
+            f"Experiment with id {id} would start after it ends, "
+            "start date must be before or equal to end date."
+        )
+        logger.error(error_message)
+        raise errors.InvalidDateRangeError(message=error_message)
+    return result
+
+
+def create_experiments(
+    *, data: list[schemas.ExperimentInSchema], repository: ExperimentRepository
+) -> list[schemas.ExperimentOutSchema]:
+    """Creates many experiments in one transaction."""
+    return repository.bulk_create(data)
+
+
+def update_experiments(
+    *,
+    data: list[schemas.ExperimentBatchUpdateSchema],
+    repository: ExperimentRepository,
+) -> list[schemas.ExperimentOutSchema]:
+    """Updates many experiments in one transaction, or none if any is missing."""
+    try:
+        return repository.bulk_update(data)
+    except NoResultFound as e:
+        logger.error(str(e))
+        raise errors.ObjectNotFoundError(message=str(e)) from e
+
+
+def delete_experiments(*, ids: list[int], repository: ExperimentRepository) -> int:
+    """Deletes many experiments in one transaction, or none if any is missing."""
+    try:
+        return repository.bulk_delete(ids)
+    except NoResultFound as e:
+        logger.error(str(e))
+        raise errors.ObjectNotFoundError(message=str(e)) from e
 
 
 def delete_experiment(*, id: int, repository: ExperimentRepository) -> bool:
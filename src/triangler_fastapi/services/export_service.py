@@ -0,0 +1,97 @@
+import zipfile
+from collections.abc import Iterable
+from collections.abc import Iterator
+
+from pydantic import BaseModel
+
+from triangler_fastapi.constants import ExportFormats
+from triangler_fastapi.constants import QRCodeFormats
+from triangler_fastapi.data import models
+from triangler_fastapi.data import persistence
+from triangler_fastapi.domain import qr_cache
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import streaming
+from triangler_fastapi.domain.repositories import ExperimentRepository
+from triangler_fastapi.domain.repositories import SampleFlightRepository
+from triangler_fastapi.domain.repositories import SampleFlightTokenRepository
+
+MEDIA_TYPES = {
+    ExportFormats.NDJSON: "application/x-ndjson",
+    ExportFormats.JSON: "application/json",
+}
+
+# PNG data is already deflated, compressing it again only costs time
+_COMPRESS_TYPES = {
+    QRCodeFormats.SVG: zipfile.ZIP_DEFLATED,
+    QRCodeFormats.PNG: zipfile.ZIP_STORED,
+}
+
+
+def stream_qr_code_zip(
+    *, experiment_id: int, qr_format: QRCodeFormats = QRCodeFormats.SVG
+) -> Iterator[bytes]:
+    """Yields a ZIP of the QR code of every token of an experiment.
+
+    The response outlives the request's session, so this opens its own and
+    reads the tokens through a server-side cursor.
+    """
+    with persistence.SessionLocal() as session:
+        repository = SampleFlightTokenRepository(
+            session=session,
+            data_model=models.SampleFlightToken,
+            schema_in=schemas.SampleFlightTokenInSchema,
+            schema_out=schemas.SampleFlightTokenOutSchema,
+        )
+        entries = (
+            (
+                f"flight-{sample_flight_id}-{token}.{qr_format.value}",
+                qr_cache.get_qr_code(token, qr_format),
+                _COMPRESS_TYPES[qr_format],
+            )
+            for token, sample_flight_id in repository.iter_for_experiment(experiment_id)
+        )
+        yield from streaming.stream_zip(entries)
+
+
+def _stream_items(
+    items: Iterable[BaseModel], export_format: ExportFormats
+) -> Iterator[bytes]:
+    if export_format == ExportFormats.NDJSON:
+        return streaming.stream_ndjson(items)
+    return streaming.stream_json_array(items)
+
+
+def stream_experiments(
+    *, export_format: ExportFormats = ExportFormats.NDJSON
+) -> Iterator[bytes]:
+    """Yields every experiment as NDJSON or a JSON array, as it is read.
+
+    Like `stream_qr_code_zip`, this opens its own session and reads through a
+    server-side cursor.
+    """
+    with persistence.SessionLocal() as session:
+        repository = ExperimentRepository(
+            session=session,
+            data_model=models.Experiment,
+            schema_in=schemas.ExperimentInSchema,
+            schema_out=schemas.ExperimentOutSchema,
+        )
+        yield from _stream_items(repository.iter_all(), export_format)
+
+
+def stream_sample_flights(
+    *, experiment_id: int, export_format: ExportFormats = ExportFormats.NDJSON
+) -> Iterator[bytes]:
+    """Yields the sample flights of an experiment, with their responses, as
+    NDJSON or a JSON array, as they are read."""
+    with persistence.SessionLocal() as session:
+        repository = SampleFlightRepository(
+            session=session,
+            data_model=models.SampleFlight,
+            schema_in=schemas.SampleFlightInSchema,
+            schema_out=schemas.SampleFlightOutSchema,
+        )
+        yield from _stream_items(
+            repository.iter_all(models.SampleFlight.experiment_id == experiment_id),
+            export_format,
+        )
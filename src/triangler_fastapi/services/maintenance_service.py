@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from datetime import date
+from datetime import datetime
+
+from loguru import logger
+
+from triangler_fastapi import config
+from triangler_fastapi.data import models
+from triangler_fastapi.data import persistence
+from triangler_fastapi.domain import qr_cache
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain.repositories import SampleFlightRepository
+from triangler_fastapi.domain.repositories import SampleFlightTokenRepository
+from triangler_fastapi.services import token_filter_service
+
+_lock = threading.Lock()
+_runs = 0
+_failed_runs = 0
+_expired_tokens = 0
+_orphaned_flights = 0
+_last_run: schemas.PurgeRunSchema | None = None
+
+
+def _record_run(run: schemas.PurgeRunSchema) -> None:
+    global _runs, _expired_tokens, _orphaned_flights, _last_run
+    with _lock:
+        _runs += 1
+        _expired_tokens += run.expired_tokens
+        _orphaned_flights += run.orphaned_flights
+        _last_run = run
+
+
+def _record_failure() -> None:
+    global _failed_runs
+    with _lock:
+        _failed_runs += 1
+
+
+def purge(
+    *,
+    batch_size: int = config.PURGE_BATCH_SIZE,
+    pause: float = config.PURGE_BATCH_PAUSE_SECONDS,
+) -> schemas.PurgeRunSchema:
+    """Deletes expired tokens and the unanswered flights of closed experiments.
+
+    Rows are deleted ``batch_size`` at a time, each batch in its own short
+    transaction with a ``pause`` after it, so that writers are never locked out
+    for long. Cached QR codes of deleted tokens are discarded.
+    """
+    started_at = datetime.now()
+    start = time.perf_counter()
+    batches = expired_tokens = orphaned_flights = 0
+    with persistence.SessionLocal() as session:
+        flight_repository = SampleFlightRepository(
+            session=session,
+            data_model=models.SampleFlight,
+            schema_in=schemas.SampleFlightInSchema,
+            schema_out=schemas.SampleFlightOutSchema,
+        )
+        token_repository = SampleFlightTokenRepository(
+            session=session,
+            data_model=models.SampleFlightToken,
+            schema_in=schemas.SampleFlightTokenInSchema,
+            schema_out=schemas.SampleFlightTokenOutSchema,
+        )
+        while True:
+            tokens = token_repository.purge_expired(started_at, batch_size)
+            expired_tokens += len(tokens)
+            batches += 1
+            for token in tokens:
+                qr_cache.discard_qr_codes(token)
+            if len(tokens) < batch_size:
+                break
+            time.sleep(pause)
+        while True:
+            flights, tokens = flight_repository.purge_unanswered(
+                date.today(), batch_size
+            )
+            orphaned_flights += flights
+            expired_tokens += len(tokens)
+            batches += 1
+            for token in tokens:
+                qr_cache.discard_qr_codes(token)
+            if flights < batch_size:
+                break
+            time.sleep(pause)
+
+    run = schemas.PurgeRunSchema(
+        started_at=started_at,
+        duration_ms=(time.perf_counter() - start) * 1000,
+        batches=batches,
+        expired_tokens=expired_tokens,
+        orphaned_flights=orphaned_flights,
+    )
+    _record_run(run)
+    logger.info(
+        f"Purged {expired_tokens} tokens and {orphaned_flights} unanswered flights "
+        f"in {batches} batches."
+    )
+    if expired_tokens:
+        # drop the purged tokens from the filter rather than wait for its rebuild
+        token_filter_service.rebuild_token_filter()
+    return run
+
+
+async def keep_purging(interval: float = config.PURGE_INTERVAL_SECONDS) -> None:
+    """Purges now and then every ``interval`` seconds. Runs until cancelled."""
+    while True:
+        try:
+            await asyncio.to_thread(purge)
+        except Exception:
+            _record_failure()
+            logger.exception("Failed to purge expired tokens.")
+        await asyncio.sleep(interval)
+
+
+def get_stats() -> schemas.PurgeStatsSchema:
+    """Gets the rows purged by the last run and since startup."""
+    with _lock:
+        return schemas.PurgeStatsSchema(
+            runs=_runs,
+            failed_runs=_failed_runs,
+            expired_tokens=_expired_tokens,
+            orphaned_flights=_orphaned_flights,
+            last_run=_last_run,
+        )
@@ -1,11 +1,27 @@
+from collections.abc import Iterable
+from datetime import datetime
 from typing import Literal
 
 from loguru import logger
+from sqlalchemy import ColumnElement
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.exc import NoResultFound
 
+from triangler_fastapi import config
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.constants import FlightDesigns
+from triangler_fastapi.constants import ObservationTokenFormats
+from triangler_fastapi.data import models
+from triangler_fastapi.domain import designs
+from triangler_fastapi.domain import pagination
 from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import token_filter
+from triangler_fastapi.domain import token_utils
 from triangler_fastapi.domain.repositories import ExperimentRepository
+from triangler_fastapi.domain.repositories import ResponseRepository
 from triangler_fastapi.domain.repositories import SampleFlightRepository
+from triangler_fastapi.domain.repositories import SampleFlightTokenRepository
 from triangler_fastapi.exceptions import errors
 
 
@@ -24,26 +40,227 @@ def get_sample_flight_by_id(
     return sample_flight
 
 
+def ensure_valid_samples(
+    test_type: DiscriminationTests, samples: Iterable[str | None]
+) -> None:
+    """Raises `InvalidSampleError` if any of ``samples`` is not served in a test
+    of ``test_type``, e.g. a "C" in a duo-trio test."""
+    allowed = designs.sample_names(test_type)
+    invalid = sorted({x for x in samples if x is not None}.difference(allowed))
+    if invalid:
+        error_message = (
+            f"Samples {', '.join(invalid)} are not served in {test_type.value} "
+            f"tests, which use samples {', '.join(allowed)}."
+        )
+        logger.error(error_message)
+        raise errors.InvalidSampleError(message=error_message)
+
+
+def _get_test_type(
+    experiment_id: int, experiment_repository: ExperimentRepository
+) -> DiscriminationTests:
+    try:
+        return experiment_repository.get_by_id(id=experiment_id).test_type
+    except NoResultFound as e:
+        error_message = f"Experiment with id {experiment_id} not found."
+        logger.error(error_message)
+        raise errors.ObjectNotFoundError(message=error_message) from e
+
+
 def create_new_sample_flight_for_experiment(
     *,
     experiment_id: int,
     experiment_repository: ExperimentRepository,
     sample_flight_repository: SampleFlightRepository,
-    correct_sample: Literal["A", "B", "C"] | None = None,
+    correct_sample: Literal["A", "B", "C", "D"] | None = None,
 ) -> schemas.SampleFlightOutSchema:
     """Creates a new sample flight with no response for the specified experiment."""
-    experiment = experiment_repository.get_by_id(id=experiment_id)
-    if experiment is None:
-        raise ValueError(f"Experiment with id {experiment_id} not found.")
+    test_type = _get_test_type(experiment_id, experiment_repository)
+    ensure_valid_samples(test_type, [correct_sample])
 
     sample_flight_data = schemas.SampleFlightInSchema.new(
-        experiment_id=experiment_id, correct_sample=correct_sample
+        experiment_id=experiment_id, correct_sample=correct_sample, test_type=test_type
     )
     sample_flight = sample_flight_repository.create(data=sample_flight_data)
 
     return sample_flight
 
 
+def mint_unique_tokens(
+    count: int, *, token_repository: SampleFlightTokenRepository
+) -> list[str]:
+    """Draws ``count`` tokens that are not yet taken.
+
+    The whole batch is checked against the token index in one query, and only
+    tokens that collide, with an existing token or within the batch, are
+    redrawn and checked again.
+    """
+    tokens: set[str] = set()
+    for _ in range(config.TOKEN_MINT_MAX_ATTEMPTS):
+        candidates = {
+            token_utils.generate_unique_token() for _ in range(count - len(tokens))
+        } - tokens
+        tokens |= candidates - token_repository.get_existing_tokens(candidates)
+        if len(tokens) == count:
+            return list(tokens)
+    error_message = (
+        f"Could not mint {count} unique tokens "
+        f"in {config.TOKEN_MINT_MAX_ATTEMPTS} attempts."
+    )
+    logger.error(error_message)
+    raise errors.ObjectAlreadyExistsError(message=error_message)
+
+
+def create_sample_flights_with_tokens(
+    *,
+    experiment_id: int,
+    data: schemas.SampleFlightBatchInSchema,
+    experiment_repository: ExperimentRepository,
+    sample_flight_repository: SampleFlightRepository,
+    token_repository: SampleFlightTokenRepository,
+) -> list[schemas.ObservationAwaitingResponseSchema]:
+    """Creates a batch of sample flights for an experiment, each with a fresh
+    observation token, in a single transaction.
+
+    A balanced design serves each triangle serving order equally often, see
+    `domain.designs`, and is only available for triangle tests.
+    """
+    try:
+        experiment = experiment_repository.get_by_id(id=experiment_id)
+    except NoResultFound as e:
+        error_message = f"Experiment with id {experiment_id} not found."
+        logger.error(error_message)
+        raise errors.ObjectNotFoundError(message=error_message) from e
+
+    serving_orders = None
+    if data.design == FlightDesigns.BALANCED:
+        if experiment.test_type != DiscriminationTests.TRIANGLE:
+            error_message = (
+                f"Balanced designs are not available for {experiment.test_type.value} "
+                "tests."
+            )
+            logger.error(error_message)
+            raise errors.UnsupportedDesignError(message=error_message)
+        orders, odd_samples = designs.balanced_triangle_design(data.count)
+        serving_orders, correct_samples = orders.tolist(), odd_samples.tolist()
+    else:
+        ensure_valid_samples(experiment.test_type, [data.correct_sample])
+        correct_samples = [
+            schemas.SampleFlightInSchema.new(
+                experiment_id=experiment_id,
+                correct_sample=data.correct_sample,
+                test_type=experiment.test_type,
+            ).correct_sample
+            for _ in range(data.count)
+        ]
+    if config.OBSERVATION_TOKEN_FORMAT == ObservationTokenFormats.SIGNED:
+        return sample_flight_repository.create_many_with_tokens(
+            experiment_id,
+            correct_samples,
+            None,
+            expiry_date=token_utils.calculate_expiry_date(),
+            serving_orders=serving_orders,
+        )
+    tokens = mint_unique_tokens(data.count, token_repository=token_repository)
+    for _ in range(config.TOKEN_MINT_MAX_ATTEMPTS):
+        try:
+            return sample_flight_repository.create_many_with_tokens(
+                experiment_id,
+                correct_samples,
+                tokens,
+                expiry_date=token_utils.calculate_expiry_date(),
+                serving_orders=serving_orders,
+            )
+        except IntegrityError:
+            # another request took some of the tokens after they were checked
+            taken = token_repository.get_existing_tokens(tokens)
+            if not taken:
+                raise
+            logger.warning(f"Redrawing {len(taken)} tokens taken while minting.")
+            redrawn = iter(
+                mint_unique_tokens(len(taken), token_repository=token_repository)
+            )
+            tokens = [next(redrawn) if x in taken else x for x in tokens]
+    error_message = (
+        f"Could not create {data.count} sample flights with unique tokens "
+        f"in {config.TOKEN_MINT_MAX_ATTEMPTS} attempts."
+    )
+    logger.error(error_message)
+    raise errors.ObjectAlreadyExistsError(message=error_message)
+
+
+def resolve_token(token: str, *, token_repository: SampleFlightTokenRepository) -> int:
+    """Gets the sample flight id an observation token is for.
+
+    Signed tokens are checked in memory, and random tokens are only looked up
+    when the token filter says they may exist.
+    Raises `InvalidTokenError` for an unknown token and `ExpiredTokenError`
+    for an expired one.
+    """
+    if token_utils.is_signed_token(token):
+        return token_utils.verify_signed_token(token)
+    if not token_filter.might_exist(token):
+        raise errors.InvalidTokenError("Observation token not found.")
+    row = token_repository.resolve(token)
+    if row is None:
+        token_filter.record_false_positive()
+        raise errors.InvalidTokenError("Observation token not found.")
+    # expiry dates are naive local times, see `token_utils`
+    if row.expiry_date <= datetime.now():
+        raise errors.ExpiredTokenError("Observation token has expired.")
+    return row.sample_flight_id
+
+
+def redeem_token(
+    token: str,
+    *,
+    data: schemas.TokenResponseInSchema,
+    sample_flight_repository: SampleFlightRepository,
+    response_repository: ResponseRepository,
+    token_repository: SampleFlightTokenRepository,
+) -> schemas.ResponseOutSchema:
+    """Records an anonymous taster's response to the ballot of a token.
+
+    Invalid and expired signed tokens are turned away before any query. Raises
+    `ObjectAlreadyExistsError` when the ballot has already been answered,
+    including by a concurrent redemption of the same token.
+    """
+    sample_flight_id = resolve_token(token, token_repository=token_repository)
+    try:
+        ballot = sample_flight_repository.get_ballot_state(sample_flight_id)
+    except NoResultFound as e:
+        error_message = f"Sample flight with id {sample_flight_id} not found."
+        logger.error(error_message)
+        raise errors.InvalidTokenError(error_message) from e
+    answered_message = f"Sample flight with id {sample_flight_id} already answered."
+    if ballot.response_id is not None:
+        logger.error(answered_message)
+        raise errors.ObjectAlreadyExistsError(answered_message)
+    ensure_valid_samples(ballot.test_type, [data.chosen_sample])
+
+    try:
+        response = response_repository.create_for_token(
+            schemas.ResponseInSchema(
+                sample_flight_id=sample_flight_id,
+                experience_level=data.experience_level,
+                chosen_sample=data.chosen_sample,
+            ),
+            token,
+        )
+    except NoResultFound as e:
+        error_message = f"Token for sample flight with id {sample_flight_id} not found."
+        logger.error(error_message)
+        raise errors.InvalidTokenError(error_message) from e
+    except IntegrityError as e:
+        # another redemption answered the flight first
+        logger.error(answered_message)
+        raise errors.ObjectAlreadyExistsError(answered_message) from e
+    if response is None:
+        logger.error(answered_message)
+        raise errors.ObjectAlreadyExistsError(answered_message)
+    return response
+
+
 def delete_sample_flight_by_id(
     *,
     sample_flight_id: int,
@@ -59,28 +276,160 @@ def delete_sample_flight_by_id(
         raise errors.ObjectNotFoundError(error_message)
 
 
-def get_all_observations_for_experiment(
+def _in_experiment(experiment_id: int) -> ColumnElement[bool]:
+    return models.SampleFlight.experiment_id == experiment_id
+
+
+def _answers_in_experiment(experiment_id: int) -> ColumnElement[bool]:
+    return models.Response.sample_flight_id.in_(
+        select(models.SampleFlight.id).where(_in_experiment(experiment_id))
+    )
+
+
+def create_sample_flights(
     *,
     experiment_id: int,
+    data: list[schemas.SampleFlightBatchItemSchema],
+    experiment_repository: ExperimentRepository,
     sample_flight_repository: SampleFlightRepository,
-    sample_flight_token_repository: SampleFlightRepository,
-    response_repository: SampleFlightRepository,
 ) -> list[schemas.SampleFlightOutSchema]:
-    """Gets all sample flights for a given experiment."""
+    """Creates many sample flights for an experiment in one transaction."""
+    test_type = _get_test_type(experiment_id, experiment_repository)
+    ensure_valid_samples(test_type, [x.correct_sample for x in data])
+    return sample_flight_repository.bulk_create(
+        [
+            schemas.SampleFlightInSchema(experiment_id=experiment_id, **x.model_dump())
+            for x in data
+        ]
+    )
+
+
+def update_sample_flights(
+    *,
+    experiment_id: int,
+    data: list[schemas.SampleFlightBatchUpdateSchema],
+    experiment_repository: ExperimentRepository,
+    sample_flight_repository: SampleFlightRepository,
+) -> list[schemas.SampleFlightOutSchema]:
+    """Updates many of an experiment's sample flights in one transaction, or
+    none if any is missing or belongs to another experiment."""
+    test_type = _get_test_type(experiment_id, experiment_repository)
+    ensure_valid_samples(test_type, [x.correct_sample for x in data])
     try:
-        sample_flights = sample_flight_repository.filter(experiment_id=experiment_id)  # pyright: ignore[reportCallIssue]
-        observations: list[schemas.ObservationSchema] = []
-        for sample_flight in sample_flights:
-            sample_flight_tokens = sample_flight_token_repository.filter(
-                sample_flight_id=sample_flight.id  # pyright: ignore[reportCallIssue]
-            )
-            for token in sample_flight_tokens:
-                responses = response_repository.filter(sample_flight_token_id=token.id)  # pyright: ignore[reportCallIssue]
-                observations.extend(responses)
-        return sample_flights
-    except NoResultFound:
+        return sample_flight_repository.bulk_update(data, _in_experiment(experiment_id))
+    except NoResultFound as e:
+        logger.error(str(e))
+        raise errors.ObjectNotFoundError(message=str(e)) from e
+
+
+def delete_sample_flights(
+    *,
+    experiment_id: int,
+    ids: list[int],
+    sample_flight_repository: SampleFlightRepository,
+) -> int:
+    """Deletes many of an experiment's sample flights in one transaction, or
+    none if any is missing or belongs to another experiment."""
+    try:
+        return sample_flight_repository.bulk_delete(ids, _in_experiment(experiment_id))
+    except NoResultFound as e:
+        logger.error(str(e))
+        raise errors.ObjectNotFoundError(message=str(e)) from e
+
+
+def create_responses(
+    *,
+    experiment_id: int,
+    data: list[schemas.ResponseInSchema],
+    experiment_repository: ExperimentRepository,
+    sample_flight_repository: SampleFlightRepository,
+    response_repository: ResponseRepository,
+) -> list[schemas.ResponseOutSchema]:
+    """Creates many responses to an experiment's sample flights in one
+    transaction, or none if any flight is missing or belongs to another
+    experiment."""
+    test_type = _get_test_type(experiment_id, experiment_repository)
+    ensure_valid_samples(test_type, [x.chosen_sample for x in data])
+    missing = sample_flight_repository.get_missing_ids(
+        {x.sample_flight_id for x in data}, _in_experiment(experiment_id)
+    )
+    if missing:
         error_message = (
-            f"No sample flights found for experiment with id {experiment_id}."
+            f"Sample flights with ids {sorted(missing)} not found in experiment "
+            f"with id {experiment_id}."
         )
         logger.error(error_message)
-        raise errors.ObjectNotFoundError(error_message)
+        raise errors.ObjectNotFoundError(message=error_message)
+    try:
+        return response_repository.bulk_create(data)
+    except IntegrityError as e:
+        error_message = "A sample flight in the batch already has a response."
+        logger.error(error_message)
+        raise errors.ObjectAlreadyExistsError(message=error_message) from e
+
+
+def update_responses(
+    *,
+    experiment_id: int,
+    data: list[schemas.ResponseBatchUpdateSchema],
+    experiment_repository: ExperimentRepository,
+    response_repository: ResponseRepository,
+) -> list[schemas.ResponseOutSchema]:
+    """Updates many responses to an experiment's sample flights in one
+    transaction, or none if any is missing or belongs to another experiment."""
+    test_type = _get_test_type(experiment_id, experiment_repository)
+    ensure_valid_samples(test_type, [x.chosen_sample for x in data])
+    try:
+        return response_repository.bulk_update(
+            data, _answers_in_experiment(experiment_id)
+        )
+    except NoResultFound as e:
+        logger.error(str(e))
+        raise errors.ObjectNotFoundError(message=str(e)) from e
+    except IntegrityError as e:
+        error_message = "A sample flight in the batch already has a response."
+        logger.error(error_message)
+        raise errors.ObjectAlreadyExistsError(message=error_message) from e
+
+
+def delete_responses(
+    *,
+    experiment_id: int,
+    ids: list[int],
+    response_repository: ResponseRepository,
+) -> int:
+    """Deletes many responses to an experiment's sample flights in one
+    transaction, or none if any is missing or belongs to another experiment."""
+    try:
+        return response_repository.bulk_delete(
+            ids, _answers_in_experiment(experiment_id)
+        )
+    except NoResultFound as e:
+        logger.error(str(e))
+        raise errors.ObjectNotFoundError(message=str(e)) from e
+
+
+def get_all_observations_for_experiment(
+    *,
+    experiment_id: int,
+    experiment_repository: ExperimentRepository,
+    sample_flight_repository: SampleFlightRepository,
+    cursor: str | None = None,
+    limit: int = config.PAGE_SIZE_DEFAULT,
+) -> tuple[list[schemas.ObservationSchema], str | None]:
+    """Gets a page of an experiment's observations, each a sample flight with
+    its token and response, and the cursor of the next page.
+
+    Raises `InvalidCursorError` for a cursor that was not returned by this.
+    """
+    try:
+        experiment_repository.get_by_id(id=experiment_id)
+    except NoResultFound as e:
+        error_message = f"Experiment with id {experiment_id} not found."
+        logger.error(error_message)
+        raise errors.ObjectNotFoundError(message=error_message) from e
+    after_id = None if cursor is None else pagination.decode_cursor(cursor)
+    observations, next_id = sample_flight_repository.get_observations_page(
+        experiment_id, limit=limit, after_id=after_id
+    )
+    return observations, None if next_id is None else pagination.encode_cursor(next_id)
@@ -0,0 +1,62 @@
+from triangler_fastapi import config
+from triangler_fastapi.constants import DiscriminationTests
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import statistics
+
+
+def plan_sample_size(
+    *,
+    discriminator_proportion: float,
+    significance_level: float = config.SIGNIFICANCE_LEVEL,
+    beta: float = 0.2,
+    test_type: DiscriminationTests = DiscriminationTests.TRIANGLE,
+) -> schemas.SampleSizePlanSchema:
+    """Finds how many tasters are needed to detect a proportion of discriminators."""
+    p0 = statistics.CHANCE_PROBABILITIES[test_type]
+    sample_size = statistics.required_sample_size(
+        discriminator_proportion, alpha=significance_level, beta=beta, p0=p0
+    )
+    critical_value = None
+    power = None
+    if sample_size is not None:
+        critical_value = statistics.critical_value(
+            sample_size, alpha=significance_level, p0=p0
+        )
+        power = statistics.power(
+            sample_size, discriminator_proportion, alpha=significance_level, p0=p0
+        )
+    return schemas.SampleSizePlanSchema(
+        test_type=test_type,
+        discriminator_proportion=discriminator_proportion,
+        significance_level=significance_level,
+        beta=beta,
+        sample_size=sample_size,
+        critical_value=critical_value,
+        power=power,
+    )
+
+
+def get_critical_value(
+    *,
+    sample_size: int,
+    significance_level: float = config.SIGNIFICANCE_LEVEL,
+    discriminator_proportion: float | None = None,
+    test_type: DiscriminationTests = DiscriminationTests.TRIANGLE,
+) -> schemas.CriticalValueSchema:
+    """Finds the number of correct answers needed for significance."""
+    p0 = statistics.CHANCE_PROBABILITIES[test_type]
+    power = None
+    if discriminator_proportion is not None:
+        power = statistics.power(
+            sample_size, discriminator_proportion, alpha=significance_level, p0=p0
+        )
+    return schemas.CriticalValueSchema(
+        test_type=test_type,
+        sample_size=sample_size,
+        significance_level=significance_level,
+        critical_value=statistics.critical_value(
+            sample_size, alpha=significance_level, p0=p0
+        ),
+        discriminator_proportion=discriminator_proportion,
+        power=power,
+    )
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Self
+from typing import TypeVar
+
+import numpy as np
+from loguru import logger
+
+from triangler_fastapi import config
+from triangler_fastapi import workers
+from triangler_fastapi.constants import QRCodeFormats
+from triangler_fastapi.domain import qr_cache
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.exceptions import errors
+
+Result = TypeVar("Result")
+
+
+def _latency_stats(durations: list[float]) -> schemas.LatencyStatsSchema:
+    if not durations:
+        return schemas.LatencyStatsSchema(
+            count=0, mean_ms=None, p50_ms=None, p95_ms=None, max_ms=None
+        )
+    milliseconds = np.array(durations) * 1000
+    p50, p95 = np.percentile(milliseconds, [50, 95]).tolist()
+    return schemas.LatencyStatsSchema(
+        count=len(durations),
+        mean_ms=float(milliseconds.mean()),
+        p50_ms=p50,
+        p95_ms=p95,
+        max_ms=float(milliseconds.max()),
+    )
+
+
+class _RenderQueue:
+    """Runs renders on the QR thread pool, turning work away once
+    ``max_queue_depth`` renders are queued or running."""
+
+    def __init__(self: Self, max_queue_depth: int, stats_window: int) -> None:
+        self.max_queue_depth = max_queue_depth
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._memory_cache_hits = 0
+        self._queue_waits: deque[float] = deque(maxlen=stats_window)
+        self._render_times: deque[float] = deque(maxlen=stats_window)
+
+    def record_memory_cache_hit(self: Self) -> None:
+        with self._lock:
+            self._memory_cache_hits += 1
+
+    def _run(self: Self, render: Callable[[], Result], enqueued_at: float) -> Result:
+        started_at = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._queue_waits.append(started_at - enqueued_at)
+        try:
+            return render()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._render_times.append(time.perf_counter() - started_at)
+
+    def _on_done(self: Self, future: Future[Result]) -> None:
+        with self._lock:
+            if future.cancelled():
+                # cancelled while still queued, so it never reached `_run`
+                self._queued -= 1
+            elif future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    async def submit(self: Self, render: Callable[[], Result]) -> Result:
+        with self._lock:
+            if self._queued + self._running >= self.max_queue_depth:
+                self._rejected += 1
+                error_message = (
+                    f"QR rendering queue is full ({self.max_queue_depth} renders)."
+                )
+                logger.warning(error_message)
+                raise errors.ServiceOverloadedError(message=error_message)
+            self._queued += 1
+            self._submitted += 1
+        future = workers.get_qr_render_pool().submit(
+            self._run, render, time.perf_counter()
+        )
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self: Self) -> schemas.QRRenderStatsSchema:
+        with self._lock:
+            queue_waits = list(self._queue_waits)
+            render_times = list(self._render_times)
+            counters = {
+                "queued": self._queued,
+                "running": self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "memory_cache_hits": self._memory_cache_hits,
+            }
+        return schemas.QRRenderStatsSchema(
+            threads=config.QR_RENDER_THREADS,
+            max_queue_depth=self.max_queue_depth,
+            queue_wait=_latency_stats(queue_waits),
+            render_time=_latency_stats(render_times),
+            **counters,
+        )
+
+
+_render_queue = _RenderQueue(
+    max_queue_depth=config.QR_RENDER_MAX_QUEUE_DEPTH,
+    stats_window=config.QR_RENDER_STATS_WINDOW,
+)
+
+
+async def get_qr_code(
+    token: str,
+    qr_format: QRCodeFormats = QRCodeFormats.SVG,
+    size: int = config.QR_CODE_BOX_SIZE,
+) -> bytes:
+    """Gets a rendered QR code without blocking the event loop.
+
+    Codes already in memory are returned directly, anything else is read or
+    rendered on the QR thread pool. Raises `ServiceOverloadedError` when the
+    pool's queue is full.
+    """
+    content = qr_cache.get_rendered_qr_code(token, qr_format, size=size)
+    if content is not None:
+        _render_queue.record_memory_cache_hit()
+        return content
+    return await _render_queue.submit(
+        lambda: qr_cache.get_qr_code(token, qr_format, size=size)
+    )
+
+
+async def get_qr_code_path(
+    token: str,
+    qr_format: QRCodeFormats = QRCodeFormats.SVG,
+    size: int = config.QR_CODE_BOX_SIZE,
+) -> Path:
+    """Gets the path of a rendered QR code file without blocking the event loop.
+
+    Raises `ServiceOverloadedError` when the QR thread pool's queue is full.
+    """
+    path = qr_cache.get_rendered_qr_code_path(token, qr_format, size=size)
+    if path is not None:
+        return path
+    return await _render_queue.submit(
+        lambda: qr_cache.get_qr_code_path(token, qr_format, size=size)
+    )
+
+
+def get_stats() -> schemas.QRRenderStatsSchema:
+    """Gets the queue depth, counters and recent latencies of QR rendering."""
+    return _render_queue.stats()
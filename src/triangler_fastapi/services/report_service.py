@@ -0,0 +1,247 @@
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+from sqlalchemy import Row
+from sqlalchemy.exc import NoResultFound
+
+from triangler_fastapi import config
+from triangler_fastapi.constants import ExperienceLevels
+from triangler_fastapi.data import models
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import statistics
+from triangler_fastapi.domain.repositories import ExperimentRepository
+from triangler_fastapi.domain.value_types import DateRange
+from triangler_fastapi.exceptions import errors
+
+_EXPERIENCE_LEVELS = list(ExperienceLevels)
+_EXPERIENCE_LEVEL_INDEX = {level: i for i, level in enumerate(_EXPERIENCE_LEVELS)}
+
+
+def _result_arrays(
+    rows: Sequence[Row[Any]],
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    """Splits result count rows into the chance probability of each experiment's
+    test type and a ``(total_flights, sample_size, correct_count)`` matrix."""
+    chance = statistics.chance_probabilities([row.test_type for row in rows])
+    counts = np.array(
+        [
+            (row.total_flights, row.total_responses, row.correct_responses)
+            for row in rows
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    return chance, counts
+
+
+def get_experiments_report(
+    *,
+    repository: ExperimentRepository,
+    experiment_ids: list[int] | None = None,
+    significance_level: float = config.SIGNIFICANCE_LEVEL,
+    credible_level: float = config.CREDIBLE_INTERVAL_LEVEL,
+) -> schemas.ExperimentReportSchema:
+    """Gets the results of many experiments, optionally limited to some ids."""
+    filters = []
+    if experiment_ids is not None:
+        filters.append(models.Experiment.id.in_(experiment_ids))
+    rows = repository.get_result_counts(*filters)
+
+    chance, counts = _result_arrays(rows)
+    total_flights, sample_size, correct_count = counts.T
+    p_values = statistics.p_values(correct_count, sample_size, chance)
+    is_significant = (sample_size > 0) & (p_values <= significance_level)
+
+    posterior_alpha, posterior_beta = statistics.posterior_parameters(
+        correct_count, sample_size
+    )
+    pc_mean = posterior_alpha / (posterior_alpha + posterior_beta)
+    pc_interval = statistics.credible_intervals(
+        correct_count, sample_size, level=credible_level
+    )
+    pd_mean = statistics.discriminator_proportion(pc_mean, chance)
+    pd_interval = statistics.discriminator_proportion(
+        pc_interval, chance[:, np.newaxis]
+    )
+
+    experiments = [
+        schemas.ExperimentReportRowSchema(
+            experiment_id=row.id,
+            name=row.name,
+            test_type=row.test_type,
+            total_flights=flights,
+            sample_size=n_total,
+            correct_count=n_correct,
+            p_value=p_value,
+            is_significant=significant,
+            posterior=schemas.PosteriorSchema(
+                alpha=alpha,
+                beta=beta,
+                credible_level=credible_level,
+                proportion_correct_mean=pc,
+                proportion_correct_interval=pc_bounds,
+                discriminator_proportion_mean=pd,
+                discriminator_proportion_interval=pd_bounds,
+            ),
+        )
+        for (
+            row,
+            flights,
+            n_total,
+            n_correct,
+            p_value,
+            significant,
+            alpha,
+            beta,
+            pc,
+            pc_bounds,
+            pd,
+            pd_bounds,
+        ) in zip(
+            rows,
+            total_flights.tolist(),
+            sample_size.tolist(),
+            correct_count.tolist(),
+            p_values.tolist(),
+            is_significant.tolist(),
+            posterior_alpha.tolist(),
+            posterior_beta.tolist(),
+            pc_mean.tolist(),
+            pc_interval.tolist(),
+            pd_mean.tolist(),
+            pd_interval.tolist(),
+            strict=True,
+        )
+    ]
+    return schemas.ExperimentReportSchema(
+        significance_level=significance_level, experiments=experiments
+    )
+
+
+def get_adjusted_report(
+    *,
+    repository: ExperimentRepository,
+    date_range: DateRange,
+    significance_level: float = config.SIGNIFICANCE_LEVEL,
+) -> schemas.AdjustedReportSchema:
+    """Gets the results of experiments running within a date range, with p-values
+    adjusted for multiple comparisons across them.
+
+    Experiments overlapping the range are included. Those without responses are
+    reported but left out of the adjusted family, with adjusted p-values of 1.
+    """
+    experiment = models.Experiment
+    rows = repository.get_result_counts(
+        experiment.start_on <= date_range.end_on,
+        experiment.end_on >= date_range.start_on,
+    )
+
+    chance, counts = _result_arrays(rows)
+    _, sample_size, correct_count = counts.T
+    p_values = statistics.p_values(correct_count, sample_size, chance)
+
+    in_family = sample_size > 0
+    bh = np.ones_like(p_values)
+    holm = np.ones_like(p_values)
+    bh[in_family], holm[in_family] = statistics.adjusted_p_values(p_values[in_family])
+
+    experiments = [
+        schemas.AdjustedReportRowSchema(
+            experiment_id=row.id,
+            name=row.name,
+            test_type=row.test_type,
+            start_on=row.start_on,
+            end_on=row.end_on,
+            sample_size=n_total,
+            correct_count=n_correct,
+            p_value=p_value,
+            bh_adjusted_p_value=bh_p_value,
+            holm_adjusted_p_value=holm_p_value,
+            is_significant_bh=counted and bh_p_value <= significance_level,
+            is_significant_holm=counted and holm_p_value <= significance_level,
+        )
+        for row, n_total, n_correct, p_value, bh_p_value, holm_p_value, counted in zip(
+            rows,
+            sample_size.tolist(),
+            correct_count.tolist(),
+            p_values.tolist(),
+            bh.tolist(),
+            holm.tolist(),
+            in_family.tolist(),
+            strict=True,
+        )
+    ]
+    return schemas.AdjustedReportSchema(
+        date_range=date_range,
+        significance_level=significance_level,
+        family_size=int(in_family.sum()),
+        experiments=experiments,
+    )
+
+
+def get_experience_level_report(
+    *,
+    id: int,
+    repository: ExperimentRepository,
+    significance_level: float = config.SIGNIFICANCE_LEVEL,
+) -> schemas.ExperimentStratifiedReportSchema:
+    """Gets an experiment's results broken down by taster experience level."""
+    try:
+        experiment = repository.get_by_id(id)
+    except NoResultFound as e:
+        error_message = f"Experiment with id {id} not found."
+        logger.error(error_message)
+        raise errors.ObjectNotFoundError(message=error_message) from e
+    rows = repository.get_experience_level_counts(id)
+
+    # one row per experience level plus a final pooled row, columns are
+    # (sample size, correct count)
+    counts = np.zeros((len(_EXPERIENCE_LEVELS) + 1, 2), dtype=np.int64)
+    if rows:
+        level_index = np.array([_EXPERIENCE_LEVEL_INDEX[x[0]] for x in rows])
+        counts[level_index] = np.array([x[1:] for x in rows], dtype=np.int64)
+    counts[-1] = counts[:-1].sum(axis=0)
+
+    sample_size, correct_count = counts.T
+    p_values = statistics.p_values(
+        correct_count,
+        sample_size,
+        statistics.CHANCE_PROBABILITIES[experiment.test_type],
+    )
+    is_significant = (sample_size > 0) & (p_values <= significance_level)
+    correct_rate = np.divide(
+        correct_count,
+        sample_size,
+        out=np.full(sample_size.shape, np.nan),
+        where=sample_size > 0,
+    )
+
+    strata = [
+        {
+            "sample_size": n_total,
+            "correct_count": n_correct,
+            "correct_rate": None if np.isnan(rate) else rate,
+            "p_value": p_value,
+            "is_significant": significant,
+        }
+        for n_total, n_correct, rate, p_value, significant in zip(
+            sample_size.tolist(),
+            correct_count.tolist(),
+            correct_rate.tolist(),
+            p_values.tolist(),
+            is_significant.tolist(),
+            strict=True,
+        )
+    ]
+    return schemas.ExperimentStratifiedReportSchema(
+        experiment_id=id,
+        test_type=experiment.test_type,
+        significance_level=significance_level,
+        experience_levels=[
+            schemas.ExperienceLevelResultSchema(experience_level=level, **stratum)
+            for level, stratum in zip(_EXPERIENCE_LEVELS, strata[:-1], strict=True)
+        ],
+        pooled=schemas.StratumResultSchema(**strata[-1]),
+    )
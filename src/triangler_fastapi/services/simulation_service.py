@@ -0,0 +1,132 @@
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import numpy as np
+import numpy.typing as npt
+from loguru import logger
+
+from triangler_fastapi import config
+from triangler_fastapi import workers
+from triangler_fastapi.constants import ExperienceLevels
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import simulation
+from triangler_fastapi.domain import statistics
+from triangler_fastapi.exceptions import errors
+
+_P_VALUE_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+_P_VALUE_HISTOGRAM_BINS = 20
+
+
+def _level_parameters(
+    data: schemas.SimulationInSchema,
+) -> tuple[list[float], list[float]]:
+    """Gets the weight and discriminator proportion of every experience level."""
+    if data.experience_mix:
+        levels = list(data.experience_mix)
+        weights = [data.experience_mix[x] for x in levels]
+    else:
+        levels = list(ExperienceLevels)
+        weights = [1.0] * len(levels)
+    proportions = [
+        data.experience_discriminator_proportion.get(x, data.discriminator_proportion)
+        for x in levels
+    ]
+    return weights, proportions
+
+
+def _summarise(
+    data: schemas.SimulationInSchema,
+    chunks: list[npt.NDArray[np.int64]],
+    p0: float,
+) -> schemas.SimulationResultSchema:
+    """Summarises the p-values of the simulated panels."""
+    n_correct = np.concatenate(chunks)
+    p_values = statistics.p_values(n_correct, data.panel_size, p0)
+    histogram, edges = np.histogram(
+        p_values, bins=_P_VALUE_HISTOGRAM_BINS, range=(0.0, 1.0)
+    )
+    quantiles = np.quantile(p_values, _P_VALUE_QUANTILES)
+    return schemas.SimulationResultSchema(
+        test_type=data.test_type,
+        panel_size=data.panel_size,
+        n_simulations=data.n_simulations,
+        significance_level=data.significance_level,
+        critical_value=statistics.critical_value(
+            data.panel_size, alpha=data.significance_level, p0=p0
+        ),
+        power=float(np.mean(p_values <= data.significance_level)),
+        mean_correct=float(n_correct.mean()),
+        p_value_quantiles={
+            f"p{round(q * 100)}": value
+            for q, value in zip(_P_VALUE_QUANTILES, quantiles.tolist(), strict=True)
+        },
+        p_value_histogram=[
+            schemas.HistogramBinSchema(lower=lower, upper=upper, count=count)
+            for lower, upper, count in zip(
+                edges[:-1].tolist(), edges[1:].tolist(), histogram.tolist(), strict=True
+            )
+        ],
+    )
+
+
+async def run_simulation(
+    *, data: schemas.SimulationInSchema
+) -> schemas.SimulationResultSchema:
+    """Simulates many discrimination test panels and summarises their p-values.
+
+    Runs of more than one chunk are spread over the shared process pool, smaller
+    runs go to a thread, as does the summary, so the event loop is never
+    blocked. On timeout the chunks that have not started are cancelled.
+    """
+    weights, proportions = _level_parameters(data)
+    p0 = statistics.CHANCE_PROBABILITIES[data.test_type]
+    chunk_sizes = [config.SIMULATION_CHUNK_SIZE] * (
+        data.n_simulations // config.SIMULATION_CHUNK_SIZE
+    )
+    if data.n_simulations % config.SIMULATION_CHUNK_SIZE:
+        chunk_sizes.append(data.n_simulations % config.SIMULATION_CHUNK_SIZE)
+    seeds = np.random.SeedSequence(data.seed).spawn(len(chunk_sizes))
+    chunk_tasks = [
+        partial(
+            simulation.simulate_correct_counts,
+            n_simulations=chunk_size,
+            panel_size=data.panel_size,
+            level_weights=weights,
+            level_discriminator_proportions=proportions,
+            seed=seed,
+            p0=p0,
+        )
+        for chunk_size, seed in zip(chunk_sizes, seeds, strict=True)
+    ]
+
+    futures: list[Future[npt.NDArray[np.int64]]] = []
+    try:
+        if len(chunk_tasks) == 1:
+            pending = [asyncio.to_thread(chunk_tasks[0])]
+        else:
+            pool = workers.get_process_pool()
+            futures = [pool.submit(x) for x in chunk_tasks]
+            pending = [asyncio.wrap_future(x) for x in futures]
+        chunks = await asyncio.wait_for(
+            asyncio.gather(*pending), timeout=config.SIMULATION_TIMEOUT_SECONDS
+        )
+    except BrokenProcessPool as e:
+        # the pool is replaced on next use, see `workers.get_process_pool`
+        error_message = "A simulation worker process died, try again."
+        logger.error(error_message)
+        raise errors.WorkerUnavailableError(message=error_message) from e
+    except TimeoutError as e:
+        # chunks already running finish in their worker, queued ones are dropped
+        for future in futures:
+            future.cancel()
+        error_message = (
+            f"Simulation of {data.n_simulations} panels did not finish within "
+            f"{config.SIMULATION_TIMEOUT_SECONDS} seconds."
+        )
+        logger.error(error_message)
+        raise errors.OperationTimedOutError(message=error_message) from e
+
+    # the summary is CPU-bound over every simulated panel, so it runs off the loop
+    return await asyncio.to_thread(_summarise, data, chunks, p0)
@@ -0,0 +1,59 @@
+import asyncio
+import multiprocessing
+
+from loguru import logger
+
+from triangler_fastapi import config
+from triangler_fastapi.data import models
+from triangler_fastapi.data import persistence
+from triangler_fastapi.domain import schemas
+from triangler_fastapi.domain import token_filter
+from triangler_fastapi.domain.repositories import SampleFlightTokenRepository
+
+
+def is_single_worker() -> bool:
+    """Whether this process is the only worker serving requests.
+
+    ``uvicorn --workers`` does not set WEB_CONCURRENCY, but runs every worker as
+    a spawned child of its supervisor, so a spawned child counts as one of
+    several. That includes the single child of ``uvicorn --reload``.
+    """
+    return config.WEB_CONCURRENCY <= 1 and multiprocessing.parent_process() is None
+
+
+def rebuild_token_filter() -> None:
+    """Rebuilds the token filter from one streaming query over every token.
+
+    Does nothing with more than one worker, the filter is left unbuilt and lets
+    every token through.
+    """
+    if not is_single_worker():
+        return
+    with persistence.SessionLocal() as session:
+        repository = SampleFlightTokenRepository(
+            session=session,
+            data_model=models.SampleFlightToken,
+            schema_in=schemas.SampleFlightTokenInSchema,
+            schema_out=schemas.SampleFlightTokenOutSchema,
+        )
+        token_filter.rebuild(repository.iter_tokens())
+
+
+async def keep_token_filter_fresh(
+    interval: float = config.TOKEN_FILTER_REBUILD_SECONDS,
+) -> None:
+    """Rebuilds the token filter now and then every ``interval`` seconds, which
+    drops deleted tokens. Runs until cancelled, or returns at once with more
+    than one worker."""
+    if not is_single_worker():
+        logger.warning(
+            "Running with more than one worker, the token filter is off and every "
+            "token is looked up in the database."
+        )
+        return
+    while True:
+        try:
+            await asyncio.to_thread(rebuild_token_filter)
+        except Exception:
+            logger.exception("Failed to rebuild the token filter.")
+        await asyncio.sleep(interval)
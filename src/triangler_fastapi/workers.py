@@ -0,0 +1,54 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from triangler_fastapi import config
+
+_process_pool: ProcessPoolExecutor | None = None
+_qr_render_pool: ThreadPoolExecutor | None = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Gets the shared process pool for CPU-bound work, creating it on first use
+    and again after a worker died and broke it."""
+    global _process_pool
+    if _process_pool is not None and _process_pool._broken:  # pyright: ignore[reportAttributeAccessIssue]
+        # a broken pool refuses all work, e.g. after a worker was killed for memory
+        logger.warning("Process pool is broken, starting a new one.")
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+    if _process_pool is None:
+        # uvicorn runs threads, so forking a child from it is not safe
+        _process_pool = ProcessPoolExecutor(
+            max_workers=config.WORKER_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"Started process pool with {config.WORKER_PROCESSES} workers.")
+    return _process_pool
+
+
+def get_qr_render_pool() -> ThreadPoolExecutor:
+    """Gets the thread pool QR codes are rendered on, creating it on first use.
+
+    It is kept apart from the default executor so that a burst of renders cannot
+    starve other blocking work.
+    """
+    global _qr_render_pool
+    if _qr_render_pool is None:
+        _qr_render_pool = ThreadPoolExecutor(
+            max_workers=config.QR_RENDER_THREADS, thread_name_prefix="qr-render"
+        )
+    return _qr_render_pool
+
+
+def shutdown() -> None:
+    """Shuts down the shared worker pools, cancelling work that has not started."""
+    global _process_pool, _qr_render_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+    if _qr_render_pool is not None:
+        _qr_render_pool.shutdown(wait=False, cancel_futures=True)
+        _qr_render_pool = None